@@ -0,0 +1,14 @@
+import pytest
+from pydantic import ValidationError
+
+from zivid_nova.models.capture_sequence import CaptureSequence
+
+
+def test_merge_requires_two_3d_captures():
+    with pytest.raises(ValidationError):
+        CaptureSequence.model_validate({"steps": [{"type": "3d"}, {"type": "2d"}], "merge": True})
+
+    sequence = CaptureSequence.model_validate(
+        {"steps": [{"type": "3d", "preset": "diffuse"}, {"type": "3d", "preset": "specular"}], "merge": True}
+    )
+    assert sequence.merge
@@ -0,0 +1,12 @@
+import pytest
+
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+
+
+def test_file_presets_have_files():
+    assert CaptureSettingsPreset.DIFFUSE.to_filename().endswith(".yml")
+
+
+def test_adaptive_preset_has_no_file():
+    with pytest.raises(ValueError, match="resolved"):
+        CaptureSettingsPreset.ADAPTIVE.to_filename()
@@ -0,0 +1,7 @@
+from zivid_nova.models.height_map import HeightMapGrid
+
+
+def test_shape_covers_bounds():
+    grid = HeightMapGrid(x_min=-100.0, x_max=100.0, y_min=0.0, y_max=50.5, resolution=2.0)
+
+    assert grid.shape == (26, 100)
@@ -0,0 +1,12 @@
+import pytest
+from pydantic import ValidationError
+
+from zivid_nova.models.multi_capture import MultiCaptureRequest
+
+
+def test_serial_numbers_must_be_unique():
+    with pytest.raises(ValidationError, match="duplicates"):
+        MultiCaptureRequest.model_validate({"serial_numbers": ["a", "b", "a"]})
+
+    request = MultiCaptureRequest.model_validate({"serial_numbers": ["a", "b"]})
+    assert request.serial_numbers == ["a", "b"]
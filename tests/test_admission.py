@@ -0,0 +1,130 @@
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from zivid_nova import admission as admission_module
+from zivid_nova import zivid_app
+from zivid_nova.admission import AdmissionController, camera_admission
+from zivid_nova.models.multi_capture import MultiCaptureRequest
+from zivid_nova.routes.captures import multi_capture_admission
+
+
+def _controller(average_time: float = 2.0) -> AdmissionController:
+    return AdmissionController(backlog=2, client_concurrency=2, initial_time=average_time)
+
+
+def test_camera_backlog():
+    controller = _controller()
+    controller.admit(["camera"], "a")
+    controller.admit(["camera"], "b")
+
+    with pytest.raises(HTTPException) as error:
+        controller.admit(["camera"], "c")
+    assert error.value.status_code == 503
+    # two requests ahead and the rejected one, 2 s each
+    assert error.value.headers == {"Retry-After": "6"}
+
+    controller.admit(["other"], "c")
+    controller.release(["camera"], "a")
+    controller.admit(["camera"], "c")
+
+
+def test_client_concurrency():
+    controller = _controller()
+    controller.admit(["camera"], "a")
+    controller.admit(["other"], "a")
+
+    with pytest.raises(HTTPException) as error:
+        controller.admit(["third"], "a")
+    assert error.value.status_code == 429
+
+
+def test_timeout():
+    controller = _controller()
+
+    with pytest.raises(HTTPException) as error:
+        controller.admit(["camera"], "a", timeout=1.0)
+    assert error.value.status_code == 503
+
+    controller.admit(["camera"], "a", timeout=3.0)
+
+
+def test_multiple_cameras():
+    controller = _controller()
+    controller.admit(["camera"], "a")
+    controller.admit(["camera", "other"], "b")
+
+    # the client counts once, the cameras once each
+    with pytest.raises(HTTPException) as error:
+        controller.admit(["other", "camera"], "c")
+    assert error.value.status_code == 503
+    controller.admit(["other", "third"], "c")
+
+    controller.release(["camera", "other"], "b")
+    controller.admit(["camera"], "c")
+
+
+def test_average_lock_time():
+    controller = _controller(average_time=1.0)
+    controller.admit(["camera"], "a")
+    controller.release(["camera"], "a", lock_time=6.0)
+    controller.admit(["camera"], "a")
+    controller.release(["camera"], "a")
+
+    assert controller.average_time == 2.0
+
+
+def test_only_admitted_requests_are_timed(monkeypatch):
+    controller = AdmissionController(backlog=1, client_concurrency=1, initial_time=10.0)
+    monkeypatch.setattr(admission_module, "admission", controller)
+    app = FastAPI()
+
+    @app.get("/cameras/{serial_number}", dependencies=[Depends(camera_admission)])
+    @zivid_app.zivid_lock
+    def capture(serial_number: str) -> str:
+        return serial_number
+
+    @app.get("/other")
+    @zivid_app.zivid_lock
+    def other() -> None:
+        pass
+
+    client = TestClient(app)
+    client.get("/other")
+    assert controller.average_time == 10.0
+
+    client.get("/cameras/camera")
+    assert controller.average_time < 8.1
+
+
+def test_rejected_multiple_cameras_are_not_counted():
+    controller = _controller()
+    controller.admit(["camera"], "a")
+    controller.admit(["camera"], "b")
+
+    with pytest.raises(HTTPException):
+        controller.admit(["other", "camera"], "c")
+    controller.admit(["other"], "a")
+    controller.admit(["other"], "b")
+
+
+def test_multi_capture_admission(monkeypatch):
+    controller = AdmissionController(backlog=1, client_concurrency=1, initial_time=2.0)
+    monkeypatch.setattr(admission_module, "admission", controller)
+    app = FastAPI()
+
+    @app.post("/multi", dependencies=[Depends(multi_capture_admission)])
+    def multi(request: MultiCaptureRequest) -> list[int]:
+        status_codes = []
+        for serial_numbers, client in [(["a"], "other"), (["b"], "other"), (["c"], "client")]:
+            with pytest.raises(HTTPException) as error:
+                controller.admit(serial_numbers, client)
+            status_codes.append(error.value.status_code)
+        return status_codes
+
+    client = TestClient(app)
+    response = client.post("/multi", json={"serial_numbers": ["a", "b"]}, headers={"Client-Id": "client"})
+    # both cameras are admitted and the client once until the response
+    assert response.json() == [503, 503, 429]
+
+    controller.admit(["a", "b"], "client")
@@ -0,0 +1,61 @@
+import time
+from threading import Event
+
+from zivid_nova.background import CoalescingTask
+
+
+def _wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.01)
+
+
+def test_burst_is_coalesced():
+    runs = []
+    task = CoalescingTask("test", lambda: runs.append(time.monotonic()), delay=0.1)
+
+    for _ in range(10):
+        task.request()
+
+    _wait_until(lambda: len(runs) == 1)
+    time.sleep(0.3)
+    assert len(runs) == 1
+
+
+def test_request_during_run_triggers_another_run():
+    started = Event()
+    release = Event()
+    runs = []
+
+    def function():
+        runs.append(1)
+        started.set()
+        release.wait()
+
+    task = CoalescingTask("test", function)
+    task.request()
+    started.wait()
+
+    task.request()
+    task.request()
+    release.set()
+
+    _wait_until(lambda: len(runs) == 2)
+    time.sleep(0.1)
+    assert len(runs) == 2
+
+
+def test_failing_function_does_not_stop_task():
+    runs = []
+
+    def function():
+        runs.append(1)
+        raise RuntimeError("boom")
+
+    task = CoalescingTask("test", function)
+    task.request()
+    _wait_until(lambda: len(runs) == 1)
+    task.request()
+    _wait_until(lambda: len(runs) == 2)
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from zivid_nova import board_tracker, zivid_app
+from zivid_nova.models.board_detection import BoardDetection
+from zivid_nova.zivid_app import zivid_lock
+
+
+@pytest.fixture(name="detections")
+def fixture_detections(monkeypatch):
+    detections = []
+
+    def detect_board(serial_number: str) -> BoardDetection:
+        detection = BoardDetection(valid=False, pose=None, feedback=serial_number, timestamp=datetime.now(timezone.utc))
+        detections.append(detection)
+        return detection
+
+    monkeypatch.setattr(board_tracker, "detect_board", detect_board)
+    return detections
+
+
+@pytest.mark.asyncio
+async def test_subscribers_receive_detections(detections):
+    tracker = board_tracker.BoardTracker("serial")
+    first = tracker.subscribe()
+    second = tracker.subscribe()
+
+    assert (await asyncio.wait_for(first.get(), 1)).feedback == "serial"
+    assert (await asyncio.wait_for(second.get(), 1)).feedback == "serial"
+
+    tracker.unsubscribe(first)
+    tracker.unsubscribe(second)
+    assert detections
+
+
+@pytest.mark.asyncio
+async def test_tracking_stops_without_subscribers(detections):
+    tracker = board_tracker.BoardTracker("serial")
+    queue = tracker.subscribe()
+    await asyncio.wait_for(queue.get(), 1)
+
+    tracker.unsubscribe(queue)
+    await asyncio.sleep(0.1)
+    count = len(detections)
+    await asyncio.sleep(0.1)
+
+    assert len(detections) == count
+
+
+@pytest.mark.asyncio
+async def test_requests_are_served_while_tracking(monkeypatch):
+    @zivid_lock
+    def detect_board(serial_number: str) -> BoardDetection:
+        time.sleep(0.01)
+        return BoardDetection(valid=False, pose=None, feedback=serial_number, timestamp=datetime.now(timezone.utc))
+
+    @zivid_lock
+    def request() -> float:
+        return time.perf_counter()
+
+    monkeypatch.setattr(board_tracker, "detect_board", detect_board)
+    tracker = board_tracker.BoardTracker("serial")
+    queue = tracker.subscribe()
+    await asyncio.wait_for(queue.get(), 1)
+
+    latencies = []
+    for _ in range(20):
+        start = time.perf_counter()
+        latencies.append(await asyncio.to_thread(request) - start)
+    tracker.unsubscribe(queue)
+
+    # a request waits for at most the running detection
+    assert max(latencies) < 0.1
+
+
+@pytest.mark.asyncio
+async def test_tracker_yields_to_waiting_requests(detections, monkeypatch):
+    monkeypatch.setattr(zivid_app, "lock_waiters", lambda: 1)
+    tracker = board_tracker.BoardTracker("serial")
+    queue = tracker.subscribe()
+    await asyncio.sleep(0.1)
+    assert not detections
+
+    monkeypatch.setattr(zivid_app, "lock_waiters", lambda: 0)
+    await asyncio.wait_for(queue.get(), 1)
+    tracker.unsubscribe(queue)
@@ -0,0 +1,130 @@
+import json
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from zivid_nova.models.calibration import Calibration
+from zivid_nova.routes import calibrations
+from zivid_nova.store import CALIBRATION, SessionStore
+
+_POSE = {"position": [1.0, 2.0, 3.0], "orientation": [0.1, 0.2, 0.3]}
+
+
+class _DetectionResult:
+    def __init__(self, valid: bool):
+        self._valid = valid
+
+    def valid(self) -> bool:
+        return self._valid
+
+
+@pytest.fixture(name="client")
+def fixture_client(monkeypatch):
+    """Detects the board in frames whose content starts with b"valid", the serial number is the rest of the line"""
+
+    def detect_calibration_board_in_file(path: str) -> tuple[str, _DetectionResult]:
+        content = Path(path).read_bytes()
+        if content.startswith(b"bad"):
+            raise RuntimeError("Invalid ZDF file")
+        state, _, serial_number = content.decode().partition(" ")
+        return serial_number, _DetectionResult(state == "valid")
+
+    monkeypatch.setattr(calibrations, "detect_calibration_board_in_file", detect_calibration_board_in_file)
+    monkeypatch.setattr(calibrations, "calibrations", {})
+    monkeypatch.setattr(calibrations, "store", None)
+    monkeypatch.setattr(Calibration, "recalibrate", lambda self: None)
+
+    app = FastAPI()
+    app.include_router(calibrations.router)
+    return TestClient(app)
+
+
+def _dataset(frames: dict[str, bytes], manifest: bool = True) -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        if manifest:
+            entries = [{"pose": _POSE, "frame": name} for name in frames]
+            archive.writestr(calibrations.DATASET_MANIFEST, json.dumps(entries))
+        for name, content in frames.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _post(client: TestClient, dataset: bytes):
+    return client.post("/calibrations/datasets", content=dataset, headers={"Content-Type": "application/zip"})
+
+
+def test_calibrate_dataset(client):
+    response = _post(client, _dataset({"a.zdf": b"valid serial", "b.zdf": b"invalid serial", "c.zdf": b"valid serial"}))
+
+    assert response.status_code == 200
+    assert response.json()["serial_number"] == "serial"
+    assert len(response.json()["poses"]) == 2
+    assert response.json()["id"] in calibrations.calibrations
+
+
+def test_missing_manifest(client):
+    response = _post(client, _dataset({"a.zdf": b"valid serial"}, manifest=False))
+
+    assert response.status_code == 400
+    assert not calibrations.calibrations
+
+
+def test_bad_frame(client):
+    response = _post(client, _dataset({"a.zdf": b"valid serial", "b.zdf": b"bad"}))
+
+    assert response.status_code == 400
+    assert "Invalid ZDF file" in response.json()["detail"]
+
+
+def test_mixed_serial_numbers(client):
+    response = _post(client, _dataset({"a.zdf": b"valid first", "b.zdf": b"valid second"}))
+
+    assert response.status_code == 400
+    assert "exactly one camera" in response.json()["detail"]
+
+
+def test_dataset_is_persisted(client, monkeypatch, tmp_path: Path):
+    store = SessionStore(tmp_path)
+    monkeypatch.setattr(calibrations, "store", store)
+
+    response = _post(client, _dataset({"a.zdf": b"valid serial", "b.zdf": b"invalid serial", "c.zdf": b"valid serial"}))
+
+    sessions = store.sessions(CALIBRATION)
+    assert [(session.id, session.serial_number) for session in sessions] == [(response.json()["id"], "serial")]
+    entries = store.entries(response.json()["id"])
+    assert [entry.frame_path.read_bytes() for entry in entries] == [b"valid serial", b"valid serial"]
+    assert all(entry.pose is not None for entry in entries)
+    store.close()
+
+
+def test_too_many_frames(client, monkeypatch):
+    monkeypatch.setattr(calibrations, "DATASET_MAX_FRAMES", 2)
+
+    response = _post(client, _dataset({f"{index}.zdf": b"valid serial" for index in range(3)}))
+
+    assert response.status_code == 413
+
+
+def test_extracted_size_is_limited(client, monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(calibrations, "DATASET_EXTRACT_LIMIT", 2**20)
+    monkeypatch.setattr(calibrations.tempfile, "tempdir", str(tmp_path))
+
+    # compresses to a few kB
+    response = _post(client, _dataset({"a.zdf": b"valid serial", "b.zdf": bytes(2**20)}))
+
+    assert response.status_code == 413
+    # nothing was extracted
+    assert not [path for path in tmp_path.rglob("*") if path.is_file()]
+
+
+def test_manifest_size_is_limited(client, monkeypatch):
+    monkeypatch.setattr(calibrations, "DATASET_MANIFEST_LIMIT", 16)
+
+    response = _post(client, _dataset({"a.zdf": b"valid serial"}))
+
+    assert response.status_code == 413
@@ -0,0 +1,52 @@
+import pytest
+
+from zivid_nova.captures import CaptureCache
+
+
+def test_add_and_get():
+    cache = CaptureCache(size=2)
+    frame = object()
+
+    capture = cache.add("serial", frame)
+
+    assert cache.get(capture.id).frame is frame
+    assert cache.get(capture.id).serial_number == "serial"
+
+
+def test_oldest_capture_is_evicted():
+    cache = CaptureCache(size=2)
+    first = cache.add("serial", object())
+    second = cache.add("serial", object())
+    third = cache.add("serial", object())
+
+    with pytest.raises(KeyError):
+        cache.get(first.id)
+    assert [capture.id for capture in cache.list()] == [second.id, third.id]
+
+
+def test_remove():
+    cache = CaptureCache(size=2)
+    capture = cache.add("serial", object())
+
+    cache.remove(capture.id)
+    cache.remove(capture.id)
+
+    assert not cache.list()
+
+
+class _Frame:
+    def save(self, path: str):
+        with open(path, "wb") as file:
+            file.write(b"zdf")
+
+
+def test_zdf_file_is_removed_on_eviction():
+    cache = CaptureCache(size=1)
+    capture = cache.add("serial", _Frame())
+
+    path = capture.zdf_file()
+    assert path.read_bytes() == b"zdf"
+    assert capture.zdf_file() == path
+
+    cache.add("serial", _Frame())
+    assert not path.exists()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from zivid_nova.compact_cloud import Compression, decode, encode, octahedral_decode, octahedral_encode
+
+
+def _points(count: int = 1000) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    positions = (rng.random((count, 3)) * [400.0, 300.0, 200.0] + [-200.0, -150.0, 800.0]).astype(np.float32)
+    colors = rng.integers(0, 256, (count, 4), dtype=np.uint8)
+    normals = rng.normal(size=(count, 3)).astype(np.float32)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return positions, colors, normals
+
+
+def test_octahedral_round_trip():
+    _, _, normals = _points()
+    normals[0] = np.nan
+
+    decoded = octahedral_decode(octahedral_encode(normals))
+
+    assert np.isnan(decoded[0]).all()
+    # snorm8 octahedral encoding has an error of about one degree
+    assert np.all(np.einsum("ij,ij->i", decoded[1:], normals[1:]) > np.cos(np.radians(2)))
+
+
+@pytest.mark.parametrize("compression", [c for c in Compression if c.available])
+def test_round_trip(compression: Compression):
+    positions, colors, normals = _points()
+
+    data = encode(positions, colors, normals, scale=0.1, compression=compression)
+    decoded_positions, decoded_colors, decoded_normals = decode(data)
+
+    assert np.abs(decoded_positions - positions).max() <= 0.05 + 1e-3
+    np.testing.assert_array_equal(decoded_colors, colors[:, :3])
+    assert decoded_normals is not None and decoded_normals.shape == normals.shape
+
+
+def test_round_trip_without_normals_uses_32_bit_for_large_extents():
+    positions = np.array([[0.0, 0.0, 0.0], [10000.0, 0.0, 0.0]], dtype=np.float32)
+    colors = np.zeros((2, 3), dtype=np.uint8)
+
+    data = encode(positions, colors, scale=0.1)
+    decoded_positions, _, normals = decode(data)
+
+    assert data[5] == 4
+    np.testing.assert_array_almost_equal(decoded_positions, positions)
+    assert normals is None
+
+
+def test_smaller_than_float_encoding():
+    positions, colors, normals = _points()
+
+    data = encode(positions, colors, normals)
+
+    assert len(data) < (positions.nbytes + normals.nbytes + colors.nbytes) / 2
+
+
+def test_empty_point_cloud():
+    positions, colors, normals = decode(encode(np.empty((0, 3)), np.empty((0, 3), dtype=np.uint8)))
+
+    assert positions.shape == (0, 3)
+    assert colors.shape == (0, 3)
+    assert normals is None
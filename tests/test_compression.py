@@ -0,0 +1,172 @@
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from zivid_nova.compact_cloud import MEDIA_TYPE
+from zivid_nova.compression import CompressionMiddleware, available_encodings, negotiate_encoding
+from zivid_nova.compression_benchmark import benchmark_frame
+from zivid_nova.spool import file_response, spool_path
+
+
+def test_negotiate_encoding_prefers_server_order():
+    assert negotiate_encoding("gzip, zstd, br", ["zstd", "br", "gzip"]) == "zstd"
+
+
+def test_negotiate_encoding_quality_values():
+    assert negotiate_encoding("zstd;q=0.5, gzip", ["zstd", "gzip"]) == "gzip"
+    assert negotiate_encoding("*;q=0.1, gzip;q=0", ["zstd", "gzip"]) == "zstd"
+
+
+def test_negotiate_encoding_none():
+    assert negotiate_encoding("", ["gzip"]) is None
+    assert negotiate_encoding("identity", ["gzip"]) is None
+    assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+
+
+async def _request(
+    body: bytes,
+    media_type: str,
+    accept_encoding: str = "gzip",
+    chunks: int = 1,
+    headers: tuple = (),
+    request_headers: tuple = (),
+) -> list[dict]:
+    async def app(scope, receive, send):
+        response_headers = [(b"content-type", media_type.encode()), (b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": [*response_headers, *headers]})
+        size = len(body) // chunks
+        for i in range(chunks):
+            end = len(body) if i == chunks - 1 else (i + 1) * size
+            await send({"type": "http.response.body", "body": body[i * size : end], "more_body": i < chunks - 1})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode()), *request_headers]}
+    await CompressionMiddleware(app, minimum_size=100)(scope, None, send)
+    return messages
+
+
+def _headers(message: dict) -> dict[bytes, bytes]:
+    return dict(message["headers"])
+
+
+@pytest.mark.asyncio
+async def test_compresses_streamed_response():
+    body = bytes(range(256)) * 100
+
+    messages = await _request(body, "application/octet-stream", chunks=4)
+
+    headers = _headers(messages[0])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert gzip.decompress(b"".join(message["body"] for message in messages[1:])) == body
+
+
+@pytest.mark.asyncio
+async def test_skips_small_and_compressed_responses():
+    small = await _request(b"x" * 10, "application/octet-stream")
+    png = await _request(b"x" * 1000, "image/png")
+    json = await _request(b"x" * 1000, "application/json")
+    compact = await _request(b"x" * 1000, MEDIA_TYPE)
+    not_accepted = await _request(b"x" * 1000, "application/octet-stream", accept_encoding="")
+
+    for messages in (small, png, json, compact, not_accepted):
+        assert b"content-encoding" not in _headers(messages[0])
+    assert png[1]["body"] == b"x" * 1000
+
+
+@pytest.mark.asyncio
+async def test_skips_range_requests():
+    ranges = ((b"accept-ranges", b"bytes"),)
+    partial = await _request(
+        b"x" * 1000, "application/octet-stream", headers=ranges, request_headers=((b"range", b"bytes=0-"),)
+    )
+    if_range = await _request(
+        b"x" * 1000, "application/octet-stream", headers=ranges, request_headers=((b"if-range", b'"etag"'),)
+    )
+    full = await _request(b"x" * 1000, "application/octet-stream", headers=ranges)
+
+    for messages in (partial, if_range):
+        assert b"content-encoding" not in _headers(messages[0])
+        assert _headers(messages[0])[b"accept-ranges"] == b"bytes"
+    assert _headers(full[0])[b"content-encoding"] == b"gzip"
+    assert b"accept-ranges" not in _headers(full[0])
+
+
+async def _send_file(path: str, media_type: str) -> list[dict]:
+    async def app(scope, receive, send):
+        assert "http.response.pathsend" in scope["extensions"]
+        size = os.path.getsize(path)
+        headers = [(b"content-type", media_type.encode()), (b"content-length", str(size).encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.pathsend", "path": path})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")], "extensions": {"http.response.pathsend": {}}}
+    await CompressionMiddleware(app, minimum_size=100)(scope, None, send)
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_compresses_file_responses(tmp_path):
+    body = bytes(range(256)) * 100
+    (tmp_path / "frame.zdf").write_bytes(body)
+    (tmp_path / "image.png").write_bytes(body)
+
+    compressed = await _send_file(str(tmp_path / "frame.zdf"), "application/octet-stream")
+    png = await _send_file(str(tmp_path / "image.png"), "image/png")
+
+    assert _headers(compressed[0])[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(b"".join(message["body"] for message in compressed[1:])) == body
+    assert b"content-encoding" not in _headers(png[0])
+    assert png[1] == {"type": "http.response.pathsend", "path": str(tmp_path / "image.png")}
+
+
+@pytest.mark.parametrize("encoding", ["zstd", "gzip"])
+def test_compresses_kept_file_download(encoding: str):
+    if encoding not in available_encodings():
+        pytest.skip(f"{encoding} is not available")
+    body = bytes(range(256)) * 100
+    path = spool_path(".zdf")
+    path.write_bytes(body)
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/frame")
+    def get_frame(request: Request):
+        return file_response(request, path, "frame.zdf", etag="capture", delete=False)
+
+    with TestClient(app) as client:
+        response = client.get("/frame", headers={"Accept-Encoding": encoding})
+        resumed = client.get("/frame", headers={"Accept-Encoding": encoding, "Range": "bytes=100-"})
+    path.unlink()
+
+    assert response.headers["content-encoding"] == encoding
+    assert "accept-ranges" not in response.headers
+    assert "etag" not in response.headers
+    assert response.content == body
+    assert resumed.status_code == 206
+    assert "content-encoding" not in resumed.headers
+    assert resumed.content == body[100:]
+
+
+def test_benchmark_frame(tmp_path):
+    path = tmp_path / "frame.zdf"
+    path.write_bytes(bytes(range(256)) * 1000)
+
+    report = benchmark_frame(path, repeat=1)
+
+    assert report["bytes"] == 256000
+    assert report["encodings"]["gzip"]["bytes"] < 256000
+    assert report["encodings"]["gzip"]["bytes_saved"] == 256000 - report["encodings"]["gzip"]["bytes"]
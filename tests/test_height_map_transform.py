@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from zivid_nova import extrinsics
+from zivid_nova.models.calibration import Calibration
+from zivid_nova.models.pose import Pose
+from zivid_nova.routes import calibrations
+from zivid_nova.routes.cameras import height_map_transform
+
+_CAMERA = Pose(position=(0.0, 0.0, 100.0), orientation=(0.0, 0.0, 0.0))
+_FLANGE = Pose(position=(500.0, 0.0, 800.0), orientation=(np.pi, 0.0, 0.0))
+
+
+def _calibration(hand_eye_calibration):
+    return Calibration(
+        id="calibration",
+        serial_number="serial",
+        poses=[],
+        detection_results=[],
+        residuals=None,
+        hand_eye_calibration=hand_eye_calibration,
+    )
+
+
+@pytest.fixture(autouse=True)
+def fixture_state(monkeypatch):
+    monkeypatch.setattr(calibrations, "calibrations", {})
+    monkeypatch.setattr(calibrations, "stored_calibrations", {})
+    monkeypatch.setattr(extrinsics, "get_extrinsics", lambda serial_number: None)
+
+
+def test_extrinsics(monkeypatch):
+    monkeypatch.setattr(extrinsics, "get_extrinsics", lambda serial_number: _CAMERA)
+
+    assert np.allclose(height_map_transform("serial", None, None), _CAMERA.to_matrix())
+
+
+def test_missing_extrinsics():
+    with pytest.raises(HTTPException) as error:
+        height_map_transform("serial", None, None)
+    assert error.value.status_code == 412
+
+
+def test_hand_eye_calibration():
+    calibrations.calibrations["calibration"] = _calibration(_CAMERA)
+
+    transform = height_map_transform("serial", "calibration", _FLANGE.model_dump_json())
+
+    # the camera looks down from 100 mm below the flange, which is 800 mm above the base
+    assert np.allclose(transform[:3, 3], [500.0, 0.0, 700.0])
+    assert np.allclose(transform, _FLANGE.to_matrix() @ _CAMERA.to_matrix())
+
+
+@pytest.mark.parametrize(
+    "serial_number, hand_eye_calibration, robot_pose, status_code",
+    [
+        ("serial", _CAMERA, None, 400),
+        ("serial", _CAMERA, '{"position": [0, 0]}', 400),
+        ("other", _CAMERA, _FLANGE.model_dump_json(), 400),
+        ("serial", None, _FLANGE.model_dump_json(), 412),
+    ],
+)
+def test_invalid_hand_eye_calibration(serial_number, hand_eye_calibration, robot_pose, status_code):
+    calibrations.calibrations["calibration"] = _calibration(hand_eye_calibration)
+
+    with pytest.raises(HTTPException) as error:
+        height_map_transform(serial_number, "calibration", robot_pose)
+    assert error.value.status_code == status_code
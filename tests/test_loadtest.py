@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from zivid_nova.loadtest import REJECTED_BACKOFF, parse_mix, parse_resident_memory, retry_after, run
+
+
+def _service(client_ids: set[str]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/cameras")
+    def get_cameras():
+        return [{"serial_number": "serial"}]
+
+    @app.post("/cameras/{serial_number}/captures")
+    def capture_frame(serial_number: str, client_id: str = Header()):
+        client_ids.add(client_id)
+        return {"id": "abc", "serial_number": serial_number}
+
+    @app.get("/cameras/{serial_number}/captures/{capture_id}/pointcloud")
+    def get_capture_pointcloud(serial_number: str, capture_id: str):
+        raise HTTPException(status_code=429, detail="Too many concurrent requests", headers={"Retry-After": "10"})
+
+    @app.get("/cameras/{serial_number}/captures/{capture_id}/quality")
+    def get_capture_quality(serial_number: str, capture_id: str):
+        raise HTTPException(status_code=404, detail="Capture ID not found")
+
+    @app.get("/metrics")
+    def get_metrics():
+        return PlainTextResponse(
+            'zivid_nova_resident_memory_bytes{worker="0"} 10\nzivid_nova_resident_memory_bytes 5\n'
+        )
+
+    return app
+
+
+def test_parse_mix():
+    assert parse_mix("capture:2, infield") == {"capture": 2, "infield": 1}
+    with pytest.raises(ValueError):
+        parse_mix("unknown:1")
+
+
+def test_parse_resident_memory():
+    assert (
+        parse_resident_memory("# TYPE zivid_nova_resident_memory_bytes gauge\nzivid_nova_resident_memory_bytes 5\n")
+        == 5
+    )
+    assert parse_resident_memory("") is None
+
+
+def test_retry_after():
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "3"})) == 3.0
+    assert (
+        retry_after(httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == REJECTED_BACKOFF
+    )
+    assert retry_after(httpx.Response(503)) == REJECTED_BACKOFF
+
+
+def test_run():
+    client_ids: set[str] = set()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=_service(client_ids)), base_url="http://service")
+
+    report = asyncio.run(run("http://service", {"capture": 2}, 0.2, sample_interval=0.05, client=client))
+
+    assert report["serial_number"] == "serial"
+    assert client_ids == {"loadtest-capture-0", "loadtest-capture-1"}
+    assert report["requests"]["capture"]["error_rate"] == 0.0
+    assert report["requests"]["capture_pointcloud"]["error_rate"] == 0.0
+    assert report["requests"]["capture_pointcloud"]["rejection_rate"] == 1.0
+    # rejected clients wait for the rest of the test instead of retrying
+    assert report["requests"]["capture_pointcloud"]["count"] == 2
+    assert report["requests"]["capture_pointcloud"]["latency_ms"] is None
+    assert report["requests"]["capture_quality"]["error_rate"] == 1.0
+    assert report["requests"]["capture_quality"]["status_codes"] == {
+        "404": report["requests"]["capture_quality"]["count"]
+    }
+    assert set(report["total"]["latency_ms"]) == {"p50", "p95", "p99", "mean", "max"}
+    assert report["total"]["throughput_rps"] > 0
+    assert report["memory"][0]["resident_memory_bytes"] == 15
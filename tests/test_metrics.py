@@ -0,0 +1,33 @@
+import numpy as np
+
+from zivid_nova.metrics import Metrics
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.point_cloud import quality_statistics
+
+
+def test_render():
+    metrics = Metrics(lambda: 0.5)
+    statistics = quality_statistics(
+        np.array([[100.0, np.nan]]), np.zeros((1, 2, 4), dtype=np.uint8), np.array([[12.0, 0.0]])
+    )
+    metrics.record_capture("serial", CaptureSettingsPreset.DIFFUSE, statistics)
+    metrics.record_capture("serial", CaptureSettingsPreset.DIFFUSE, statistics)
+
+    lines = metrics.render().splitlines()
+
+    assert "# TYPE zivid_nova_resident_memory_bytes gauge" in lines
+    assert "zivid_nova_lock_hold_seconds 0.5" in lines
+    assert 'zivid_nova_captures_total{serial_number="serial",preset="diffuse"} 2' in lines
+    assert 'zivid_nova_capture_valid_ratio{serial_number="serial",preset="diffuse"} 0.5' in lines
+    assert 'zivid_nova_capture_depth_mm{serial_number="serial",preset="diffuse",quantile="0.5"} 100.0' in lines
+    assert 'zivid_nova_capture_snr_bucket{serial_number="serial",preset="diffuse",le="10"} 0' in lines
+    assert 'zivid_nova_capture_snr_bucket{serial_number="serial",preset="diffuse",le="20"} 2' in lines
+    assert 'zivid_nova_capture_snr_count{serial_number="serial",preset="diffuse"} 2' in lines
+
+
+def test_render_without_captures():
+    lines = Metrics().render().splitlines()
+
+    assert "# TYPE zivid_nova_captures_total counter" in lines
+    assert not any(line.startswith("zivid_nova_captures_total") for line in lines)
+    assert not any(line.startswith("zivid_nova_lock_hold_seconds") for line in lines)
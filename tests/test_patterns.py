@@ -0,0 +1,87 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from zivid_nova import patterns
+from zivid_nova.patterns import PatternCache, letterbox
+
+
+def _png(width: int, height: int, color: tuple[int, int, int]) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "png")
+    return buffer.getvalue()
+
+
+def test_letterbox_keeps_aspect_ratio():
+    rgba = np.zeros((100, 100, 4), dtype=np.uint8)
+    rgba[..., 0] = 255
+    rgba[..., 3] = 255
+
+    bgra = letterbox(rgba, 720, 1280)
+
+    assert bgra.shape == (720, 1280, 4)
+    # red is the third channel in bgra, the borders are black
+    assert tuple(bgra[360, 640]) == (0, 0, 255, 255)
+    assert tuple(bgra[360, 100]) == (0, 0, 0, 255)
+
+
+def test_pattern_cache():
+    cache = PatternCache(max_patterns=4, max_pixels=10**6)
+    data = _png(200, 100, (0, 255, 0))
+
+    pattern_id = cache.add(data)
+
+    assert cache.add(data) == pattern_id
+    assert cache.list() == {pattern_id: (100, 200)}
+    fitted = cache.get(pattern_id, (720, 1000))
+    assert fitted.shape == (720, 1000, 4)
+    assert cache.get(pattern_id, (720, 1000)) is fitted
+
+    cache.remove(pattern_id)
+    with pytest.raises(KeyError):
+        cache.get(pattern_id, (720, 1000))
+
+
+def test_invalid_pattern():
+    with pytest.raises(ValueError):
+        PatternCache(max_patterns=4, max_pixels=10**6).add(b"not an image")
+
+
+def test_pattern_count_is_limited():
+    cache = PatternCache(max_patterns=2, max_pixels=10**6)
+    first = cache.add(_png(10, 10, (255, 0, 0)))
+    cache.add(_png(10, 10, (0, 255, 0)))
+
+    with pytest.raises(ValueError, match="At most 2 patterns"):
+        cache.add(_png(10, 10, (0, 0, 255)))
+    # known patterns can be uploaded again
+    assert cache.add(_png(10, 10, (255, 0, 0))) == first
+
+    cache.remove(first)
+    cache.add(_png(10, 10, (0, 0, 255)))
+
+
+def test_pattern_size_is_limited():
+    cache = PatternCache(max_patterns=2, max_pixels=100 * 100)
+
+    with pytest.raises(ValueError, match="larger than"):
+        cache.add(_png(101, 100, (255, 0, 0)))
+    assert not cache.list()
+
+
+def test_patterns_are_scaled_outside_of_the_lock(monkeypatch):
+    cache = PatternCache(max_patterns=2, max_pixels=10**6)
+    pattern_id = cache.add(_png(200, 100, (0, 255, 0)))
+    locked = []
+
+    def letterbox_unlocked(rgba: np.ndarray, height: int, width: int) -> np.ndarray:
+        locked.append(cache._lock.locked())  # pylint: disable=protected-access
+        return letterbox(rgba, height, width)
+
+    monkeypatch.setattr(patterns, "letterbox", letterbox_unlocked)
+    fitted = cache.get(pattern_id, (720, 1000))
+
+    assert locked == [False]
+    assert cache.get(pattern_id, (720, 1000)) is fitted
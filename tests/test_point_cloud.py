@@ -0,0 +1,194 @@
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+from zivid_nova.point_cloud import (
+    OrganizedPointCloud,
+    block_mean,
+    changed_mask,
+    encode_ply,
+    height_map,
+    merge_by_snr,
+    quality_statistics,
+    radius_inliers,
+    statistical_inliers,
+    transform_points,
+    valid_points,
+    voxel_downsample,
+    voxel_keys,
+)
+
+
+def test_transform_points():
+    matrix = np.eye(4)
+    matrix[:3, :3] = R.from_rotvec([0.0, 0.0, np.pi / 2]).as_matrix()
+    matrix[:3, 3] = [10.0, 0.0, 0.0]
+    points = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 5.0]], dtype=np.float32)
+
+    transformed = transform_points(points, matrix)
+
+    np.testing.assert_array_almost_equal(transformed, [[10.0, 1.0, 0.0], [9.0, 0.0, 5.0]])
+    assert transformed.dtype == np.float32
+
+
+def test_valid_points():
+    positions = np.array([[[0.0, 0.0, 1.0], [np.nan, np.nan, np.nan]], [[1.0, 1.0, 1.0], [2.0, 2.0, 2.0]]])
+    colors = np.arange(16, dtype=np.uint8).reshape(2, 2, 4)
+
+    valid_positions, valid_colors = valid_points(positions, colors)
+
+    assert valid_positions.shape == (3, 3)
+    np.testing.assert_array_equal(valid_colors[:, 0], [0, 8, 12])
+
+
+def test_voxel_keys():
+    positions = np.array([[0.1, 0.1, 0.1], [0.2, 0.2, 0.2], [1.5, 0.1, 0.1], [-0.1, 0.1, 0.1], [0.1, -0.1, 0.1]])
+
+    keys = voxel_keys(positions, 1.0)
+
+    assert keys[0] == keys[1]
+    assert len(np.unique(keys)) == 4
+
+
+def test_voxel_downsample():
+    positions = np.array([[0.2, 0.2, 0.2], [0.4, 0.4, 0.4], [1.5, 0.1, 0.1]], dtype=np.float32)
+    colors = np.array([[0, 0, 0], [255, 100, 1], [7, 7, 7]], dtype=np.uint8)
+
+    downsampled_positions, downsampled_colors = voxel_downsample(positions, 1.0, colors)
+
+    np.testing.assert_array_almost_equal(downsampled_positions, [[0.3, 0.3, 0.3], [1.5, 0.1, 0.1]])
+    np.testing.assert_array_equal(downsampled_colors, [[128, 50, 0], [7, 7, 7]])
+    assert downsampled_positions.dtype == np.float32
+    assert downsampled_colors.dtype == np.uint8
+
+
+def test_radius_inliers():
+    grid = np.stack(np.meshgrid(np.arange(5.0), np.arange(5.0), [0.0]), axis=-1).reshape(-1, 3)
+    positions = np.concatenate([grid, [[100.0, 100.0, 100.0]]])
+
+    inliers = radius_inliers(positions, 1.5, 3)
+
+    assert not inliers[-1]
+    assert inliers[12]
+
+
+def test_statistical_inliers():
+    grid = np.stack(np.meshgrid(np.arange(10.0), np.arange(10.0), [0.0]), axis=-1).reshape(-1, 3)
+    positions = np.concatenate([grid, [[4.5, 4.5, 50.0]]])
+
+    inliers = statistical_inliers(positions, 4, 2.0)
+
+    assert inliers[:-1].all()
+    assert not inliers[-1]
+
+
+def test_encode_ply():
+    positions = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]], dtype=np.float32)
+    colors = np.array([[255, 0, 0], [0, 255, 0]], dtype=np.uint8)
+
+    content = encode_ply(positions, colors)
+
+    header, body = content.split(b"end_header\n")
+    assert b"element vertex 2" in header
+    assert b"property uchar red" in header
+    vertices = np.frombuffer(body, dtype=[("xyz", "<f4", 3), ("rgb", "u1", 3)])
+    np.testing.assert_array_equal(vertices["xyz"], positions)
+    np.testing.assert_array_equal(vertices["rgb"], colors)
+
+
+def test_block_mean_ignores_nan():
+    data = np.array(
+        [
+            [[1.0], [3.0], [np.nan], [np.nan]],
+            [[np.nan], [5.0], [np.nan], [np.nan]],
+        ]
+    )
+
+    result = block_mean(data, 2)
+
+    assert result.shape == (1, 2, 1)
+    assert result[0, 0, 0] == 3.0
+    assert np.isnan(result[0, 1, 0])
+
+
+def test_block_mean_drops_incomplete_blocks():
+    assert block_mean(np.ones((5, 7, 3)), 2).shape == (2, 3, 3)
+
+
+def test_downsampled():
+    xyz = np.arange(4 * 4 * 3, dtype=np.float32).reshape(4, 4, 3)
+    xyz[0, 0] = np.nan
+    rgba = np.full((4, 4, 4), 100, dtype=np.uint8)
+    rgba[0, 0] = 200
+    normals = np.zeros((4, 4, 3), dtype=np.float32)
+    normals[..., 2] = 2.0
+    point_cloud = OrganizedPointCloud(xyz=xyz, rgba=rgba, normals=normals)
+
+    downsampled = point_cloud.downsampled(2)
+
+    np.testing.assert_array_almost_equal(downsampled.xyz[0, 0], np.nanmean(xyz[:2, :2].reshape(-1, 3), axis=0))
+    assert downsampled.rgba.dtype == np.uint8
+    assert downsampled.rgba[0, 0, 0] == 125
+    np.testing.assert_array_almost_equal(downsampled.normals[..., 2], np.ones((2, 2)))
+    assert point_cloud.downsampled(1) is point_cloud
+
+
+def test_changed_mask():
+    reference = np.array([[1000.0, 1000.0], [np.nan, 1000.0]], dtype=np.float32)
+    depth = np.array([[1000.5, 990.0], [800.0, np.nan]], dtype=np.float32)
+
+    np.testing.assert_array_equal(changed_mask(depth, reference, 2.0), [[False, True], [True, False]])
+
+
+def test_height_map():
+    positions = np.array(
+        [[0.5, 0.5, 1.0], [0.6, 0.4, 3.0], [1.5, 0.5, 2.0], [0.5, 1.5, 4.0], [5.0, 5.0, 9.0], [-0.5, 0.5, 9.0]]
+    )
+
+    np.testing.assert_array_equal(height_map(positions, (0.0, 0.0), (2, 2), 1.0, "max"), [[3.0, 2.0], [4.0, np.nan]])
+    np.testing.assert_array_equal(height_map(positions, (0.0, 0.0), (2, 2), 1.0, "min"), [[1.0, 2.0], [4.0, np.nan]])
+    np.testing.assert_array_equal(height_map(positions, (0.0, 0.0), (2, 2), 1.0, "mean"), [[2.0, 2.0], [4.0, np.nan]])
+
+
+def test_height_map_without_points():
+    assert np.isnan(height_map(np.empty((0, 3)), (0.0, 0.0), (2, 3), 1.0, "max")).all()
+
+
+def test_merge_by_snr():
+    first = OrganizedPointCloud(
+        xyz=np.array([[[0.0, 0.0, 1.0], [np.nan, np.nan, np.nan]]], dtype=np.float32),
+        rgba=np.full((1, 2, 4), 1, dtype=np.uint8),
+        normals=np.zeros((1, 2, 3), dtype=np.float32),
+    )
+    second = OrganizedPointCloud(
+        xyz=np.array([[[0.0, 0.0, 2.0], [0.0, 0.0, 3.0]]], dtype=np.float32),
+        rgba=np.full((1, 2, 4), 2, dtype=np.uint8),
+        normals=np.zeros((1, 2, 3), dtype=np.float32),
+    )
+
+    merged = merge_by_snr([first, second], [np.array([[5.0, 9.0]]), np.array([[4.0, 1.0]])])
+
+    np.testing.assert_array_equal(merged.xyz[..., 2], [[1.0, 3.0]])
+    np.testing.assert_array_equal(merged.rgba[..., 0], [[1, 2]])
+
+
+def test_quality_statistics():
+    depth = np.array([[100.0, 200.0], [np.nan, 300.0]])
+    rgba = np.array([[[255, 0, 0, 255], [10, 10, 10, 255]], [[0, 0, 0, 255], [20, 20, 20, 255]]], dtype=np.uint8)
+    snr = np.array([[1.0, 12.0], [50.0, 90.0]])
+
+    statistics = quality_statistics(depth, rgba, snr)
+
+    assert statistics.valid_ratio == 0.75
+    assert statistics.saturation_ratio == 0.25
+    np.testing.assert_array_equal(statistics.snr_counts, [1, 0, 0, 1, 0, 0, 1])
+    assert statistics.snr_mean == 103.0 / 3
+    assert statistics.snr_ratio(10.0) == 0.5
+    assert statistics.depth_percentiles[50.0] == 200.0
+
+
+def test_quality_statistics_without_valid_pixels():
+    statistics = quality_statistics(np.full((2, 2), np.nan), np.zeros((2, 2, 4), dtype=np.uint8), np.zeros((2, 2)))
+
+    assert statistics.valid_ratio == 0.0
+    assert statistics.snr_mean is None
+    assert not statistics.depth_percentiles
@@ -0,0 +1,38 @@
+import numpy as np
+
+from zivid_nova.models.point_cloud_filter import PointCloudFilter
+
+
+def test_disabled_filter_keeps_points():
+    positions = np.random.default_rng(0).random((100, 3), dtype=np.float32)
+    colors = np.zeros((100, 4), dtype=np.uint8)
+
+    filtered_positions, filtered_colors, normals = PointCloudFilter().apply(positions, colors)
+
+    np.testing.assert_array_equal(filtered_positions, positions)
+    assert len(filtered_colors) == 100
+    assert normals is None
+
+
+def test_filter_renormalizes_normals():
+    positions = np.array([[0.1, 0.1, 0.1], [0.2, 0.2, 0.2]], dtype=np.float32)
+    colors = np.zeros((2, 4), dtype=np.uint8)
+    normals = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+
+    filtered_positions, _, filtered_normals = PointCloudFilter(voxel_size=1.0).apply(positions, colors, normals)
+
+    assert len(filtered_positions) == 1
+    np.testing.assert_array_almost_equal(filtered_normals, [[np.sqrt(0.5), np.sqrt(0.5), 0.0]])
+
+
+def test_filter_removes_outliers():
+    grid = np.stack(np.meshgrid(np.arange(5.0), np.arange(5.0), [0.0]), axis=-1).reshape(-1, 3)
+    positions = np.concatenate([grid, [[100.0, 100.0, 100.0]]]).astype(np.float32)
+    colors = np.arange(len(positions) * 4, dtype=np.uint8).reshape(-1, 4)
+
+    filtered_positions, filtered_colors, _ = PointCloudFilter(outlier_radius=1.5, outlier_min_neighbors=3).apply(
+        positions, colors
+    )
+
+    assert len(filtered_positions) == 25
+    np.testing.assert_array_equal(filtered_colors, colors[:25])
@@ -0,0 +1,43 @@
+import numpy as np
+
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.point_cloud import quality_statistics
+from zivid_nova.quality import PresetSelector, score
+
+PRESETS = (CaptureSettingsPreset.DIFFUSE, CaptureSettingsPreset.SPECULAR)
+
+
+def test_score():
+    depth = np.array([[1.0, 1.0], [1.0, np.nan]])
+    rgba = np.array([[[255, 255, 255, 255], [0, 0, 0, 255]], [[0, 0, 0, 255], [0, 0, 0, 255]]], dtype=np.uint8)
+    snr = np.array([[20.0, 20.0], [5.0, 0.0]])
+
+    assert score(quality_statistics(depth, rgba, snr)) == 0.25
+
+
+def test_untried_presets_are_selected_first():
+    selector = PresetSelector(PRESETS, 0)
+
+    assert selector.select("serial") == CaptureSettingsPreset.DIFFUSE
+    selector.record("serial", CaptureSettingsPreset.DIFFUSE, 0.9)
+    assert selector.select("serial") == CaptureSettingsPreset.SPECULAR
+
+
+def test_best_preset_is_selected():
+    selector = PresetSelector(PRESETS, 0)
+    selector.record("serial", CaptureSettingsPreset.DIFFUSE, 0.2)
+    selector.record("serial", CaptureSettingsPreset.SPECULAR, 0.8)
+    selector.record("serial", CaptureSettingsPreset.AUTO, 1.0)
+
+    assert selector.select("serial") == CaptureSettingsPreset.SPECULAR
+    assert selector.scores("serial") == {CaptureSettingsPreset.DIFFUSE: 0.2, CaptureSettingsPreset.SPECULAR: 0.8}
+    assert selector.select("other") == CaptureSettingsPreset.DIFFUSE
+
+
+def test_stalest_preset_is_explored():
+    selector = PresetSelector(PRESETS, 2)
+    selector.record("serial", CaptureSettingsPreset.DIFFUSE, 0.2)
+    selector.record("serial", CaptureSettingsPreset.SPECULAR, 0.8)
+
+    assert selector.select("serial") == CaptureSettingsPreset.SPECULAR
+    assert selector.select("serial") == CaptureSettingsPreset.DIFFUSE
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from zivid_nova.captures import Capture, CaptureCache
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.recorder import Recorder
+from zivid_nova.request_context import request_id
+
+
+class _PointCloud:
+    def __init__(self, value: float, shape: tuple[int, int]):
+        self._value = value
+        self._shape = shape
+
+    def copy_data(self, data_format: str) -> np.ndarray:
+        if data_format == "rgba":
+            return np.full((*self._shape, 4), int(self._value), dtype=np.uint8)
+        return np.full((*self._shape, 3), self._value, dtype=np.float32)
+
+
+class _Frame:
+    """Minimal stand-in for zivid.Frame with constant point cloud data"""
+
+    def __init__(self, value: float, shape: tuple[int, int] = (4, 6)):
+        self._point_cloud = _PointCloud(value, shape)
+        self.settings = "settings"
+
+    def point_cloud(self) -> _PointCloud:
+        return self._point_cloud
+
+
+def _capture(value: float, serial_number: str = "serial", shape: tuple[int, int] = (4, 6)) -> Capture:
+    return Capture(
+        id=f"capture-{value}",
+        serial_number=serial_number,
+        frame=_Frame(value, shape),
+        preset=CaptureSettingsPreset.DIFFUSE,
+    )
+
+
+def test_ring_overwrites_oldest_frames(tmp_path: Path):
+    recorder = Recorder(tmp_path, slots=2, queue_size=8)
+    for value in range(3):
+        recorder.record(_capture(value))
+    recorder.flush()
+
+    recordings = recorder.recordings()
+    assert [recording.sequence for recording in recordings] == [1, 2]
+    assert recordings[0].preset == "diffuse"
+
+    recording, point_cloud = recorder.read("serial", 2)
+    assert recording.capture_id == "capture-2"
+    assert point_cloud.xyz.shape == (4, 6, 3)
+    assert np.all(point_cloud.xyz == 2)
+    assert np.all(point_cloud.rgba == 2)
+
+    with pytest.raises(KeyError):
+        recorder.read("serial", 0)
+    recorder.close()
+
+
+def test_recordings_survive_reopening(tmp_path: Path):
+    recorder = Recorder(tmp_path, slots=4, queue_size=8)
+    recorder.record(_capture(1))
+    recorder.record(_capture(2, serial_number="other"))
+    recorder.close()
+
+    recorder = Recorder(tmp_path, slots=4, queue_size=8)
+    recorder.record(_capture(3))
+    recorder.flush()
+
+    assert [recording.sequence for recording in recorder.recordings("serial")] == [0, 1]
+    assert np.all(recorder.read("serial", 0)[1].xyz == 1)
+    assert np.all(recorder.read("other", 0)[1].normals == 2)
+    recorder.close()
+
+
+def test_resolution_change_drops_recordings(tmp_path: Path):
+    recorder = Recorder(tmp_path, slots=4, queue_size=8)
+    recorder.record(_capture(1))
+    recorder.record(_capture(2, shape=(2, 3)))
+    recorder.flush()
+
+    assert [recording.sequence for recording in recorder.recordings()] == [1]
+    assert recorder.read("serial", 1)[1].xyz.shape == (2, 3, 3)
+    recorder.close()
+
+
+def test_recording_does_not_cache_point_clouds(tmp_path: Path):
+    recorder = Recorder(tmp_path, slots=4, queue_size=8)
+    uncached = _capture(1)
+    cached = _capture(2)
+    point_cloud = cached.point_cloud()
+    recorder.record(uncached)
+    recorder.record(cached)
+    recorder.flush()
+
+    assert not uncached.levels
+    assert cached.levels == {1: point_cloud}
+    assert np.all(recorder.read("serial", 0)[1].xyz == 1)
+    assert np.all(recorder.read("serial", 1)[1].xyz == 2)
+    recorder.close()
+
+
+def test_time_window(tmp_path: Path):
+    recorder = Recorder(tmp_path, slots=4, queue_size=8)
+    start = datetime.now(timezone.utc)
+    for value in range(3):
+        capture = _capture(value)
+        capture.timestamp = start + timedelta(seconds=value)
+        recorder.record(capture)
+    recorder.flush()
+
+    window = recorder.recordings(start=start + timedelta(seconds=1), end=(start + timedelta(seconds=2)))
+    assert [recording.sequence for recording in window] == [1, 2]
+    recorder.close()
+
+
+def test_captures_are_recorded_with_request_id(tmp_path: Path):
+    recorder = Recorder(tmp_path, slots=4, queue_size=8)
+    cache = CaptureCache(size=2)
+    cache.listeners.append(recorder.record)
+
+    token = request_id.set("request")
+    try:
+        cache.add("serial", _Frame(1), CaptureSettingsPreset.SPECULAR)
+    finally:
+        request_id.reset(token)
+    recorder.flush()
+
+    (recording,) = recorder.recordings()
+    assert recording.request_id == "request"
+    assert recording.preset == "specular"
+    recorder.close()
+
+
+def test_full_queue_drops_captures(tmp_path: Path):
+    recorder = Recorder(tmp_path, slots=4, queue_size=1)
+    recorder.close()
+
+    # the writer is stopped, so the queue stays full
+    recorder.record(_capture(1))
+    recorder.record(_capture(2))
+    assert recorder.recordings() == []
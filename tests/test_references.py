@@ -0,0 +1,40 @@
+import numpy as np
+
+from zivid_nova.captures import Capture
+from zivid_nova.point_cloud import OrganizedPointCloud
+from zivid_nova.references import get_reference, remove_reference, set_reference
+
+
+def _capture(depth: np.ndarray) -> Capture:
+    xyz = np.zeros((*depth.shape, 3), dtype=np.float32)
+    xyz[..., 2] = depth
+    point_cloud = OrganizedPointCloud(
+        xyz=xyz, rgba=np.zeros((*depth.shape, 4), dtype=np.uint8), normals=np.zeros_like(xyz)
+    )
+    return Capture(id="capture", serial_number="serial", frame=None, levels={1: point_cloud})
+
+
+def test_set_and_remove_reference():
+    depth = np.arange(16, dtype=np.float32).reshape(4, 4)
+    capture = _capture(depth)
+
+    reference = set_reference(capture)
+    depth[0, 0] = 100.0
+
+    assert get_reference("serial") is reference
+    assert reference.capture_id == "capture"
+    assert reference.depth[0, 0] == 0.0
+
+    remove_reference("serial")
+    assert get_reference("serial") is None
+
+
+def test_reference_depth_map_matches_downsampled_capture():
+    depth = np.arange(16, dtype=np.float32).reshape(4, 4)
+    depth[0, 1] = np.nan
+    capture = _capture(depth)
+
+    reference = set_reference(capture)
+
+    np.testing.assert_array_equal(reference.depth_map(2), capture.point_cloud(2).xyz[..., 2])
+    remove_reference("serial")
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from zivid_nova.spool import file_response, parse_range, spool_path
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=900-2000", 1000) == (900, 999)
+
+
+def test_parse_range_unsupported():
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+
+
+def test_parse_range_not_satisfiable():
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+
+
+def _request(**headers: str) -> Request:
+    return Request(
+        {"type": "http", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]}
+    )
+
+
+async def _send(response) -> tuple[int, dict[str, str], bytes]:
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await response({"type": "http", "method": "GET", "headers": []}, receive, send)
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    return messages[0]["status"], headers, b"".join(message.get("body", b"") for message in messages[1:])
+
+
+def _spool_file(content: bytes):
+    path = spool_path(".bin")
+    path.write_bytes(content)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_file_response_deletes_file():
+    path = _spool_file(b"0123456789")
+
+    response = file_response(_request(range="bytes=2-4"), path, "data.bin")
+    status_code, headers, body = await _send(response)
+
+    assert status_code == 200
+    assert headers["content-length"] == "10"
+    assert "accept-ranges" not in headers
+    assert body == b"0123456789"
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_file_response_keeps_file():
+    path = _spool_file(b"0123456789")
+
+    response = file_response(_request(), path, "data.bin", etag="id", delete=False)
+    path.unlink()
+    status_code, headers, body = await _send(response)
+
+    assert status_code == 200
+    assert headers["accept-ranges"] == "bytes"
+    assert headers["etag"] == '"id"'
+    assert body == b"0123456789"
+
+
+@pytest.mark.asyncio
+async def test_file_response_range():
+    path = _spool_file(b"0123456789")
+
+    response = file_response(_request(range="bytes=2-4"), path, "data.bin", etag="id", delete=False)
+    status_code, headers, body = await _send(response)
+
+    assert status_code == 206
+    assert headers["content-range"] == "bytes 2-4/10"
+    assert body == b"234"
+    assert path.exists()
+
+    stale = file_response(_request(range="bytes=2-4", if_range='"other"'), path, "data.bin", etag="id", delete=False)
+    status_code, _, body = await _send(stale)
+    assert status_code == 200
+    assert body == b"0123456789"
+
+
+def test_file_response_range_not_satisfiable():
+    path = _spool_file(b"0123456789")
+
+    response = file_response(_request(range="bytes=20-"), path, "data.bin", delete=False)
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */10"
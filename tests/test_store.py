@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from zivid_nova.models.pose import Pose
+from zivid_nova.store import CALIBRATION, INFIELD_CORRECTION, SessionStore
+
+
+class _Frame:
+    """Minimal stand-in for zivid.Frame which writes a marker file"""
+
+    def save(self, path: str):
+        Path(path).write_bytes(b"zdf")
+
+
+def test_sessions_and_entries(tmp_path: Path):
+    store = SessionStore(tmp_path)
+    pose = Pose(position=(1.0, 2.0, 3.0), orientation=(0.1, 0.2, 0.3))
+
+    store.create_session(CALIBRATION, "a", "serial")
+    store.create_session(INFIELD_CORRECTION, "b", "serial")
+    store.add_entry("a", _Frame(), pose)
+    store.add_entry("a", _Frame())
+    store.flush()
+
+    assert [session.id for session in store.sessions(CALIBRATION)] == ["a"]
+
+    entries = store.entries("a")
+    assert [entry.pose for entry in entries] == [pose, None]
+    assert all(entry.frame_path.exists() for entry in entries)
+    store.close()
+
+
+def test_sessions_survive_reopening(tmp_path: Path):
+    store = SessionStore(tmp_path)
+    store.create_session(CALIBRATION, "a", "serial")
+    for _ in range(3):
+        store.add_entry("a", _Frame())
+    store.close()
+
+    store = SessionStore(tmp_path)
+    assert len(store.entries("a")) == 3
+    store.close()
+
+
+def test_remove_entry(tmp_path: Path):
+    store = SessionStore(tmp_path)
+    store.create_session(CALIBRATION, "a", "serial")
+    for index in range(3):
+        store.add_entry("a", _Frame(), Pose(position=(index, 0.0, 0.0), orientation=(0.0, 0.0, 0.0)))
+    removed = store.entries("a")[1]
+
+    store.remove_entry("a", 1)
+
+    entries = store.entries("a")
+    assert [entry.pose.position[0] for entry in entries if entry.pose is not None] == [0.0, 2.0]
+    assert not removed.frame_path.exists()
+    store.close()
+
+
+def test_delete_session(tmp_path: Path):
+    store = SessionStore(tmp_path)
+    store.create_session(CALIBRATION, "a", "serial")
+    store.add_entry("a", _Frame())
+    frame_path = store.entries("a")[0].frame_path
+
+    store.delete_session("a")
+
+    assert store.sessions(CALIBRATION) == []
+    assert store.entries("a") == []
+    assert not frame_path.exists()
+    store.close()
+
+
+def test_extrinsics(tmp_path: Path):
+    store = SessionStore(tmp_path)
+    pose = Pose(position=(1.0, 2.0, 3.0), orientation=(0.1, 0.2, 0.3))
+
+    store.set_extrinsics("a", pose)
+    store.set_extrinsics("b", pose)
+    store.set_extrinsics("b", None)
+
+    assert store.extrinsics() == {"a": pose}
+    store.close()
@@ -0,0 +1,140 @@
+import asyncio
+from typing import Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI, Header, HTTPException, Response
+
+from zivid_nova import sharding
+from zivid_nova.sharding import parse_worker_cameras, worker_for
+from zivid_nova.supervisor import FrontRouter, Route, Target, merge_metrics, resolve
+
+
+def _serial_of(worker: int, workers: int = 2) -> str:
+    return next(f"serial-{index}" for index in range(100) if worker_for(f"serial-{index}", workers) == worker)
+
+
+def test_worker_for_is_stable():
+    assert worker_for("2024ABCD", 4) == worker_for("2024ABCD", 4)
+    assert {worker_for(f"serial-{index}", 3) for index in range(100)} == {0, 1, 2}
+
+
+def test_pinned_cameras(monkeypatch):
+    monkeypatch.setattr(sharding, "PINNED_CAMERAS", parse_worker_cameras("1=first, second; 3=fourth"))
+
+    assert [worker_for(serial_number, 2) for serial_number in ("first", "second")] == [1, 1]
+    assert worker_for("first", 1) == 0
+    with pytest.raises(ValueError):
+        worker_for("fourth", 2)
+    with pytest.raises(ValueError):
+        parse_worker_cameras("first,second")
+
+
+def test_resolve():
+    serial_number = _serial_of(1)
+
+    assert resolve("GET", f"/cameras/{serial_number}/frame", {}, 2) == Route(Target.WORKER, 1)
+    assert resolve("GET", "/cameras", {}, 2) == Route(Target.MERGE)
+    assert resolve("POST", "/calibrations", {"serial_number": serial_number}, 2) == Route(Target.WORKER, 1)
+    assert resolve("GET", "/calibrations/abc/diagnostics", {}, 2) == Route(Target.FIND, resource="abc")
+    assert resolve("GET", "/infield-correction", {"serial_number": serial_number}, 2) == Route(Target.WORKER, 1)
+    assert resolve("POST", "/infield-correction/correction/abc", {}, 2) == Route(Target.FIND, resource="abc")
+    assert resolve("POST", "/projectors/patterns", {}, 2) == Route(Target.BROADCAST)
+    assert resolve("POST", "/captures", {}, 2) == Route(Target.UPLOAD)
+    assert resolve("GET", "/metrics", {}, 2) == Route(Target.METRICS)
+    assert resolve("GET", "/version", {}, 2) == Route(Target.WORKER, 0)
+
+
+def _worker(index: int, serial_numbers: list[str], captures: dict[str, str]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/cameras")
+    def get_cameras():
+        return [{"serial_number": serial_number} for serial_number in serial_numbers]
+
+    @app.get("/cameras/{serial_number}")
+    def get_camera(serial_number: str):
+        if serial_number not in serial_numbers:
+            raise HTTPException(status_code=500, detail="Camera is owned by another worker")
+        return {"serial_number": serial_number, "worker": index}
+
+    @app.get("/version")
+    def get_version(x_forwarded_for: str = Header()):
+        return {"client": x_forwarded_for}
+
+    @app.get("/captures/{capture_id}")
+    def get_capture(capture_id: str):
+        if capture_id not in captures:
+            raise HTTPException(status_code=404, detail="Capture ID not found")
+        return Response(captures[capture_id], headers={"Worker": str(index)})
+
+    return app
+
+
+def _get(router: FrontRouter, path: str, headers: Optional[dict[str, str]] = None) -> tuple[int, dict[str, str], bytes]:
+    async def request():
+        transport = httpx.ASGITransport(app=router, client=("192.0.2.1", 123))
+        async with httpx.AsyncClient(transport=transport, base_url="http://router") as client:
+            response = await client.get(path, headers=headers)
+            return response.status_code, response.headers, response.content
+
+    return asyncio.run(request())
+
+
+def _router() -> FrontRouter:
+    workers = [
+        _worker(0, [_serial_of(0)], {}),
+        _worker(1, [_serial_of(1)], {"abc": "capture"}),
+    ]
+    client = httpx.AsyncClient(
+        mounts={f"http://worker{index}": httpx.ASGITransport(app=app) for index, app in enumerate(workers)}
+    )
+    return FrontRouter(["http://worker0", "http://worker1"], client)
+
+
+def test_camera_routes_go_to_owner():
+    status_code, _, content = _get(_router(), f"/cameras/{_serial_of(1)}")
+
+    assert status_code == 200
+    assert b'"worker":1' in content
+
+
+def test_camera_lists_are_merged():
+    status_code, _, content = _get(_router(), "/cameras")
+
+    assert status_code == 200
+    assert content.count(b"serial_number") == 2
+
+
+def test_resources_are_found_on_any_worker():
+    router = _router()
+
+    status_code, headers, content = _get(router, "/captures/abc")
+    assert status_code == 200
+    assert headers["worker"] == "1"
+    assert content == b"capture"
+
+    status_code, _, _ = _get(router, "/captures/unknown")
+    assert status_code == 404
+
+
+def test_merge_metrics():
+    first = '# HELP a A\n# TYPE a gauge\na{worker="0"} 1\n# HELP b B\n# TYPE b counter\nb{worker="0"} 2\n'
+    second = '# HELP a A\n# TYPE a gauge\na{worker="1"} 3\n'
+
+    assert merge_metrics([first, second]).splitlines() == [
+        "# HELP a A",
+        "# TYPE a gauge",
+        'a{worker="0"} 1',
+        'a{worker="1"} 3',
+        "# HELP b B",
+        "# TYPE b counter",
+        'b{worker="0"} 2',
+    ]
+
+
+def test_forwarded_client_is_the_peer():
+    status_code, _, content = _get(_router(), "/version", headers={"X-Forwarded-For": "203.0.113.7"})
+
+    assert status_code == 200
+    assert b'"client":"192.0.2.1"' in content
@@ -0,0 +1,54 @@
+from typing import IO
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from zivid_nova import uploads
+from zivid_nova.uploads import upload, upload_body
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+
+    @app.post("/upload", openapi_extra=upload_body("application/octet-stream"))
+    def receive(body: IO[bytes] = Depends(upload(16))) -> int:
+        return len(body.read())
+
+    return TestClient(app)
+
+
+def test_upload_within_limit():
+    response = _client().post("/upload", content=b"x" * 16)
+
+    assert response.status_code == 200
+    assert response.json() == 16
+
+
+def test_upload_exceeding_content_length():
+    response = _client().post("/upload", content=b"x" * 17)
+
+    assert response.status_code == 413
+
+
+def test_upload_exceeding_streamed_body():
+    def chunks():
+        for _ in range(4):
+            yield b"x" * 8
+
+    response = _client().post("/upload", content=chunks())
+
+    assert response.status_code == 413
+
+
+def test_large_upload_is_spooled(monkeypatch):
+    monkeypatch.setattr(uploads, "SPOOL_MEMORY_SIZE", 4)
+
+    response = _client().post("/upload", content=b"x" * 16)
+
+    assert response.json() == 16
+
+
+def test_upload_schema():
+    schema = _client().app.openapi()["paths"]["/upload"]["post"]["requestBody"]
+
+    assert schema["content"]["application/octet-stream"]["schema"]["format"] == "binary"
@@ -0,0 +1,35 @@
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+from zivid_nova.utilities import robust_outliers, transform_difference
+
+
+def test_transform_difference():
+    a = np.eye(4)
+    b = np.eye(4)
+    b[:3, :3] = R.from_rotvec([0.0, 0.0, np.radians(10)]).as_matrix()
+    b[:3, 3] = [3.0, 4.0, 0.0]
+
+    translation, rotation = transform_difference(a, b)
+
+    assert np.isclose(translation, 5.0)
+    assert np.isclose(rotation, 10.0)
+
+
+def test_transform_difference_identical():
+    matrix = np.eye(4)
+    matrix[:3, 3] = [1.0, 2.0, 3.0]
+
+    assert transform_difference(matrix, matrix) == (0.0, 0.0)
+
+
+def test_robust_outliers():
+    values = np.array([0.10, 0.12, 0.09, 0.11, 0.10, 2.5])
+
+    np.testing.assert_array_equal(robust_outliers(values), [False, False, False, False, False, True])
+
+
+def test_robust_outliers_constant_values():
+    assert not robust_outliers(np.ones(5)).any()
+    assert not robust_outliers([1.0, 1.0, 1.0, 1.0, 1.0 + 1e-9]).any()
+    np.testing.assert_array_equal(robust_outliers([1.0, 1.0, 1.0, 1.0, 2.0]), [False, False, False, False, True])
@@ -5,7 +5,8 @@ import rerun as rr
 import uvicorn
 from loguru import logger
 
-from zivid_nova.app import app
+from zivid_nova.sharding import WORKER_COUNT, WORKER_INDEX, WORKERS
+from zivid_nova.supervisor import supervise
 from zivid_nova.utilities import is_rerun_enabled, rerun_connection_str
 
 _BANNER = r"""
@@ -20,9 +21,23 @@ _BANNER = r"""
 
 def main(host: str = "0.0.0.0", port: int = 8080):
     log_level = os.getenv("LOG_LEVEL", "info")
+    host = os.getenv("HOST", host)
     port = int(os.getenv("PORT", port))
-    logger.info(_BANNER)
-    logger.info("Starting Service...")
+
+    if WORKER_COUNT > 1:
+        logger.info(f"Starting worker {WORKER_INDEX} of {WORKER_COUNT}...")
+    else:
+        logger.info(_BANNER)
+        logger.info("Starting Service...")
+
+    if WORKERS > 1:
+        # the router does not load the zivid SDK, every worker has its own zivid application
+        supervise(host, port, WORKERS, log_level)
+        return
+
+    # imported on demand, so the supervisor process does not initialize the zivid SDK
+    from zivid_nova.app import app  # pylint: disable=import-outside-toplevel
+
     if is_rerun_enabled():
         connection = rerun_connection_str()
         logger.info(f"Connecting rerun with: {connection}")
@@ -35,5 +50,7 @@ def main(host: str = "0.0.0.0", port: int = 8080):
 
 
 def generate_schema():
+    from zivid_nova.app import app  # pylint: disable=import-outside-toplevel
+
     with open("openapi.json", "w", encoding="utf-8") as f:
         f.write(json.dumps(app.openapi()))
@@ -0,0 +1,148 @@
+import math
+from contextlib import contextmanager
+from threading import Lock
+from typing import AsyncIterator, Iterator, Optional, Sequence
+
+from decouple import config
+from fastapi import Depends, Header, HTTPException, Request
+
+from zivid_nova import zivid_app
+
+# Maximum number of requests per camera which wait for or hold the zivid lock
+CAPTURE_BACKLOG = config("CAPTURE_BACKLOG", default=4, cast=int)
+
+# Maximum number of concurrent camera requests per client
+CLIENT_CONCURRENCY = config("CLIENT_CONCURRENCY", default=2, cast=int)
+
+# Weight of the latest request in the average time admitted requests hold the zivid lock
+_LOCK_TIME_SMOOTHING = 0.2
+
+
+class AdmissionController:
+    """
+    Rejects camera requests up front instead of queueing them behind the zivid lock without bound.
+
+    Requests are counted per camera and per client from admission until they are released. As the zivid lock
+    is shared by all cameras, the wait time of a new request is estimated from all admitted requests and the
+    average time an admitted request holds the lock. Other lock holders, e.g. background loops or uploads, are
+    not admitted and do not count, as they back off while camera requests wait for the lock.
+    """
+
+    def __init__(self, backlog: int, client_concurrency: int, initial_time: float = 1.0):
+        self._backlog = backlog
+        self._client_concurrency = client_concurrency
+        self._average_time = initial_time
+        self._lock = Lock()
+        self._cameras: dict[str, int] = {}
+        self._clients: dict[str, int] = {}
+
+    def admit(self, serial_numbers: Sequence[str], client: str, timeout: Optional[float] = None) -> None:
+        """
+        Admit a request using the given cameras or raise an HTTPException with a `Retry-After` header.
+        The request counts once per camera and once for the client.
+        Every admitted request must be released, see `release`.
+        """
+        serial_numbers = list(dict.fromkeys(serial_numbers))
+        with self._lock:
+            completion = (sum(self._cameras.values()) + len(serial_numbers)) * self._average_time
+            retry_after = {"Retry-After": str(math.ceil(completion))}
+
+            if self._clients.get(client, 0) >= self._client_concurrency:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Too many concurrent requests of client {client}",
+                    headers=retry_after,
+                )
+            for serial_number in serial_numbers:
+                if self._cameras.get(serial_number, 0) >= self._backlog:
+                    raise HTTPException(
+                        status_code=503,
+                        detail=f"Too many pending requests for camera {serial_number}",
+                        headers=retry_after,
+                    )
+            if timeout is not None and completion > timeout:
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Request would take about {completion:.1f} s, longer than its timeout of {timeout:.1f} s",
+                    headers=retry_after,
+                )
+
+            for serial_number in serial_numbers:
+                self._cameras[serial_number] = self._cameras.get(serial_number, 0) + 1
+            self._clients[client] = self._clients.get(client, 0) + 1
+
+    @property
+    def average_time(self) -> float:
+        """Average time in seconds an admitted request holds the zivid lock"""
+        return self._average_time
+
+    def release(self, serial_numbers: Sequence[str], client: str, lock_time: Optional[float] = None) -> None:
+        """
+        Release an admitted request. `lock_time` is the time in seconds the request held the zivid lock, None if
+        it did not take the lock, e.g. because it failed before.
+        """
+        with self._lock:
+            if lock_time is not None:
+                self._average_time += _LOCK_TIME_SMOOTHING * (lock_time - self._average_time)
+            for serial_number in dict.fromkeys(serial_numbers):
+                self._cameras[serial_number] -= 1
+                if not self._cameras[serial_number]:
+                    del self._cameras[serial_number]
+            self._clients[client] -= 1
+            if not self._clients[client]:
+                del self._clients[client]
+
+
+admission = AdmissionController(CAPTURE_BACKLOG, CLIENT_CONCURRENCY)
+
+
+class AdmissionClient:
+    """
+    Dependency identifying the client of a camera request and its timeout, see `admitted`.
+    Clients are identified by the `Client-Id` header or their address.
+
+    The `Client-Id` is not verified, the client limit is cooperative: it keeps well-behaved clients, e.g. several
+    robot cells behind one gateway, from starving each other, but a client can evade it by changing its ID. The
+    backlog per camera applies to all clients.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        client_id: Optional[str] = Header(
+            None,
+            description="Identifies the client for the concurrency limit. Not verified, the limit is cooperative.",
+        ),
+        request_timeout: Optional[float] = Header(
+            None,
+            gt=0,
+            description="Seconds until the response is needed, requests which likely take longer are rejected",
+        ),
+    ):
+        self.id = client_id or (request.client.host if request.client is not None else "unknown")
+        self.timeout = request_timeout
+
+
+@contextmanager
+def admitted(serial_numbers: Sequence[str], client: AdmissionClient) -> Iterator[None]:
+    """
+    Admit a request of a client using the given cameras until the context is left, see `AdmissionController`.
+    The time the request holds the zivid lock meanwhile is measured for the wait estimate.
+    """
+    admission.admit(serial_numbers, client.id, client.timeout)
+    lock_times: list[float] = []
+    token = zivid_app.lock_time_listener.set(lock_times.append)
+    try:
+        yield
+    finally:
+        zivid_app.lock_time_listener.reset(token)
+        admission.release(serial_numbers, client.id, sum(lock_times) if lock_times else None)
+
+
+async def camera_admission(serial_number: str, client: AdmissionClient = Depends()) -> AsyncIterator[None]:
+    """
+    Dependency limiting the requests of a camera route, see `AdmissionController`.
+    Runs on the event loop, so rejected requests do not occupy a worker thread.
+    """
+    with admitted([serial_number], client):
+        yield
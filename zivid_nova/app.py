@@ -1,15 +1,33 @@
+from contextlib import asynccontextmanager
+
 import zivid
 from decouple import config
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, HTMLResponse
 
-from zivid_nova import routes
+from zivid_nova import routes, spool
+from zivid_nova.compression import CompressionMiddleware
+from zivid_nova.recorder import recorder
+from zivid_nova.request_context import RequestIdMiddleware
+from zivid_nova.store import store
 
 BASE_PATH = config("BASE_PATH", default="", cast=str)
 
 version = "dev"
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    yield
+    spool.cleanup()
+    if store is not None:
+        # make sure all pending session data is written before shutting down
+        store.close()
+    if recorder is not None:
+        recorder.close()
+
+
 app = FastAPI(
     title="Zivid Nova Plugin",
     version=version,
@@ -23,6 +41,7 @@ app = FastAPI(
     dependencies=[],
     root_path=BASE_PATH,
     swagger_ui_parameters={"tryItOutEnabled": True},
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -31,12 +50,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Capture-Id", "Capture-Ids", "Board-Pose", "Server-Timing", "Retry-After", "Request-Id"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(routes.calibrations.router)
 app.include_router(routes.cameras.router)
+app.include_router(routes.captures.router)
 app.include_router(routes.infield_correction.router)
+app.include_router(routes.metrics.router)
 app.include_router(routes.projector.router)
+app.include_router(routes.recordings.router)
 
 
 @app.get("/", response_class=HTMLResponse)
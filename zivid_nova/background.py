@@ -0,0 +1,56 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Thread
+from typing import Any, Callable, Optional
+
+from decouple import config
+from loguru import logger
+
+WORKER_THREADS = config("WORKER_THREADS", default=os.cpu_count() or 4, cast=int)
+
+# Shared pool for CPU bound work that can run in parallel, e.g. independent calibration solves
+executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="zivid-nova-worker")
+
+
+class CoalescingTask:
+    """
+    Runs a function on a background thread whenever it is requested.
+
+    Requests that arrive while a run is pending or in progress are coalesced, so a burst of
+    requests results in at most one run after the burst (plus the run that was already in progress).
+    The thread only lives while there is work to do.
+    """
+
+    def __init__(self, name: str, function: Callable[[], Any], delay: float = 0.0):
+        self._name = name
+        self._function = function
+        self._delay = delay
+        self._condition = Condition()
+        self._requested = False
+        self._thread: Optional[Thread] = None
+
+    def request(self) -> None:
+        """Request a run of the function. Returns immediately."""
+        with self._condition:
+            self._requested = True
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            # Give the burst some time to settle before taking the request
+            if self._delay > 0:
+                time.sleep(self._delay)
+
+            with self._condition:
+                if not self._requested:
+                    self._thread = None
+                    return
+                self._requested = False
+
+            try:
+                self._function()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception(f"Background task {self._name} failed")
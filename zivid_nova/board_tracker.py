@@ -0,0 +1,109 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from threading import Lock, Thread
+from typing import Optional
+
+import zivid
+import zivid.calibration
+from loguru import logger
+
+from zivid_nova import zivid_app
+from zivid_nova.models.board_detection import BoardDetection
+from zivid_nova.zivid_app import zivid_lock
+
+# Time in seconds to wait before detecting again after the detection failed, e.g. camera not connected
+_RETRY_DELAY = 1.0
+
+# Time in seconds to wait before checking again whether requests are waiting for the zivid lock
+_YIELD_DELAY = 0.01
+
+
+@zivid_lock
+def detect_board(serial_number: str) -> BoardDetection:
+    """Detect the calibration board with a new capture and include the infield correction feedback"""
+
+    camera = zivid_app.get_connected_camera(serial_number)
+    result = zivid.calibration.detect_calibration_board(camera)
+    return BoardDetection.from_detection_result(result, datetime.now(timezone.utc))
+
+
+def _offer(queue: asyncio.Queue, detection: BoardDetection) -> None:
+    # Subscribers only care about the latest detection
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(detection)
+
+
+class BoardTracker:
+    """
+    Detects the calibration board of a camera back-to-back on a dedicated thread and publishes the results
+    to all subscribers. The thread runs only while there are subscribers.
+    The zivid lock is acquired for each detection. Before a detection the tracker waits until no other request is
+    waiting for the lock, so requests are served in between instead of losing the lock to the tracker again.
+    """
+
+    def __init__(self, serial_number: str):
+        self._serial_number = serial_number
+        self._subscribers: list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Subscribe to the detections. Must be called from the event loop receiving the detections."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+            if self._thread is None:
+                logger.info(f"Start tracking calibration board of {self._serial_number}")
+                self._thread = Thread(target=self._run, name=f"board-tracker-{self._serial_number}", daemon=True)
+                self._thread.start()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Unsubscribe from the detections. Tracking stops after the last subscriber left."""
+        with self._lock:
+            self._subscribers = [subscriber for subscriber in self._subscribers if subscriber[1] is not queue]
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    logger.info(f"Stop tracking calibration board of {self._serial_number}")
+                    self._thread = None
+                    return
+                subscribers = list(self._subscribers)
+
+            if zivid_app.lock_waiters():
+                # let waiting requests take the lock first
+                time.sleep(_YIELD_DELAY)
+                continue
+
+            try:
+                detection = detect_board(self._serial_number)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.warning(f"Calibration board detection failed: {e}")
+                detection = BoardDetection(
+                    valid=False, pose=None, feedback=str(e), timestamp=datetime.now(timezone.utc)
+                )
+                time.sleep(_RETRY_DELAY)
+
+            for loop, queue in subscribers:
+                try:
+                    loop.call_soon_threadsafe(_offer, queue, detection)
+                except RuntimeError:
+                    # event loop of the subscriber is closed
+                    self.unsubscribe(queue)
+
+
+_trackers: dict[str, BoardTracker] = {}
+_trackers_lock = Lock()
+
+
+def get_tracker(serial_number: str) -> BoardTracker:
+    """Get the board tracker of a camera"""
+
+    with _trackers_lock:
+        if serial_number not in _trackers:
+            _trackers[serial_number] = BoardTracker(serial_number)
+        return _trackers[serial_number]
@@ -0,0 +1,146 @@
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock, RLock
+from typing import Callable, Optional
+
+import numpy as np
+import zivid
+from decouple import config
+
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.point_cloud import OrganizedPointCloud, QualityStatistics, quality_statistics
+from zivid_nova.spool import spool_path
+
+# Number of frames kept in memory for reuse. Older frames are released.
+CAPTURE_CACHE_SIZE = config("CAPTURE_CACHE_SIZE", default=8, cast=int)
+
+
+@dataclass
+class Capture:  # pylint: disable=too-many-instance-attributes
+    """A full resolution frame kept in memory for reuse"""
+
+    id: str
+    serial_number: str
+    frame: zivid.Frame
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    preset: Optional[CaptureSettingsPreset] = None
+    """Preset the frame was captured with, None for uploaded frames and custom settings"""
+    lock: RLock = field(default_factory=RLock, repr=False)
+    """Serializes access to the frame, captures are used outside of the zivid lock"""
+    levels: dict[int, OrganizedPointCloud] = field(default_factory=dict, repr=False)
+    """Point cloud data per downsampling factor"""
+    zdf_path: Optional[Path] = field(default=None, repr=False)
+    """Spool file of the frame in zdf format, kept so downloads can be resumed"""
+    statistics: Optional[QualityStatistics] = field(default=None, repr=False)
+    """Quality statistics, computed on first use, see `quality`"""
+
+    def point_cloud(self, factor: int = 1, cache: bool = True) -> OrganizedPointCloud:
+        """
+        Point cloud data of the frame downsampled by the given factor, see `OrganizedPointCloud.downsampled`.
+        All levels are derived from the full resolution data. They are computed on first use and cached.
+        With `cache` False, missing levels are computed without caching them, e.g. for a one-off copy.
+        """
+        with self.lock:
+            if factor in self.levels:
+                return self.levels[factor]
+            if factor == 1:
+                point_cloud = self.frame.point_cloud()
+                level = OrganizedPointCloud(
+                    xyz=point_cloud.copy_data("xyz"),
+                    rgba=point_cloud.copy_data("rgba"),
+                    normals=point_cloud.copy_data("normals"),
+                )
+            else:
+                level = self.point_cloud(cache=cache).downsampled(factor)
+            if cache:
+                self.levels[factor] = level
+            return level
+
+    def snr(self) -> np.ndarray:
+        """Signal-to-noise ratio of the full resolution points, float32 with shape (height, width)"""
+        with self.lock:
+            return self.frame.point_cloud().copy_data("snr")
+
+    def quality(self) -> QualityStatistics:
+        """
+        Quality statistics of the full resolution point cloud. Computed on first use and cached.
+        Reuses the point cloud data if it was already copied, otherwise only depth, colors and SNR are copied.
+        """
+        with self.lock:
+            if self.statistics is None:
+                snr = self.snr()
+                if 1 in self.levels:
+                    depth, rgba = self.levels[1].xyz[..., 2], self.levels[1].rgba
+                else:
+                    point_cloud = self.frame.point_cloud()
+                    depth, rgba = point_cloud.copy_data("z"), point_cloud.copy_data("rgba")
+                self.statistics = quality_statistics(depth, rgba, snr)
+            return self.statistics
+
+    def zdf_file(self) -> Path:
+        """The frame saved in zdf format. The file is written on first use and removed when the capture is evicted."""
+        with self.lock:
+            if self.zdf_path is None:
+                path = spool_path(".zdf")
+                self.frame.save(str(path))
+                self.zdf_path = path
+            return self.zdf_path
+
+    def discard(self) -> None:
+        """Remove files of the capture. Open files stay readable until they are closed."""
+        with self.lock:
+            if self.zdf_path is not None:
+                self.zdf_path.unlink(missing_ok=True)
+                self.zdf_path = None
+
+
+class CaptureCache:
+    """
+    Keeps the most recent frames, so derived data like the calibration board pose can be computed
+    from an existing capture instead of capturing again.
+    Frames are released once they are evicted and no longer referenced.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._captures: OrderedDict[str, Capture] = OrderedDict()
+        self._lock = Lock()
+        self.listeners: list[Callable[[Capture], None]] = []
+        """Called with every added capture on the thread which added it, so they must return quickly"""
+
+    def add(self, serial_number: str, frame: zivid.Frame, preset: Optional[CaptureSettingsPreset] = None) -> Capture:
+        """Add a frame to the cache. Evicts the oldest capture if the cache is full."""
+        capture = Capture(id=str(uuid.uuid4()), serial_number=serial_number, frame=frame, preset=preset)
+        evicted = []
+        with self._lock:
+            self._captures[capture.id] = capture
+            while len(self._captures) > self._size:
+                evicted.append(self._captures.popitem(last=False)[1])
+        for old_capture in evicted:
+            old_capture.discard()
+        for listener in self.listeners:
+            listener(capture)
+        return capture
+
+    def get(self, capture_id: str) -> Capture:
+        """Get a capture by ID. Raises a KeyError if the capture is unknown or was evicted."""
+        with self._lock:
+            return self._captures[capture_id]
+
+    def remove(self, capture_id: str) -> None:
+        """Remove a capture from the cache"""
+        with self._lock:
+            capture = self._captures.pop(capture_id, None)
+        if capture is not None:
+            capture.discard()
+
+    def list(self) -> list[Capture]:
+        """All cached captures, oldest first"""
+        with self._lock:
+            return list(self._captures.values())
+
+
+captures = CaptureCache(CAPTURE_CACHE_SIZE)
@@ -0,0 +1,173 @@
+"""
+Compact point cloud encoding.
+
+Positions are quantized to unsigned 16 or 32 bit integers relative to the minimum of the bounding box, normals are
+packed into two signed bytes with an octahedral mapping and colors are stored as uint8 rgb. The payload can
+optionally be compressed with zstd or lz4 if the corresponding package is installed.
+
+Layout, all values little endian:
+
+- header: magic `ZNPC`, version (u1), position size in bytes (u1), has normals (u1), compression (u1),
+  point count (u4), origin x, y, z in mm (f8), scale in mm (f8)
+- payload: x, y, z planes (u2 or u4), red, green, blue planes (u1), optionally normal u, v planes (i1)
+
+Positions are decoded as `origin + quantized * scale`. Normals which are NaN are encoded as (-128, -128).
+This module only depends on numpy and the optional compression packages, so it can be copied to clients as
+reference decoder.
+"""
+
+import struct
+from enum import Enum, unique
+from typing import Optional
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+MAGIC = b"ZNPC"
+VERSION = 1
+
+# Media type of compact point cloud responses
+MEDIA_TYPE = "application/vnd.zivid-nova.compact-cloud"
+
+_HEADER = struct.Struct("<4sBBBBI4d")
+_INVALID_NORMAL = -128
+
+
+@unique
+class Compression(str, Enum):
+    """Compression of the compact point cloud payload"""
+
+    NONE = "none"
+    ZSTD = "zstd"
+    LZ4 = "lz4"
+
+    @property
+    def available(self) -> bool:
+        """Whether the package required for the compression is installed"""
+        if self is Compression.ZSTD:
+            return zstandard is not None
+        if self is Compression.LZ4:
+            return lz4 is not None
+        return True
+
+
+_COMPRESSION_IDS = {Compression.NONE: 0, Compression.ZSTD: 1, Compression.LZ4: 2}
+
+
+def octahedral_encode(normals: np.ndarray) -> np.ndarray:
+    """Pack unit vectors into two signed bytes each. NaN normals are mapped to (-128, -128)."""
+    invalid = np.isnan(normals).any(axis=1)
+    normals = np.where(invalid[:, None], [0.0, 0.0, 1.0], normals)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        normals = normals / np.abs(normals).sum(axis=1, keepdims=True)
+    x, y, z = normals[:, 0], normals[:, 1], normals[:, 2]
+
+    # fold the lower hemisphere over the diagonals
+    sign_x = np.where(x >= 0, 1.0, -1.0)
+    sign_y = np.where(y >= 0, 1.0, -1.0)
+    folded_x = np.where(z < 0, (1 - np.abs(y)) * sign_x, x)
+    folded_y = np.where(z < 0, (1 - np.abs(x)) * sign_y, y)
+
+    packed = np.round(np.clip(np.stack([folded_x, folded_y], axis=1), -1, 1) * 127).astype(np.int8)
+    packed[invalid] = _INVALID_NORMAL
+    return packed
+
+
+def octahedral_decode(packed: np.ndarray) -> np.ndarray:
+    """Unpack unit vectors from two signed bytes each, see `octahedral_encode`"""
+    invalid = (packed == _INVALID_NORMAL).all(axis=1)
+    x = packed[:, 0].astype(np.float32) / 127
+    y = packed[:, 1].astype(np.float32) / 127
+    z = 1 - np.abs(x) - np.abs(y)
+
+    # unfold the lower hemisphere
+    t = np.clip(-z, 0, None)
+    x = x - np.where(x >= 0, t, -t)
+    y = y - np.where(y >= 0, t, -t)
+
+    normals = np.stack([x, y, z], axis=1)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    normals[invalid] = np.nan
+    return normals
+
+
+def encode(
+    positions: np.ndarray,
+    colors: np.ndarray,
+    normals: Optional[np.ndarray] = None,
+    scale: float = 0.1,
+    compression: Compression = Compression.NONE,
+) -> bytes:
+    """
+    Encode a list of valid points. Positions are in mm, the scale is the quantization step in mm.
+    16 bit positions are used if the bounding box fits, otherwise 32 bit.
+    """
+    if not compression.available:
+        raise ValueError(f"Compression {compression.value} is not available")
+
+    positions = np.asarray(positions, dtype=np.float64)
+    origin = positions.min(axis=0) if len(positions) else np.zeros(3)
+    quantized = np.round((positions - origin) / scale)
+    extent = quantized.max(initial=0)
+    if extent > np.iinfo(np.uint32).max:
+        raise ValueError(f"Point cloud extent is too large for a scale of {scale} mm")
+    position_type: np.dtype = np.dtype("<u2") if extent <= np.iinfo(np.uint16).max else np.dtype("<u4")
+
+    planes = [quantized.T.astype(position_type), np.asarray(colors)[:, :3].T.astype(np.uint8)]
+    if normals is not None:
+        planes.append(octahedral_encode(np.asarray(normals, dtype=np.float32)).T)
+    payload = b"".join(np.ascontiguousarray(plane).tobytes() for plane in planes)
+
+    if compression is Compression.ZSTD:
+        payload = zstandard.ZstdCompressor(level=3).compress(payload)
+    elif compression is Compression.LZ4:
+        payload = lz4.frame.compress(payload)
+
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        position_type.itemsize,
+        normals is not None,
+        _COMPRESSION_IDS[compression],
+        len(positions),
+        *origin,
+        scale,
+    )
+    return header + payload
+
+
+def decode(data: bytes) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Decode a compact point cloud into float32 positions in mm, uint8 rgb colors and optional float32 normals"""
+    magic, version, position_size, has_normals, compression_id, count, *origin, scale = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a compact point cloud of a supported version")
+
+    payload = data[_HEADER.size :]
+    compression = {value: key for key, value in _COMPRESSION_IDS.items()}[compression_id]
+    if compression is Compression.ZSTD:
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif compression is Compression.LZ4:
+        payload = lz4.frame.decompress(payload)
+
+    position_type: np.dtype = np.dtype("<u2") if position_size == 2 else np.dtype("<u4")
+    offset = 3 * count * position_type.itemsize
+    quantized = np.frombuffer(payload, dtype=position_type, count=3 * count).reshape(3, count).T
+    positions = (np.asarray(origin) + quantized * scale).astype(np.float32)
+    colors = np.frombuffer(payload, dtype=np.uint8, count=3 * count, offset=offset).reshape(3, count).T.copy()
+    offset += 3 * count
+
+    normals = None
+    if has_normals:
+        packed = np.frombuffer(payload, dtype=np.int8, count=2 * count, offset=offset).reshape(2, count).T
+        normals = octahedral_decode(packed)
+
+    return positions, colors, normals
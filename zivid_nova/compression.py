@@ -0,0 +1,240 @@
+import zlib
+from typing import Iterator, Optional, Protocol
+
+import anyio.to_thread
+from decouple import config
+from starlette.concurrency import iterate_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from zivid_nova.spool import CHUNK_SIZE
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this number of bytes are sent uncompressed
+COMPRESSION_MINIMUM_SIZE = config("COMPRESSION_MINIMUM_SIZE", default=65536, cast=int)
+
+# Only binary downloads are compressed, e.g. zdf, ply and npz. JSON responses are small, and formats like png, zip or
+# compact point clouds are already compressed.
+COMPRESSIBLE_MEDIA_TYPES = {"application/octet-stream"}
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    def flush(self) -> bytes:
+        ...
+
+
+class _GzipCompressor:
+    def __init__(self):
+        # level 1 is several times faster than the default level, compression speed matters more than ratio here
+        self._compressor = zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def available_encodings() -> list[str]:
+    """Supported content encodings in the order they are preferred by the server"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def create_compressor(encoding: str) -> Compressor:
+    """Create a streaming compressor for a content encoding returned by `available_encodings`"""
+    if encoding == "zstd":
+        return _ZstdCompressor()
+    if encoding == "br":
+        return _BrotliCompressor()
+    return _GzipCompressor()
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Optional[list[str]] = None) -> Optional[str]:
+    """
+    Choose a content encoding for an `Accept-Encoding` header.
+    The encoding with the highest quality value is used, ties are resolved by the server preference.
+    Returns None if the response should not be encoded.
+    """
+    encodings = encodings if encodings is not None else available_encodings()
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *parameters = [part.strip() for part in item.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    candidates = [(qualities.get(encoding, wildcard), -index, encoding) for index, encoding in enumerate(encodings)]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Compress binary downloads with zstd, brotli or gzip depending on the `Accept-Encoding` header of the request,
+    see `COMPRESSIBLE_MEDIA_TYPES`.
+
+    Unlike the gzip middleware of Starlette this supports zstd and brotli if the corresponding packages are
+    installed, and compresses in a worker thread, so large downloads do not block the event loop. The response
+    is compressed chunk by chunk while it is streamed. Small responses, already encoded responses, partial
+    responses and other media types are passed through.
+
+    Ranges refer to the uncompressed content, so requests with a `Range` or `If-Range` header are not compressed
+    and compressed responses do not advertise ranges. Clients which want to resume an interrupted download, e.g.
+    the zdf of a cached capture, request it with `Range: bytes=0-` or without content encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None or "range" in request_headers or "if-range" in request_headers:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+def _read_file(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := file.read(CHUNK_SIZE):
+            yield chunk
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._compressor: Optional[Compressor] = None
+        self._passthrough = False
+
+    def _should_compress(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        content_length = headers.get("content-length")
+        return (
+            message["status"] == 200
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and media_type in COMPRESSIBLE_MEDIA_TYPES
+            and (content_length is None or int(content_length) >= self._minimum_size)
+        )
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            if self._should_compress(message):
+                # sending the start is deferred until the size of a single chunk response is known
+                self._start = message
+            else:
+                self._passthrough = True
+                await self._send(message)
+            return
+
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.pathsend":
+            # zero-copy file responses are read and compressed here, the size is known from the content length
+            iterator = iterate_in_threadpool(_read_file(message["path"]))
+            chunk = await anext(iterator, b"")
+            async for following in iterator:
+                await self._compress(chunk, more_body=True)
+                chunk = following
+            await self._compress(chunk, more_body=False)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is None and not more_body and len(body) < self._minimum_size:
+            assert self._start is not None
+            self._passthrough = True
+            await self._send(self._start)
+            await self._send(message)
+            return
+        await self._compress(body, more_body)
+
+    async def _compress(self, body: bytes, more_body: bool) -> None:
+        if self._compressor is None:
+            assert self._start is not None
+            headers = MutableHeaders(raw=self._start["headers"])
+            del headers["content-length"]
+            # entity tags and ranges refer to the uncompressed content
+            del headers["etag"]
+            del headers["accept-ranges"]
+            headers["content-encoding"] = self._encoding
+            headers.add_vary_header("Accept-Encoding")
+            await self._send(self._start)
+            self._compressor = create_compressor(self._encoding)
+
+        compressor = self._compressor
+
+        def compress() -> bytes:
+            data = compressor.compress(body)
+            return data + compressor.flush() if not more_body else data
+
+        await self._send(
+            {"type": "http.response.body", "body": await anyio.to_thread.run_sync(compress), "more_body": more_body}
+        )
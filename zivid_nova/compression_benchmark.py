@@ -0,0 +1,109 @@
+"""
+Benchmark of the response compression of binary downloads, see `zivid_nova.compression`.
+
+Run with `python -m zivid_nova.compression_benchmark`, configured with environment variables:
+
+- `BENCHMARK_FRAME`: a zdf file, e.g. a frame saved from an M70. It is compressed with every available encoding
+  the same way as by the middleware, which measures the bytes saved and the compression throughput of the server.
+- `BENCHMARK_URL`: a running service, e.g. started with `FILE_CAMERA=<M70 file camera>.zfc poetry run serve`.
+  A frame is captured once and its point cloud is downloaded as ply with every encoding, which measures the bytes
+  on the wire and the end-to-end time including the decompression by the client.
+
+The results are written as JSON to stdout.
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+from decouple import config
+
+from zivid_nova.compression import available_encodings, create_compressor
+from zivid_nova.spool import CHUNK_SIZE
+
+BENCHMARK_FRAME = config("BENCHMARK_FRAME", default="", cast=str)
+BENCHMARK_URL = config("BENCHMARK_URL", default="", cast=str)
+
+# Camera of the service to capture with, defaults to the first camera listed by the service
+BENCHMARK_SERIAL_NUMBER = config("BENCHMARK_SERIAL_NUMBER", default="", cast=str)
+
+# Number of runs per encoding, the median time is reported
+BENCHMARK_REPEAT = config("BENCHMARK_REPEAT", default=5, cast=int)
+
+
+def compress_file(data: bytes, encoding: str) -> tuple[int, float]:
+    """Compress data chunk by chunk like the middleware, returns the compressed size and the time in seconds"""
+    start = time.perf_counter()
+    compressor = create_compressor(encoding)
+    size = 0
+    for offset in range(0, len(data), CHUNK_SIZE):
+        size += len(compressor.compress(data[offset : offset + CHUNK_SIZE]))
+    size += len(compressor.flush())
+    return size, time.perf_counter() - start
+
+
+def benchmark_frame(path: Path, repeat: int) -> dict[str, Any]:
+    """Compressed size, ratio and throughput of a zdf file per encoding"""
+    data = path.read_bytes()
+    results: dict[str, Any] = {}
+    for encoding in available_encodings():
+        runs = [compress_file(data, encoding) for _ in range(repeat)]
+        size = runs[0][0]
+        duration = statistics.median(duration for _, duration in runs)
+        results[encoding] = {
+            "bytes": size,
+            "ratio": size / len(data),
+            "bytes_saved": len(data) - size,
+            "compression_ms": duration * 1000.0,
+            "throughput_mb_s": len(data) / duration / 1e6,
+        }
+    return {"file": str(path), "bytes": len(data), "encodings": results}
+
+
+async def benchmark_service(url: str, serial_number: Optional[str], repeat: int) -> dict[str, Any]:
+    """Bytes on the wire and end-to-end download time of the ply point cloud of a cached capture per encoding"""
+    async with httpx.AsyncClient(base_url=url, timeout=httpx.Timeout(None, connect=5.0)) as client:
+        if not serial_number:
+            response = await client.get("/cameras")
+            response.raise_for_status()
+            serial_number = response.json()[0]["serial_number"]
+        response = await client.post(f"/cameras/{serial_number}/captures", params={"wait": "processed"})
+        response.raise_for_status()
+        path = f"/cameras/{serial_number}/captures/{response.json()['id']}/pointcloud"
+
+        results: dict[str, Any] = {}
+        for encoding in ["identity", *available_encodings()]:
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                async with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+                    response.raise_for_status()
+                    content = await response.aread()
+                durations.append(time.perf_counter() - start)
+            results[encoding] = {
+                "content_encoding": response.headers.get("content-encoding", "identity"),
+                "bytes_transferred": response.num_bytes_downloaded,
+                "bytes": len(content),
+                "download_ms": statistics.median(durations) * 1000.0,
+            }
+    return {"url": url, "serial_number": serial_number, "encodings": results}
+
+
+def main():
+    report: dict[str, Any] = {}
+    if BENCHMARK_FRAME:
+        report["frame"] = benchmark_frame(Path(BENCHMARK_FRAME), BENCHMARK_REPEAT)
+    if BENCHMARK_URL:
+        report["service"] = asyncio.run(benchmark_service(BENCHMARK_URL, BENCHMARK_SERIAL_NUMBER, BENCHMARK_REPEAT))
+    if not report:
+        raise SystemExit("Set BENCHMARK_FRAME and/or BENCHMARK_URL, see the module documentation")
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from zivid_nova.models.pose import Pose
+from zivid_nova.store import store
+
+# Pose of each camera in the common cell frame, e.g. the robot base. Positions are in mm.
+_extrinsics: dict[str, Pose] = store.extrinsics() if store is not None else {}
+
+
+def get_extrinsics(serial_number: str) -> Optional[Pose]:
+    """Get the pose of a camera in the common cell frame"""
+    return _extrinsics.get(serial_number)
+
+
+def set_extrinsics(serial_number: str, pose: Optional[Pose]) -> None:
+    """Set the pose of a camera in the common cell frame. Removes it if the pose is None."""
+    if pose is None:
+        _extrinsics.pop(serial_number, None)
+    else:
+        _extrinsics[serial_number] = pose
+    if store is not None:
+        store.set_extrinsics(serial_number, pose)
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+import numpy as np
+from decouple import config
+
+# Base URL of the service under test, e.g. started with `FILE_CAMERA=<file>.zfc poetry run serve`
+LOADTEST_URL = config("LOADTEST_URL", default="http://127.0.0.1:8080", cast=str)
+
+# Camera to load, defaults to the first camera listed by the service
+LOADTEST_SERIAL_NUMBER = config("LOADTEST_SERIAL_NUMBER", default="", cast=str)
+
+# Duration of the load test in seconds
+LOADTEST_DURATION = config("LOADTEST_DURATION", default=60.0, cast=float)
+
+# Number of concurrent clients per scenario, see `SCENARIOS`
+LOADTEST_MIX = config("LOADTEST_MIX", default="capture:2,frame:1,calibration:1,infield:1", cast=str)
+
+# Interval in seconds at which the resident memory of the service is sampled from `/metrics`
+LOADTEST_SAMPLE_INTERVAL = config("LOADTEST_SAMPLE_INTERVAL", default=1.0, cast=float)
+
+# File the JSON report is written to, defaults to stdout
+LOADTEST_OUTPUT = config("LOADTEST_OUTPUT", default="", cast=str)
+
+PERCENTILES = (50, 95, 99)
+
+# Status codes of requests rejected by the admission control of the service, see `zivid_nova.admission`
+REJECTED_STATUS_CODES = (429, 503)
+
+# Back-off in seconds after a rejected request without a valid `Retry-After` header
+REJECTED_BACKOFF = 1.0
+
+CLIENT_ID_HEADER = "Client-Id"
+
+_RESIDENT_MEMORY = "zivid_nova_resident_memory_bytes"
+
+
+@dataclass
+class _Sample:
+    name: str
+    """Name of the request"""
+    start: float
+    """Start of the request, relative to the start of the load test in seconds"""
+    latency: float
+    """Latency of the request in seconds"""
+    status_code: Optional[int]
+    """Status code of the response, None if the request failed without response"""
+
+
+@dataclass
+class LoadTest:
+    """State of a load test run, shared by all clients"""
+
+    client: httpx.AsyncClient
+    serial_number: str
+    deadline: float
+    started: float = field(default_factory=time.perf_counter)
+    samples: list[_Sample] = field(default_factory=list)
+    memory: list[dict[str, float]] = field(default_factory=list)
+
+    @property
+    def running(self) -> bool:
+        return time.perf_counter() < self.deadline
+
+    @property
+    def remaining(self) -> float:
+        """Remaining duration of the load test in seconds"""
+        return max(self.deadline - time.perf_counter(), 0.0)
+
+    async def request(self, name: str, method: str, path: str, **kwargs: Any) -> Optional[httpx.Response]:
+        """Send a request and record its latency. Returns None if the request failed without response."""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.samples.append(_Sample(name, start - self.started, time.perf_counter() - start, None))
+            return None
+        self.samples.append(_Sample(name, start - self.started, time.perf_counter() - start, response.status_code))
+        return response
+
+
+@dataclass
+class SimulatedClient:
+    """
+    A client of the load test. Every client sends its own `Client-Id`, so the admission control of the service
+    limits the concurrency per simulated client and not of the load test as a whole.
+    """
+
+    test: LoadTest
+    id: str
+
+    @property
+    def serial_number(self) -> str:
+        return self.test.serial_number
+
+    async def request(self, name: str, method: str, path: str, **kwargs: Any) -> Optional[httpx.Response]:
+        """
+        Send a request as this client, see `LoadTest.request`. After a request rejected by the admission control
+        the client waits as long as the `Retry-After` header of the response asks for, like a well-behaved client.
+        """
+        response = await self.test.request(name, method, path, headers={CLIENT_ID_HEADER: self.id}, **kwargs)
+        if response is not None and response.status_code in REJECTED_STATUS_CODES:
+            await asyncio.sleep(min(retry_after(response), self.test.remaining))
+        return response
+
+
+def retry_after(response: httpx.Response) -> float:
+    """Back-off in seconds requested by the `Retry-After` header of a response, only delays in seconds are used"""
+    try:
+        return max(float(response.headers["Retry-After"]), 0.0)
+    except (KeyError, ValueError):
+        return REJECTED_BACKOFF
+
+
+def _pose() -> dict[str, list[float]]:
+    return {
+        "position": [random.uniform(-500.0, 500.0), random.uniform(-500.0, 500.0), random.uniform(300.0, 1000.0)],
+        "orientation": [random.uniform(-0.5, 0.5), random.uniform(-0.5, 0.5), random.uniform(-3.14, 3.14)],
+    }
+
+
+async def capture_scenario(client: SimulatedClient) -> None:
+    """Capture a frame, wait for processing and download its point cloud"""
+    serial_number = client.serial_number
+    response = await client.request(
+        "capture", "POST", f"/cameras/{serial_number}/captures", params={"wait": "processed"}
+    )
+    if response is None or not response.is_success:
+        return
+    capture_id = response.json()["id"]
+    await client.request("capture_pointcloud", "GET", f"/cameras/{serial_number}/captures/{capture_id}/pointcloud")
+    await client.request("capture_quality", "GET", f"/cameras/{serial_number}/captures/{capture_id}/quality")
+
+
+async def frame_scenario(client: SimulatedClient) -> None:
+    """Capture and download a downsampled point cloud in one request"""
+    await client.request(
+        "frame_pointcloud",
+        "GET",
+        f"/cameras/{client.serial_number}/frame/pointcloud",
+        params={"down_sample_factor": 2},
+    )
+
+
+async def calibration_scenario(client: SimulatedClient) -> None:
+    """Start a hand-eye calibration, add poses and delete it again"""
+    response = await client.request(
+        "calibration_start", "POST", "/calibrations", params={"serial_number": client.serial_number}
+    )
+    if response is None or not response.is_success:
+        return
+    calibration_id = response.json()["id"]
+    for _ in range(3):
+        await client.request("calibration_pose", "POST", f"/calibrations/{calibration_id}/poses", json=_pose())
+    await client.request("calibration_solve", "POST", f"/calibrations/{calibration_id}/solve")
+    await client.request("calibration_delete", "DELETE", f"/calibrations/{calibration_id}")
+
+
+async def infield_scenario(client: SimulatedClient) -> None:
+    """Verify the camera, start an infield correction run, add a dataset and delete the run again"""
+    params = {"serial_number": client.serial_number}
+    await client.request("infield_verification", "GET", "/infield-correction/verification", params=params)
+    response = await client.request("infield_start", "POST", "/infield-correction/correction", params=params)
+    if response is None or not response.is_success:
+        return
+    correction_id = response.json()
+    await client.request("infield_dataset", "POST", f"/infield-correction/correction/{correction_id}")
+    await client.request("infield_delete", "DELETE", f"/infield-correction/correction/{correction_id}")
+
+
+SCENARIOS: dict[str, Callable[[SimulatedClient], Awaitable[None]]] = {
+    "capture": capture_scenario,
+    "frame": frame_scenario,
+    "calibration": calibration_scenario,
+    "infield": infield_scenario,
+}
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """Parse the number of clients per scenario from `scenario:clients,...`"""
+    clients: dict[str, int] = {}
+    for entry in filter(None, (entry.strip() for entry in mix.split(","))):
+        name, _, count = entry.partition(":")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name}, expected one of {list(SCENARIOS)}")
+        clients[name] = int(count or 1)
+    return clients
+
+
+def parse_resident_memory(text: str) -> Optional[float]:
+    """Resident memory of the service in bytes from its Prometheus metrics, summed over all worker processes"""
+    values = [float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(_RESIDENT_MEMORY)]
+    return sum(values) if values else None
+
+
+async def _client(client: SimulatedClient, scenario: Callable[[SimulatedClient], Awaitable[None]]) -> None:
+    while client.test.running:
+        await scenario(client)
+
+
+async def _sample_memory(test: LoadTest, interval: float) -> None:
+    while test.running:
+        try:
+            response = await test.client.get("/metrics")
+            memory = parse_resident_memory(response.text) if response.is_success else None
+        except httpx.HTTPError:
+            memory = None
+        if memory is not None:
+            test.memory.append(
+                {"elapsed_s": round(time.perf_counter() - test.started, 3), "resident_memory_bytes": memory}
+            )
+        await asyncio.sleep(interval)
+
+
+def summarize(samples: list[_Sample], duration: float) -> dict[str, Any]:
+    """
+    Latency percentiles in ms, throughput, error rate and rejection rate of requests.
+    Requests rejected by the admission control are counted apart from errors and not included in the latency.
+    Other requests without 2xx response are errors.
+    """
+    status_codes: dict[str, int] = {}
+    for sample in samples:
+        key = str(sample.status_code) if sample.status_code is not None else "failed"
+        status_codes[key] = status_codes.get(key, 0) + 1
+    admitted = [sample for sample in samples if sample.status_code not in REJECTED_STATUS_CODES]
+    rejected = len(samples) - len(admitted)
+    errors = sum(1 for sample in admitted if sample.status_code is None or not 200 <= sample.status_code < 300)
+    latencies = np.array([sample.latency for sample in admitted]) * 1000.0
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "rejected": rejected,
+        "rejection_rate": rejected / len(samples) if samples else 0.0,
+        "throughput_rps": len(admitted) / duration if duration > 0 else 0.0,
+        "latency_ms": (
+            {
+                **{f"p{percentile}": float(np.percentile(latencies, percentile)) for percentile in PERCENTILES},
+                "mean": float(latencies.mean()),
+                "max": float(latencies.max()),
+            }
+            if len(admitted)
+            else None
+        ),
+        "status_codes": status_codes,
+    }
+
+
+async def _first_camera(session: httpx.AsyncClient) -> str:
+    response = await session.get("/cameras")
+    response.raise_for_status()
+    cameras = response.json()
+    if not cameras:
+        raise RuntimeError("The service has no cameras, set FILE_CAMERA to simulate one")
+    return cameras[0]["serial_number"]
+
+
+async def run(
+    url: str,
+    mix: dict[str, int],
+    duration: float,
+    *,
+    serial_number: Optional[str] = None,
+    sample_interval: float = 1.0,
+    client: Optional[httpx.AsyncClient] = None,
+) -> dict[str, Any]:
+    """Run a load test against a service and return the report"""
+    started_at = datetime.now(timezone.utc)
+    async with client or httpx.AsyncClient(base_url=url, timeout=httpx.Timeout(None, connect=5.0)) as session:
+        camera = serial_number or await _first_camera(session)
+        test = LoadTest(session, camera, time.perf_counter() + duration)
+        await asyncio.gather(
+            _sample_memory(test, sample_interval),
+            *[
+                _client(SimulatedClient(test, f"loadtest-{name}-{index}"), SCENARIOS[name])
+                for name, count in mix.items()
+                for index in range(count)
+            ],
+        )
+        elapsed = time.perf_counter() - test.started
+
+    names = sorted({sample.name for sample in test.samples})
+    return {
+        "url": url,
+        "started": started_at.isoformat(),
+        "duration_s": elapsed,
+        "serial_number": camera,
+        "clients": mix,
+        "total": summarize(test.samples, elapsed),
+        "requests": {name: summarize([s for s in test.samples if s.name == name], elapsed) for name in names},
+        "memory": test.memory,
+    }
+
+
+def main():
+    """
+    Drive a running service with concurrent clients and write a JSON report with latency percentiles, throughput,
+    error rates and the resident memory of the service over time. Configured with the `LOADTEST_*` variables.
+    """
+    report = asyncio.run(
+        run(
+            LOADTEST_URL,
+            parse_mix(LOADTEST_MIX),
+            LOADTEST_DURATION,
+            serial_number=LOADTEST_SERIAL_NUMBER or None,
+            sample_interval=LOADTEST_SAMPLE_INTERVAL,
+        )
+    )
+    text = json.dumps(report, indent=2)
+    if LOADTEST_OUTPUT:
+        with open(LOADTEST_OUTPUT, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text + "\n")
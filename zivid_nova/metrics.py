@@ -0,0 +1,129 @@
+import os
+import resource
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Callable, Optional
+
+import numpy as np
+
+from zivid_nova import zivid_app
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.point_cloud import DEPTH_PERCENTILES, SNR_BIN_EDGES, QualityStatistics
+from zivid_nova.sharding import WORKER_COUNT, WORKER_INDEX
+
+PREFIX = "zivid_nova"
+
+# Upper bounds of the SNR histogram buckets. The bins include their lower edge, so the bounds are exclusive.
+_SNR_BUCKETS = [*(f"{edge:g}" for edge in SNR_BIN_EDGES[1:]), "+Inf"]
+
+
+def resident_memory() -> int:
+    """Resident set size of the process in bytes. Falls back to the peak size where /proc is not available."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _labels(**labels: str) -> str:
+    if WORKER_COUNT > 1:
+        # series of the worker processes are merged by the front router
+        labels = {**labels, "worker": str(WORKER_INDEX)}
+    if not labels:
+        return ""
+    escaped = {
+        key: value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for key, value in labels.items()
+    }
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped.items()) + "}"
+
+
+@dataclass
+class _CaptureSeries:
+    """Accumulated quality of the captures of a camera with a preset"""
+
+    latest: QualityStatistics
+    count: int = 0
+    snr_counts: np.ndarray = field(default_factory=lambda: np.zeros(len(SNR_BIN_EDGES), dtype=np.int64))
+    snr_sum: float = 0.0
+
+
+class Metrics:
+    """
+    Collects service metrics and renders them in the Prometheus text format.
+    Capture quality is recorded per camera and preset, the SNR histogram accumulates the valid pixels of all captures.
+    """
+
+    def __init__(self, lock_time: Optional[Callable[[], float]] = None):
+        self._lock = Lock()
+        self._captures: dict[tuple[str, str], _CaptureSeries] = {}
+        self._lock_time = lock_time
+
+    def record_capture(
+        self, serial_number: str, preset: Optional[CaptureSettingsPreset], statistics: QualityStatistics
+    ) -> None:
+        """Record the quality of a capture. Captures without preset are uploaded frames."""
+        key = (serial_number, preset.value if preset is not None else "none")
+        with self._lock:
+            series = self._captures.setdefault(key, _CaptureSeries(latest=statistics))
+            series.count += 1
+            series.latest = statistics
+            series.snr_counts += statistics.snr_counts
+            series.snr_sum += statistics.snr_sum
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: list[str] = []
+
+        def family(name: str, kind: str, description: str) -> str:
+            lines.append(f"# HELP {PREFIX}_{name} {description}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            return f"{PREFIX}_{name}"
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        name = family("resident_memory_bytes", "gauge", "Resident memory size of the process in bytes")
+        lines.append(f"{name}{_labels()} {resident_memory()}")
+        name = family("cpu_seconds_total", "counter", "User and system CPU time of the process in seconds")
+        lines.append(f"{name}{_labels()} {usage.ru_utime + usage.ru_stime}")
+        if self._lock_time is not None:
+            name = family("lock_hold_seconds", "gauge", "Average time a request holds the zivid lock")
+            lines.append(f"{name}{_labels()} {self._lock_time()}")
+
+        with self._lock:
+            series = {
+                key: (value.count, value.latest, value.snr_counts.copy(), value.snr_sum)
+                for key, value in self._captures.items()
+            }
+
+        name = family("captures_total", "counter", "Number of captures")
+        for (serial_number, preset), (count, _, _, _) in series.items():
+            lines.append(f"{name}{_labels(serial_number=serial_number, preset=preset)} {count}")
+
+        name = family("capture_valid_ratio", "gauge", "Share of pixels with a valid point in the latest capture")
+        for (serial_number, preset), (_, latest, _, _) in series.items():
+            lines.append(f"{name}{_labels(serial_number=serial_number, preset=preset)} {latest.valid_ratio}")
+
+        name = family("capture_saturation_ratio", "gauge", "Share of saturated pixels in the latest capture")
+        for (serial_number, preset), (_, latest, _, _) in series.items():
+            lines.append(f"{name}{_labels(serial_number=serial_number, preset=preset)} {latest.saturation_ratio}")
+
+        name = family("capture_depth_mm", "gauge", "Depth percentiles of the valid pixels of the latest capture")
+        for (serial_number, preset), (_, latest, _, _) in series.items():
+            for percentile in DEPTH_PERCENTILES:
+                if percentile in latest.depth_percentiles:
+                    labels = _labels(serial_number=serial_number, preset=preset, quantile=f"{percentile / 100:g}")
+                    lines.append(f"{name}{labels} {latest.depth_percentiles[percentile]}")
+
+        name = family("capture_snr", "histogram", "Signal-to-noise ratio of the valid pixels of all captures")
+        for (serial_number, preset), (_, _, snr_counts, snr_sum) in series.items():
+            cumulative = np.cumsum(snr_counts)
+            for upper, count in zip(_SNR_BUCKETS, cumulative.tolist()):
+                labels = _labels(serial_number=serial_number, preset=preset, le=upper)
+                lines.append(f"{name}_bucket{labels} {count}")
+            lines.append(f"{name}_sum{_labels(serial_number=serial_number, preset=preset)} {snr_sum}")
+            lines.append(f"{name}_count{_labels(serial_number=serial_number, preset=preset)} {int(cumulative[-1])}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(zivid_app.average_lock_time)
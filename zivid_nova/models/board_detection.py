@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+
+import pydantic
+import zivid.calibration
+import zivid.experimental.calibration
+
+from zivid_nova.models.pose import Pose
+
+
+class BoardDetection(pydantic.BaseModel):
+    """Result of a calibration board detection"""
+
+    valid: bool
+    """Whether the calibration board was detected"""
+
+    pose: Optional[Pose]
+    """Pose of the calibration board in the camera frame"""
+
+    feedback: str
+    """Feedback on the board placement for infield correction, or the error if the detection failed"""
+
+    timestamp: datetime
+    """Time of the detection"""
+
+    @classmethod
+    def from_detection_result(cls, result: zivid.calibration.DetectionResult, timestamp: datetime) -> "BoardDetection":
+        """Create a BoardDetection from a detection result, including the infield correction feedback"""
+
+        if not result.valid():
+            return cls(valid=False, pose=None, feedback=result.status_description(), timestamp=timestamp)
+
+        infield_input = zivid.experimental.calibration.InfieldCorrectionInput(result)
+        return cls(
+            valid=True,
+            pose=Pose.from_zivid_pose(result.pose()),
+            feedback=infield_input.status_description(),
+            timestamp=timestamp,
+        )
@@ -1,12 +1,20 @@
-from typing import Any, Optional
+from threading import Lock
+from typing import Optional
 
 import zivid
 import zivid.calibration
+from decouple import config
 from loguru import logger
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
+from zivid_nova.background import CoalescingTask, executor
+from zivid_nova.models.calibration_diagnostics import CalibrationDiagnostics, PoseInfluence
 from zivid_nova.models.calibration_residual import CalibrationResidual
 from zivid_nova.models.pose import Pose
+from zivid_nova.utilities import robust_outliers, transform_difference
+
+# Time in seconds to wait for further pose changes before a deferred recalibration starts
+RECALIBRATION_DELAY = config("RECALIBRATION_DELAY", default=0.2, cast=float)
 
 
 class Calibration(BaseModel):
@@ -31,6 +39,16 @@ class Calibration(BaseModel):
     hand_eye_calibration: Optional[Pose]
     """Hand-Eye calibration pose"""
 
+    dataset_version: int = 0
+    """Version of the calibration dataset. Incremented whenever a pose is added or removed"""
+
+    calibrated_version: Optional[int] = None
+    """Dataset version the residuals and the hand-eye calibration were computed from"""
+
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+    _solver: Optional[CoalescingTask] = PrivateAttr(default=None)
+    _diagnostics: Optional[CalibrationDiagnostics] = PrivateAttr(default=None)
+
     def _assert_input_is_valid(self) -> None:
         if len(self.poses) != len(self.detection_results):
             raise ValueError(
@@ -40,37 +58,112 @@ class Calibration(BaseModel):
     def add_pose(self, pose: Pose, detection_result: zivid.calibration.DetectionResult) -> None:
         """Add a pose and its corresponding detection result to the calibration"""
         logger.info(f"Add new pose {pose} with detection result {detection_result}")
-        self.poses.append(pose)
-        self.detection_results.append(detection_result)
+        with self._lock:
+            self.poses.append(pose)
+            self.detection_results.append(detection_result)
+            self.dataset_version += 1
 
     def remove_pose(self, index: int) -> None:
         """Remove a pose and its corresponding detection result from the calibration"""
         if index < 0 or index >= len(self.poses):
             raise IndexError("Index out of range")
         logger.info(f"Remove pose at index {index}")
-        self.poses.pop(index)
-        self.detection_results.pop(index)
+        with self._lock:
+            self.poses.pop(index)
+            self.detection_results.pop(index)
+            self.dataset_version += 1
+
+    def hand_eye_input(self) -> tuple[int, list[zivid.calibration.HandEyeInput]]:
+        """Snapshot of the current dataset version and the corresponding hand-eye input"""
+        with self._lock:
+            self._assert_input_is_valid()
+            return self.dataset_version, [
+                zivid.calibration.HandEyeInput(calibration_pose.to_zivid_pose(), detection_result)
+                for calibration_pose, detection_result in zip(self.poses, self.detection_results)
+            ]
+
+    def schedule_recalibration(self) -> None:
+        """
+        Request a recalibration in the background and return immediately.
+        Pose changes arriving in quick succession are coalesced into a single recalibration.
+        """
+        with self._lock:
+            if self._solver is None:
+                self._solver = CoalescingTask(f"calibration-{self.id}", self.recalibrate, RECALIBRATION_DELAY)
+        self._solver.request()
 
     def recalibrate(self) -> None:
         """Recalculate the eye in hand calibration using the current input data"""
-        self._assert_input_is_valid()
+        version, hand_eye_input = self.hand_eye_input()
 
-        if len(self.poses) < 2:
+        if len(hand_eye_input) < 2:
             logger.info("Not enough calibration poses to compute hand-eye calibration.")
+            self._apply_result(version, None, None)
             return
 
-        hand_eye_input = []
-
-        for calibration_pose, detection_result in zip(self.poses, self.detection_results):
-            hand_eye_input.append(zivid.calibration.HandEyeInput(calibration_pose.to_zivid_pose(), detection_result))
-
         hand_eye_output = zivid.calibration.calibrate_eye_in_hand(hand_eye_input)
 
         logger.info("Residuals: \n")
-        self.residuals = [CalibrationResidual.from_zivid(residual) for residual in hand_eye_output.residuals()]
-        for residual in self.residuals:
+        residuals = [CalibrationResidual.from_zivid(residual) for residual in hand_eye_output.residuals()]
+        for residual in residuals:
             logger.info(f"Translation: {residual.translation:.6f}   Rotation: {residual.rotation:.6f}")
 
-        self.hand_eye_calibration = Pose.from_matrix(hand_eye_output.transform())
-        logger.info(f"Calibration computed on {len(hand_eye_input)} points.")
-        logger.info(f"Calibration pose: {self.hand_eye_calibration}")
+        hand_eye_calibration = Pose.from_matrix(hand_eye_output.transform())
+        logger.info(f"Calibration computed on {len(hand_eye_input)} points (dataset version {version}).")
+        logger.info(f"Calibration pose: {hand_eye_calibration}")
+        self._apply_result(version, residuals, hand_eye_calibration)
+
+    def _apply_result(
+        self, version: int, residuals: Optional[list[CalibrationResidual]], hand_eye_calibration: Optional[Pose]
+    ) -> None:
+        with self._lock:
+            # A concurrent solve may already have stored the result of a newer dataset
+            if self.calibrated_version is not None and self.calibrated_version > version:
+                logger.info(f"Discarding calibration result of outdated dataset version {version}.")
+                return
+            self.residuals = residuals
+            self.hand_eye_calibration = hand_eye_calibration
+            self.calibrated_version = version
+
+    def diagnostics(self) -> CalibrationDiagnostics:
+        """
+        Leave-one-out analysis of the current dataset.
+        Solves the calibration once without each pose in parallel and reports how much each pose shifts the result.
+        The result is cached per dataset version.
+        """
+        version, hand_eye_input = self.hand_eye_input()
+
+        with self._lock:
+            if self._diagnostics is not None and self._diagnostics.dataset_version == version:
+                return self._diagnostics
+
+        if len(hand_eye_input) < 3:
+            raise ValueError("At least 3 calibration poses are required for a leave-one-out analysis")
+
+        def solve(subset: list[zivid.calibration.HandEyeInput]):
+            return zivid.calibration.calibrate_eye_in_hand(subset).transform()
+
+        full = executor.submit(solve, hand_eye_input)
+        left_out = [
+            executor.submit(solve, hand_eye_input[:index] + hand_eye_input[index + 1 :])
+            for index in range(len(hand_eye_input))
+        ]
+
+        transform = full.result()
+        differences = [transform_difference(transform, future.result()) for future in left_out]
+        translations = [translation for translation, _ in differences]
+        rotations = [rotation for _, rotation in differences]
+        outliers = robust_outliers(translations) | robust_outliers(rotations)
+
+        diagnostics = CalibrationDiagnostics(
+            dataset_version=version,
+            poses=[
+                PoseInfluence(index=index, translation=translation, rotation=rotation, outlier=bool(outlier))
+                for index, (translation, rotation, outlier) in enumerate(zip(translations, rotations, outliers))
+            ],
+        )
+        logger.info(f"Leave-one-out analysis on {len(hand_eye_input)} poses flagged {int(outliers.sum())} outliers.")
+
+        with self._lock:
+            self._diagnostics = diagnostics
+        return diagnostics
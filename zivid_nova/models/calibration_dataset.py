@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+from zivid_nova.models.pose import Pose
+
+
+class CalibrationDatasetEntry(BaseModel):
+    """Entry of an uploaded calibration dataset"""
+
+    pose: Pose
+    """Robot pose the frame was captured at"""
+
+    frame: str
+    """Path of the ZDF frame within the dataset archive"""
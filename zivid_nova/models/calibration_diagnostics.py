@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+
+
+class PoseInfluence(BaseModel):
+    """Influence of a single calibration pose on the hand-eye calibration"""
+
+    index: int
+    """Index of the pose in the calibration"""
+
+    translation: float
+    """Translation change of the hand-eye calibration when the pose is left out, in mm"""
+
+    rotation: float
+    """Rotation change of the hand-eye calibration when the pose is left out, in degrees"""
+
+    outlier: bool
+    """Whether the influence of this pose is unusually large compared to the other poses"""
+
+
+class CalibrationDiagnostics(BaseModel):
+    """Leave-one-out analysis of a hand-eye calibration"""
+
+    dataset_version: int
+    """Dataset version the diagnostics were computed from"""
+
+    poses: list[PoseInfluence]
+    """Influence of each calibration pose"""
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+
+import pydantic
+
+from zivid_nova.captures import Capture
+from zivid_nova.models.capture_quality import CaptureQuality
+
+
+class CaptureInfo(pydantic.BaseModel):
+    """Information about a cached capture"""
+
+    id: str
+    """Capture ID"""
+
+    serial_number: str
+    """Serial number of the camera the frame was captured with"""
+
+    timestamp: datetime
+    """Time the capture was added"""
+
+    quality: Optional[CaptureQuality] = None
+    """Quality statistics, None until they are computed in the background"""
+
+    @classmethod
+    def from_capture(cls, capture: Capture) -> "CaptureInfo":
+        """Create a CaptureInfo instance from a cached capture"""
+
+        return cls(
+            id=capture.id,
+            serial_number=capture.serial_number,
+            timestamp=capture.timestamp,
+            quality=CaptureQuality.from_statistics(capture.statistics) if capture.statistics is not None else None,
+        )
@@ -0,0 +1,53 @@
+from typing import Optional
+
+import pydantic
+
+from zivid_nova.point_cloud import SNR_BIN_EDGES, QualityStatistics
+
+
+class SnrBin(pydantic.BaseModel):
+    """Number of valid pixels with an SNR in a range"""
+
+    minimum: float
+    """Lower bound of the SNR, inclusive"""
+
+    maximum: Optional[float]
+    """Upper bound of the SNR, exclusive. None for the last bin."""
+
+    count: int
+    """Number of valid pixels"""
+
+
+class CaptureQuality(pydantic.BaseModel):
+    """Quality statistics of the full resolution point cloud of a capture"""
+
+    valid_ratio: float
+    """Share of pixels with a valid point"""
+
+    saturation_ratio: float
+    """Share of pixels with at least one saturated color channel"""
+
+    snr_mean: Optional[float]
+    """Mean signal-to-noise ratio of the valid pixels"""
+
+    snr_histogram: list[SnrBin]
+    """Signal-to-noise ratio histogram of the valid pixels"""
+
+    depth_percentiles: dict[float, float]
+    """Depth in mm per percentile of the valid pixels, e.g. 50 for the median. Empty if there are no valid pixels."""
+
+    @classmethod
+    def from_statistics(cls, statistics: QualityStatistics) -> "CaptureQuality":
+        """Create a CaptureQuality instance from quality statistics"""
+
+        maxima = [*SNR_BIN_EDGES[1:], None]
+        return cls(
+            valid_ratio=statistics.valid_ratio,
+            saturation_ratio=statistics.saturation_ratio,
+            snr_mean=statistics.snr_mean,
+            snr_histogram=[
+                SnrBin(minimum=minimum, maximum=maximum, count=count)
+                for minimum, maximum, count in zip(SNR_BIN_EDGES, maxima, statistics.snr_counts.tolist())
+            ],
+            depth_percentiles=statistics.depth_percentiles,
+        )
@@ -0,0 +1,79 @@
+from enum import Enum, unique
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+from zivid_nova.models.board_detection import BoardDetection
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+
+
+@unique
+class CaptureStepType(str, Enum):
+    """Kind of a capture sequence step"""
+
+    CAPTURE_3D = "3d"
+    """3D capture with the preset of the step, returned in zdf format"""
+
+    CAPTURE_2D = "2d"
+    """2D color image, returned in png format"""
+
+    BOARD_DETECTION = "board-detection"
+    """Calibration board detection, returned in the manifest"""
+
+
+class CaptureStep(BaseModel):
+    """Step of a capture sequence"""
+
+    type: CaptureStepType
+    """Kind of the step"""
+
+    preset: CaptureSettingsPreset = CaptureSettingsPreset.AUTO
+    """Capture settings preset of 3D captures"""
+
+
+class CaptureSequence(BaseModel):
+    """Ordered capture steps which are executed back-to-back"""
+
+    steps: list[CaptureStep] = Field(min_length=1)
+    """Steps in execution order"""
+
+    merge: bool = False
+    """If set, the 3D captures are merged by picking the valid point with the highest SNR per pixel"""
+
+    @model_validator(mode="after")
+    def _check_merge(self) -> "CaptureSequence":
+        if self.merge and sum(step.type is CaptureStepType.CAPTURE_3D for step in self.steps) < 2:
+            raise ValueError("Merging requires at least two 3D captures")
+        return self
+
+
+class CaptureStepResult(BaseModel):
+    """Result of a capture sequence step"""
+
+    type: CaptureStepType
+    """Kind of the step"""
+
+    preset: Optional[CaptureSettingsPreset] = None
+    """Capture settings preset of 3D captures"""
+
+    capture_id: Optional[str] = None
+    """ID of the cached capture of 3D captures"""
+
+    file: Optional[str] = None
+    """Name of the file in the bundle of 3D and 2D captures"""
+
+    board_detection: Optional[BoardDetection] = None
+    """Result of board detections"""
+
+
+class CaptureSequenceResult(BaseModel):
+    """Manifest of a capture sequence bundle"""
+
+    serial_number: str
+    """Serial number of the camera"""
+
+    steps: list[CaptureStepResult]
+    """Results in the order of the steps"""
+
+    merged: Optional[str] = None
+    """Name of the merged point cloud file in ply format in the bundle"""
@@ -9,9 +9,13 @@ class CaptureSettingsPreset(str, Enum):
     DIFFUSE = "diffuse"
     SEMISPECULAR = "semispecular"
     SPECULAR = "specular"
+    ADAPTIVE = "adaptive"
+    """One of the file presets, chosen from the quality of previous captures of the camera"""
 
     def to_filename(self) -> str:
-        """Convert to filename"""
+        """Convert to filename. The adaptive preset has no file, it must be resolved first."""
+        if self is CaptureSettingsPreset.ADAPTIVE:
+            raise ValueError("The adaptive preset must be resolved to a file preset, see `quality.select_preset`")
         mapping = {
             CaptureSettingsPreset.AUTO: "",
             CaptureSettingsPreset.DIFFUSE: "Zivid2_Settings_Zivid_Two_M70_ManufacturingDiffuse.yml",
@@ -0,0 +1,12 @@
+from enum import Enum, unique
+
+
+@unique
+class CaptureWait(str, Enum):
+    """Point in time at which a capture request returns"""
+
+    ACQUIRED = "acquired"
+    """The camera finished the acquisition, the scene may change"""
+
+    PROCESSED = "processed"
+    """The point cloud is processed and ready to be fetched"""
@@ -0,0 +1,51 @@
+from enum import Enum, unique
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+
+@unique
+class HeightMapAggregation(str, Enum):
+    """Aggregation of the heights of all points within a height map cell"""
+
+    MAX = "max"
+    """Highest point, e.g. to avoid collisions"""
+
+    MEAN = "mean"
+    """Average height"""
+
+    MIN = "min"
+    """Lowest point"""
+
+
+class HeightMapGrid(BaseModel):
+    """
+    Grid of a height map in the common cell frame, see `/cameras/{serial_number}/extrinsics`,
+    or in the robot base frame for a camera with a hand-eye calibration
+    """
+
+    x_min: float
+    """Lower x bound in mm"""
+
+    x_max: float
+    """Upper x bound in mm"""
+
+    y_min: float
+    """Lower y bound in mm"""
+
+    y_max: float
+    """Upper y bound in mm"""
+
+    resolution: float = Field(default=1.0, gt=0)
+    """Cell size in mm"""
+
+    aggregation: HeightMapAggregation = HeightMapAggregation.MAX
+    """Aggregation of the heights of all points within a cell"""
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Number of rows (y) and columns (x) of the grid"""
+        return (
+            int(np.ceil((self.y_max - self.y_min) / self.resolution)),
+            int(np.ceil((self.x_max - self.x_min) / self.resolution)),
+        )
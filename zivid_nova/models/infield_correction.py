@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 import pydantic
 import zivid
@@ -28,19 +28,28 @@ class CameraVerification(pydantic.BaseModel):
 class AddCorrectionOffsetResp(pydantic.BaseModel):
     """AddCorrectionOffsetResp data structure with pydantic serialization"""
 
-    dimension_accuracy: float
+    dimension_accuracy: Optional[float]
     """estimated dimension accuracy obtained if the correction is applied"""
 
     dataset_size: int
     """size of the dataset of the correction run"""
 
-    z_min: float
+    dataset_version: int
+    """version of the dataset of the correction run, incremented with every added dataset"""
+
+    estimate_version: Optional[int]
+    """
+    dataset version the accuracy estimate was computed from.
+    The estimate is computed in the background, so it can lag behind the dataset version.
+    """
+
+    z_min: Optional[float]
     """
     Get the range of validity of the accuracy estimate (lower end).
     Minimum z-value of working volume in millimeters.
     """
 
-    z_max: float
+    z_max: Optional[float]
     """
     Get the range of validity of the accuracy estimate (upper end).
     Maximum z-value of working volume in millimeters.
@@ -0,0 +1,43 @@
+from enum import Enum, unique
+
+from pydantic import BaseModel, Field, field_validator
+
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.models.point_cloud_filter import PointCloudFilter
+
+
+@unique
+class MultiCaptureMode(str, Enum):
+    """Order in which the cameras of a multi-camera capture acquire"""
+
+    STAGGERED = "staggered"
+    """One acquisition after the other so the projectors do not interfere, processing runs in parallel"""
+
+    PARALLEL = "parallel"
+    """All cameras acquire at the same time"""
+
+
+class MultiCaptureRequest(BaseModel):
+    """Synchronized capture of multiple cameras"""
+
+    serial_numbers: list[str] = Field(min_length=1)
+    """Serial numbers of the cameras, each listed once. All cameras need extrinsics."""
+
+    preset: CaptureSettingsPreset = CaptureSettingsPreset.AUTO
+    """Capture settings preset used for all cameras"""
+
+    mode: MultiCaptureMode = MultiCaptureMode.STAGGERED
+    """Order in which the cameras acquire"""
+
+    filter: PointCloudFilter = PointCloudFilter()
+    """Reduction applied to the fused point cloud"""
+
+    @field_validator("serial_numbers")
+    @classmethod
+    def _check_unique(cls, serial_numbers: list[str]) -> list[str]:
+        duplicates = sorted(
+            {serial_number for serial_number in serial_numbers if serial_numbers.count(serial_number) > 1}
+        )
+        if duplicates:
+            raise ValueError(f"Cameras must be listed once, got duplicates {duplicates}")
+        return serial_numbers
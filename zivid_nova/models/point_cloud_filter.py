@@ -0,0 +1,54 @@
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from zivid_nova.point_cloud import radius_inliers, statistical_inliers, voxel_downsample
+
+
+class PointCloudFilter(BaseModel):
+    """Server-side reduction of point clouds. All filters are disabled by default."""
+
+    voxel_size: Optional[float] = Field(default=None, gt=0)
+    """If set, all points within a voxel of this size in mm are replaced by their mean"""
+
+    outlier_radius: Optional[float] = Field(default=None, gt=0)
+    """If set, points with less than `outlier_min_neighbors` neighbors within this radius in mm are removed"""
+
+    outlier_min_neighbors: int = Field(default=5, ge=1)
+    """Minimum number of neighbors for the radius outlier removal"""
+
+    statistical_neighbors: Optional[int] = Field(default=None, ge=1)
+    """
+    If set, points whose mean distance to this number of nearest neighbors is more than `statistical_std_ratio`
+    standard deviations above the average are removed
+    """
+
+    statistical_std_ratio: float = Field(default=2.0, gt=0)
+    """Threshold of the statistical outlier removal in standard deviations"""
+
+    def apply(
+        self, positions: np.ndarray, colors: np.ndarray, normals: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """
+        Apply the filters to a list of valid points.
+        Voxel downsampling runs first, so the outlier removal works on fewer points.
+        """
+        if self.voxel_size is not None:
+            if normals is None:
+                positions, colors = voxel_downsample(positions, self.voxel_size, colors)
+            else:
+                positions, colors, normals = voxel_downsample(positions, self.voxel_size, colors, normals)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+
+        inliers = np.ones(len(positions), dtype=bool)
+        if self.outlier_radius is not None:
+            inliers &= radius_inliers(positions, self.outlier_radius, self.outlier_min_neighbors)
+        if self.statistical_neighbors is not None:
+            inliers &= statistical_inliers(positions, self.statistical_neighbors, self.statistical_std_ratio)
+        if not inliers.all():
+            positions, colors = positions[inliers], colors[inliers]
+            normals = normals[inliers] if normals is not None else None
+
+        return positions, colors, normals
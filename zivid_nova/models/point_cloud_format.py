@@ -0,0 +1,12 @@
+from enum import Enum, unique
+
+
+@unique
+class PointCloudFormat(str, Enum):
+    """Encoding of point cloud downloads"""
+
+    PLY = "ply"
+    """Binary ply with float positions, normals and colors"""
+
+    COMPACT = "compact"
+    """Quantized positions, packed normals and uint8 colors, see `zivid_nova.compact_cloud`"""
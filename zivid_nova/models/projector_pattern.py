@@ -0,0 +1,14 @@
+import pydantic
+
+
+class ProjectorPattern(pydantic.BaseModel):
+    """A custom projector pattern"""
+
+    id: str
+    """Pattern ID, derived from the image content"""
+
+    width: int
+    """Width of the uploaded image in pixels"""
+
+    height: int
+    """Height of the uploaded image in pixels"""
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Optional
+
+import pydantic
+
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.recorder import Recording
+
+
+class RecordingInfo(pydantic.BaseModel):
+    """Metadata of a frame recorded by the recorder"""
+
+    serial_number: str
+    """Serial number of the camera"""
+
+    sequence: int
+    """Number of the frame, counting up per camera"""
+
+    timestamp: datetime
+    """Time the frame was captured"""
+
+    preset: Optional[CaptureSettingsPreset]
+    """Preset the frame was captured with, None for uploaded frames"""
+
+    settings_hash: str
+    """Hash of the capture settings, frames with equal hashes were captured with the same settings"""
+
+    request_id: Optional[str]
+    """ID of the request which captured the frame, see the `Request-Id` response header"""
+
+    capture_id: str
+    """ID of the capture, the capture may already be evicted from the cache"""
+
+    width: int
+    """Width of the frame in pixels"""
+
+    height: int
+    """Height of the frame in pixels"""
+
+    @classmethod
+    def from_recording(cls, recording: Recording) -> "RecordingInfo":
+        """Create a RecordingInfo instance from the metadata of a recorded frame"""
+
+        return cls(
+            serial_number=recording.serial_number,
+            sequence=recording.sequence,
+            timestamp=recording.timestamp,
+            preset=CaptureSettingsPreset(recording.preset) if recording.preset is not None else None,
+            settings_hash=recording.settings_hash,
+            request_id=recording.request_id,
+            capture_id=recording.capture_id,
+            width=recording.width,
+            height=recording.height,
+        )
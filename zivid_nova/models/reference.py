@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pydantic
+
+from zivid_nova.references import Reference
+
+
+class ReferenceInfo(pydantic.BaseModel):
+    """Information about the reference depth map of a camera"""
+
+    capture_id: str
+    """ID of the capture the reference was taken from"""
+
+    serial_number: str
+    """Serial number of the camera"""
+
+    timestamp: datetime
+    """Time the reference capture was taken"""
+
+    width: int
+    """Width of the depth map in pixels"""
+
+    height: int
+    """Height of the depth map in pixels"""
+
+    @classmethod
+    def from_reference(cls, reference: Reference) -> "ReferenceInfo":
+        """Create a ReferenceInfo instance from a reference"""
+
+        height, width = reference.depth.shape
+        return cls(
+            capture_id=reference.capture_id,
+            serial_number=reference.serial_number,
+            timestamp=reference.timestamp,
+            width=width,
+            height=height,
+        )
@@ -0,0 +1,144 @@
+import hashlib
+from io import BytesIO
+from threading import Lock
+from typing import Callable
+
+import numpy as np
+from decouple import config
+from PIL import Image
+
+# Test images for calibration board adjustment per projector resolution (height, width)
+TEST_IMAGES = {(720, 1280): "static/image2.png", (720, 1000): "static/image2+.png"}
+DEFAULT_TEST_IMAGE = "static/image2.png"
+
+# Maximum number of custom patterns kept in memory
+MAX_PATTERNS = config("MAX_PATTERNS", default=32, cast=int)
+
+# Maximum number of pixels of a custom pattern, larger images are rejected before they are decoded
+MAX_PATTERN_PIXELS = config("MAX_PATTERN_PIXELS", default=4096 * 4096, cast=int)
+
+# Maximum size of an uploaded pattern image file in bytes
+PATTERN_UPLOAD_LIMIT = config("PATTERN_UPLOAD_LIMIT", default=32 * 2**20, cast=int)
+
+
+def letterbox(rgba: np.ndarray, height: int, width: int) -> np.ndarray:
+    """
+    Scale an image to fit into the given resolution while keeping its aspect ratio and center it on black.
+    Returns BGRA as expected by the projector.
+    """
+    scale = min(height / rgba.shape[0], width / rgba.shape[1])
+    scaled_height = max(1, round(rgba.shape[0] * scale))
+    scaled_width = max(1, round(rgba.shape[1] * scale))
+    scaled = np.asarray(Image.fromarray(rgba).resize((scaled_width, scaled_height), Image.Resampling.LANCZOS))
+
+    bgra = np.zeros((height, width, 4), dtype=np.uint8)
+    bgra[..., 3] = 255
+    top, left = (height - scaled_height) // 2, (width - scaled_width) // 2
+    bgra[top : top + scaled_height, left : left + scaled_width] = scaled[..., [2, 1, 0, 3]]
+    return bgra
+
+
+def decode_image(data: bytes, max_pixels: int) -> np.ndarray:
+    """
+    Decode an image file, e.g. png or jpeg, to RGBA.
+    Raises a ValueError if the data is not an image or the image has more than `max_pixels` pixels.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            # the header is read on open, the pixel data only on conversion
+            if image.width * image.height > max_pixels:
+                raise ValueError(f"Image of {image.width}x{image.height} pixels is larger than {max_pixels} pixels")
+            return np.asarray(image.convert("RGBA"))
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Invalid image: {e}") from e
+
+
+class PatternCache:
+    """
+    Projector patterns decoded once and kept per projector resolution.
+    Custom patterns are keyed by the hash of their content, so uploading the same image twice is free.
+    At most `max_patterns` custom patterns of at most `max_pixels` pixels are kept.
+    """
+
+    def __init__(self, max_patterns: int, max_pixels: int):
+        self._max_patterns = max_patterns
+        self._max_pixels = max_pixels
+        self._lock = Lock()
+        self._images: dict[str, np.ndarray] = {}
+        self._fitted: dict[tuple[str, tuple[int, int]], np.ndarray] = {}
+
+    def add(self, data: bytes) -> str:
+        """
+        Add a custom pattern from an image file and return its ID.
+        Raises a ValueError if the image is invalid or too large, or if the maximum number of patterns is reached.
+        """
+        pattern_id = hashlib.sha256(data).hexdigest()[:16]
+        with self._lock:
+            if pattern_id in self._images:
+                return pattern_id
+            self._check_count()
+        rgba = decode_image(data, self._max_pixels)
+        with self._lock:
+            if pattern_id not in self._images:
+                self._check_count()
+                self._images[pattern_id] = rgba
+        return pattern_id
+
+    def _check_count(self) -> None:
+        if len(self._images) >= self._max_patterns:
+            raise ValueError(f"At most {self._max_patterns} patterns can be stored, delete patterns first")
+
+    def list(self) -> dict[str, tuple[int, int]]:
+        """IDs and original resolutions (height, width) of all custom patterns"""
+        resolutions: dict[str, tuple[int, int]] = {}
+        with self._lock:
+            for pattern_id, image in self._images.items():
+                height, width = image.shape[:2]
+                resolutions[pattern_id] = (height, width)
+        return resolutions
+
+    def remove(self, pattern_id: str) -> None:
+        """Remove a custom pattern"""
+        with self._lock:
+            self._images.pop(pattern_id, None)
+            for key in [key for key in self._fitted if key[0] == pattern_id]:
+                del self._fitted[key]
+
+    def get(self, pattern_id: str, resolution: tuple[int, int]) -> np.ndarray:
+        """BGRA data of a custom pattern for a projector resolution. Raises a KeyError if the pattern is unknown."""
+
+        def load() -> np.ndarray:
+            with self._lock:
+                return self._images[pattern_id]
+
+        # a pattern removed while it is scaled is not cached again
+        return self._fit(pattern_id, resolution, load, lambda: pattern_id in self._images)
+
+    def test_image(self, resolution: tuple[int, int]) -> np.ndarray:
+        """BGRA data of the test image for a projector resolution. Other resolutions get a letterboxed test image."""
+
+        def load() -> np.ndarray:
+            with Image.open(TEST_IMAGES.get(resolution, DEFAULT_TEST_IMAGE)) as image:
+                return np.asarray(image.convert("RGBA"))
+
+        return self._fit(f"test-image-{resolution}", resolution, load, lambda: True)
+
+    def _fit(
+        self, key: str, resolution: tuple[int, int], load: Callable[[], np.ndarray], keep: Callable[[], bool]
+    ) -> np.ndarray:
+        """
+        Letterboxed image for a resolution, computed once. Loading and scaling run outside of the lock, so other
+        patterns and resolutions are served meanwhile. Concurrent first requests may scale twice, the first result
+        is kept if `keep` holds.
+        """
+        with self._lock:
+            if (key, resolution) in self._fitted:
+                return self._fitted[(key, resolution)]
+        fitted = letterbox(load(), *resolution)
+        with self._lock:
+            if not keep():
+                return fitted
+            return self._fitted.setdefault((key, resolution), fitted)
+
+
+patterns = PatternCache(MAX_PATTERNS, MAX_PATTERN_PIXELS)
@@ -0,0 +1,277 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def block_mean(data: np.ndarray, factor: int) -> np.ndarray:
+    """
+    NaN-aware mean over blocks of factor x factor pixels of organized data with shape (height, width, channels).
+    Rows and columns which do not fill a complete block are dropped. Blocks without any valid value are NaN.
+    """
+    height, width = data.shape[0] // factor * factor, data.shape[1] // factor * factor
+    blocks = data[:height, :width].reshape(height // factor, factor, width // factor, factor, -1)
+    blocks = blocks.astype(np.float32, copy=False)
+    valid = ~np.isnan(blocks)
+    count = valid.sum(axis=(1, 3))
+    total = np.where(valid, blocks, 0).sum(axis=(1, 3))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / count
+
+
+@dataclass
+class OrganizedPointCloud:
+    """Point cloud data with one point per pixel. Invalid points have NaN positions."""
+
+    xyz: np.ndarray
+    """Positions in mm, float32 with shape (height, width, 3)"""
+
+    rgba: np.ndarray
+    """Colors, uint8 with shape (height, width, 4)"""
+
+    normals: np.ndarray
+    """Normals, float32 with shape (height, width, 3)"""
+
+    def downsampled(self, factor: int) -> "OrganizedPointCloud":
+        """
+        Downsample by averaging blocks of factor x factor pixels. Positions and normals are averaged over the valid
+        points of a block, colors over all pixels of a block.
+        """
+        if factor == 1:
+            return self
+
+        normals = block_mean(self.normals, factor)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+        return OrganizedPointCloud(
+            xyz=block_mean(self.xyz, factor),
+            rgba=np.round(block_mean(self.rgba, factor)).astype(np.uint8),
+            normals=normals,
+        )
+
+
+def merge_by_snr(point_clouds: list[OrganizedPointCloud], snrs: list[np.ndarray]) -> OrganizedPointCloud:
+    """
+    Merge organized point clouds of the same scene with the same resolution, e.g. captured with different settings.
+    Every pixel takes the valid point with the highest signal-to-noise ratio.
+    """
+    scores = np.stack(
+        [
+            np.where(np.isnan(point_cloud.xyz[..., 2]), -np.inf, np.nan_to_num(snr, nan=0.0))
+            for point_cloud, snr in zip(point_clouds, snrs)
+        ]
+    )
+    best = np.argmax(scores, axis=0)[np.newaxis, ..., np.newaxis]
+
+    def pick(arrays: list[np.ndarray]) -> np.ndarray:
+        return np.take_along_axis(np.stack(arrays), best, axis=0)[0]
+
+    return OrganizedPointCloud(
+        xyz=pick([point_cloud.xyz for point_cloud in point_clouds]),
+        rgba=pick([point_cloud.rgba for point_cloud in point_clouds]),
+        normals=pick([point_cloud.normals for point_cloud in point_clouds]),
+    )
+
+
+def changed_mask(depth: np.ndarray, reference: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Mask of the pixels of an organized depth map whose depth differs from the reference by more than the threshold.
+    Pixels without reference depth are changed if they have a depth now, pixels without depth are never changed.
+    """
+    with np.errstate(invalid="ignore"):
+        return (np.abs(depth - reference) > threshold) | (np.isnan(reference) & ~np.isnan(depth))
+
+
+# Lower edges of the SNR histogram bins, the last bin is open ended
+SNR_BIN_EDGES = (0.0, 2.0, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+# Percentiles of the depth of valid pixels
+DEPTH_PERCENTILES = (1.0, 5.0, 50.0, 95.0, 99.0)
+
+
+@dataclass
+class QualityStatistics:
+    """Quality of an organized point cloud, see `quality_statistics`"""
+
+    pixels: int
+    """Number of pixels"""
+    valid: int
+    """Number of pixels with a valid point"""
+    saturated: int
+    """Number of pixels with at least one saturated color channel"""
+    snr_counts: np.ndarray
+    """Number of valid pixels per SNR bin, see `SNR_BIN_EDGES`"""
+    snr_sum: float
+    """Sum of the SNR of all valid pixels"""
+    depth_percentiles: dict[float, float]
+    """Depth in mm per percentile, see `DEPTH_PERCENTILES`. Empty if there are no valid pixels."""
+
+    @property
+    def valid_ratio(self) -> float:
+        """Share of pixels with a valid point"""
+        return self.valid / self.pixels if self.pixels else 0.0
+
+    @property
+    def saturation_ratio(self) -> float:
+        """Share of pixels with a saturated color"""
+        return self.saturated / self.pixels if self.pixels else 0.0
+
+    @property
+    def snr_mean(self) -> Optional[float]:
+        """Mean SNR of the valid pixels"""
+        return self.snr_sum / self.valid if self.valid else None
+
+    def snr_ratio(self, minimum: float) -> float:
+        """Share of all pixels which are valid and have at least the given SNR, rounded down to a bin edge"""
+        if not self.pixels:
+            return 0.0
+        first = int(np.searchsorted(SNR_BIN_EDGES, minimum, side="right")) - 1
+        return float(self.snr_counts[max(first, 0) :].sum()) / self.pixels
+
+
+def quality_statistics(depth: np.ndarray, rgba: np.ndarray, snr: np.ndarray) -> QualityStatistics:
+    """
+    Quality statistics of an organized point cloud from its depth in mm, its colors and its SNR, each with
+    one value per pixel. Every array is traversed once, NaN depth marks invalid pixels.
+    """
+    valid = ~np.isnan(depth)
+    valid_snr = snr[valid]
+    valid_depth = depth[valid]
+
+    bins = np.clip(np.searchsorted(SNR_BIN_EDGES, valid_snr, side="right") - 1, 0, None)
+    snr_counts = np.bincount(bins, minlength=len(SNR_BIN_EDGES))
+    percentiles = (
+        dict(zip(DEPTH_PERCENTILES, np.percentile(valid_depth, DEPTH_PERCENTILES).tolist())) if len(valid_depth) else {}
+    )
+    return QualityStatistics(
+        pixels=depth.size,
+        valid=len(valid_depth),
+        saturated=int(np.count_nonzero(rgba[..., :3].max(axis=-1) == 255)),
+        snr_counts=snr_counts,
+        snr_sum=float(valid_snr.sum(dtype=np.float64)),
+        depth_percentiles=percentiles,
+    )
+
+
+def transform_points(points: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Apply a homogeneous 4x4 transform to an array of points with shape (..., 3)"""
+    return (points @ matrix[:3, :3].T + matrix[:3, 3]).astype(points.dtype, copy=False)
+
+
+def valid_points(positions: np.ndarray, *attributes: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+    Flatten organized point cloud data to lists of points and remove points with NaN positions.
+    Attributes like colors or normals are filtered accordingly.
+    """
+    positions = positions.reshape(-1, 3)
+    valid = ~np.isnan(positions).any(axis=1)
+    return (positions[valid], *(attribute.reshape(len(positions), -1)[valid] for attribute in attributes))
+
+
+def height_map(
+    positions: np.ndarray,
+    origin: tuple[float, float],
+    shape: tuple[int, int],
+    resolution: float,
+    aggregation: str = "max",
+) -> np.ndarray:
+    """
+    Rasterize points into a grid of z values. Cell (row, column) covers x from `origin[0] + column * resolution`
+    and y from `origin[1] + row * resolution`, points outside the grid are ignored.
+    The z values of all points in a cell are aggregated with `max`, `min` or `mean`. Empty cells are NaN.
+    """
+    rows, columns = shape
+    column = np.floor((positions[:, 0] - origin[0]) / resolution).astype(np.int64)
+    row = np.floor((positions[:, 1] - origin[1]) / resolution).astype(np.int64)
+    inside = (column >= 0) & (column < columns) & (row >= 0) & (row < rows)
+    cells = row[inside] * columns + column[inside]
+    z = positions[inside, 2].astype(np.float64)
+
+    grid = np.full(rows * columns, np.nan, dtype=np.float32)
+    if aggregation == "mean":
+        counts = np.bincount(cells, minlength=rows * columns)
+        sums = np.bincount(cells, weights=z, minlength=rows * columns)
+        occupied = counts > 0
+        grid[occupied] = sums[occupied] / counts[occupied]
+    elif len(cells):
+        # sort by cell and reduce each run of equal cells
+        order = np.argsort(cells, kind="stable")
+        cells, z = cells[order], z[order]
+        starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+        reduce: np.ufunc = np.maximum if aggregation == "max" else np.minimum
+        grid[cells[starts]] = reduce.reduceat(z, starts)
+    return grid.reshape(rows, columns)
+
+
+# Voxel coordinates are packed into 21 bits per axis
+_VOXEL_KEY_BITS = 21
+_VOXEL_KEY_OFFSET = 1 << (_VOXEL_KEY_BITS - 1)
+
+
+def voxel_keys(positions: np.ndarray, voxel_size: float) -> np.ndarray:
+    """
+    Hash the integer voxel coordinates of points into int64 keys.
+    Keys are unique as long as the voxel coordinates are within +-2^20 on every axis.
+    """
+    coordinates = np.floor(positions / voxel_size).astype(np.int64) + _VOXEL_KEY_OFFSET
+    coordinates &= (1 << _VOXEL_KEY_BITS) - 1
+    return coordinates[:, 0] << (2 * _VOXEL_KEY_BITS) | coordinates[:, 1] << _VOXEL_KEY_BITS | coordinates[:, 2]
+
+
+def voxel_downsample(positions: np.ndarray, voxel_size: float, *attributes: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+    Replace all points within a voxel of the given size by their mean. Attributes are averaged accordingly.
+    The number of points is bounded by the occupied volume instead of the resolution.
+    """
+    _, inverse, counts = np.unique(voxel_keys(positions, voxel_size), return_inverse=True, return_counts=True)
+
+    def mean(values: np.ndarray) -> np.ndarray:
+        sums = np.stack(
+            [np.bincount(inverse, weights=values[:, i], minlength=len(counts)) for i in range(values.shape[1])],
+            axis=1,
+        )
+        means = sums / counts[:, None]
+        if np.issubdtype(values.dtype, np.integer):
+            means = np.round(means)
+        return means.astype(values.dtype)
+
+    return (mean(positions), *(mean(attribute) for attribute in attributes))
+
+
+def radius_inliers(positions: np.ndarray, radius: float, min_neighbors: int) -> np.ndarray:
+    """Mask of points with at least `min_neighbors` other points within the radius"""
+    tree = cKDTree(positions)
+    counts = tree.query_ball_point(positions, r=radius, return_length=True, workers=-1)
+    return counts - 1 >= min_neighbors
+
+
+def statistical_inliers(positions: np.ndarray, neighbors: int, std_ratio: float) -> np.ndarray:
+    """
+    Mask of points whose mean distance to their nearest neighbors is at most `std_ratio` standard deviations
+    above the average over all points
+    """
+    if len(positions) <= neighbors:
+        return np.ones(len(positions), dtype=bool)
+    tree = cKDTree(positions)
+    distances, _ = tree.query(positions, k=neighbors + 1, workers=-1)
+    mean_distances = distances[:, 1:].mean(axis=1)
+    return mean_distances <= mean_distances.mean() + std_ratio * mean_distances.std()
+
+
+def encode_ply(positions: np.ndarray, colors: Optional[np.ndarray] = None) -> bytes:
+    """
+    Encode points as binary little endian ply with float32 positions and optional uint8 rgb colors.
+    """
+    fields = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    if colors is not None:
+        fields += [("red", "u1"), ("green", "u1"), ("blue", "u1")]
+
+    vertices = np.empty(len(positions), dtype=fields)
+    vertices["x"], vertices["y"], vertices["z"] = positions[:, 0], positions[:, 1], positions[:, 2]
+    if colors is not None:
+        vertices["red"], vertices["green"], vertices["blue"] = colors[:, 0], colors[:, 1], colors[:, 2]
+
+    properties = "".join(f"property {'float' if dtype == '<f4' else 'uchar'} {name}\n" for name, dtype in fields)
+    header = f"ply\nformat binary_little_endian 1.0\nelement vertex {len(positions)}\n{properties}end_header\n"
+    return header.encode("ascii") + vertices.tobytes()
@@ -0,0 +1,109 @@
+import time
+from threading import Lock
+from typing import Optional
+
+from decouple import config
+from loguru import logger
+
+from zivid_nova.background import executor
+from zivid_nova.captures import Capture, captures
+from zivid_nova.metrics import metrics
+from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.point_cloud import QualityStatistics
+
+# Compute quality statistics of every capture in the background, e.g. for `/metrics` and adaptive presets
+QUALITY_STATISTICS = config("QUALITY_STATISTICS", default=True, cast=bool)
+
+# Every n-th adaptive capture of a camera uses the preset which was measured least recently, so the choice follows
+# changes of the scene. 0 disables exploration.
+ADAPTIVE_EXPLORATION_INTERVAL = config("ADAPTIVE_EXPLORATION_INTERVAL", default=10, cast=int)
+
+# Pixels with at least this SNR count as well exposed
+GOOD_SNR = 10.0
+
+# Presets which the adaptive preset chooses from, their settings are loaded once and cached
+ADAPTIVE_PRESETS = (
+    CaptureSettingsPreset.DIFFUSE,
+    CaptureSettingsPreset.SEMISPECULAR,
+    CaptureSettingsPreset.SPECULAR,
+)
+
+
+def score(statistics: QualityStatistics) -> float:
+    """Score of a capture for preset selection, the share of well exposed pixels minus the share of saturated pixels"""
+    return statistics.snr_ratio(GOOD_SNR) - statistics.saturation_ratio
+
+
+class PresetSelector:
+    """
+    Chooses a preset for adaptive captures from the quality of previous captures with the file presets,
+    instead of running the capture assistant for every capture.
+
+    Presets which were not captured with a camera yet are tried first. Afterwards the preset with the best score
+    of its latest capture is used, except for every n-th capture which tries the least recently measured preset.
+    """
+
+    def __init__(self, presets: tuple[CaptureSettingsPreset, ...], exploration_interval: int):
+        self._presets = presets
+        self._exploration_interval = exploration_interval
+        self._lock = Lock()
+        # latest score and time of measurement per camera and preset
+        self._scores: dict[str, dict[CaptureSettingsPreset, tuple[float, float]]] = {}
+        self._selections: dict[str, int] = {}
+
+    def record(self, serial_number: str, preset: CaptureSettingsPreset, value: float) -> None:
+        """Record the score of a capture with a preset"""
+        if preset not in self._presets:
+            return
+        with self._lock:
+            self._scores.setdefault(serial_number, {})[preset] = (value, time.monotonic())
+
+    def select(self, serial_number: str) -> CaptureSettingsPreset:
+        """Choose the preset for the next adaptive capture of a camera"""
+        with self._lock:
+            scores = self._scores.get(serial_number, {})
+            untried = [preset for preset in self._presets if preset not in scores]
+            if untried:
+                return untried[0]
+
+            count = self._selections[serial_number] = self._selections.get(serial_number, 0) + 1
+            if self._exploration_interval and count % self._exploration_interval == 0:
+                return min(scores, key=lambda preset: scores[preset][1])
+            return max(scores, key=lambda preset: scores[preset][0])
+
+    def scores(self, serial_number: str) -> dict[CaptureSettingsPreset, float]:
+        """Latest score per preset of a camera"""
+        with self._lock:
+            return {preset: value for preset, (value, _) in self._scores.get(serial_number, {}).items()}
+
+
+preset_selector = PresetSelector(ADAPTIVE_PRESETS, ADAPTIVE_EXPLORATION_INTERVAL)
+
+
+def select_preset(serial_number: str, preset: CaptureSettingsPreset) -> CaptureSettingsPreset:
+    """Resolve the adaptive preset to a file preset of the camera, other presets are returned as they are"""
+    if preset is CaptureSettingsPreset.ADAPTIVE:
+        return preset_selector.select(serial_number)
+    return preset
+
+
+def record_quality(capture: Capture) -> Optional[QualityStatistics]:
+    """Compute the quality statistics of a capture and record them in the metrics and the preset selection"""
+    try:
+        statistics = capture.quality()
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception(f"Failed to compute the quality of capture {capture.id}")
+        return None
+
+    metrics.record_capture(capture.serial_number, capture.preset, statistics)
+    if capture.preset is not None:
+        preset_selector.record(capture.serial_number, capture.preset, score(statistics))
+    return statistics
+
+
+def _submit_quality(capture: Capture) -> None:
+    executor.submit(record_quality, capture)
+
+
+if QUALITY_STATISTICS:
+    captures.listeners.append(_submit_quality)
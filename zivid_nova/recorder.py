@@ -0,0 +1,301 @@
+import hashlib
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from queue import Full, Queue
+from threading import Lock, Thread
+from typing import Optional
+
+import numpy as np
+from decouple import config
+from loguru import logger
+
+from zivid_nova.captures import Capture, captures
+from zivid_nova.point_cloud import OrganizedPointCloud
+from zivid_nova.request_context import request_id
+from zivid_nova.sharding import owns
+
+# Directory for the recorded frames, e.g. on a mounted volume. Recording is disabled if empty.
+RECORDER_PATH = config("RECORDER_PATH", default="", cast=str)
+
+# Number of frames recorded per camera. The oldest frame is overwritten once all slots are used.
+# A full resolution frame of a Zivid 2+ M70 takes about 65 MB.
+RECORDER_SLOTS = config("RECORDER_SLOTS", default=8, cast=int)
+
+# Number of captures waiting to be recorded. Captures are dropped while the queue is full, so recording
+# never slows down capturing.
+RECORDER_QUEUE_SIZE = config("RECORDER_QUEUE_SIZE", default=2, cast=int)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    serial_number TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    sequence INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    preset TEXT,
+    settings_hash TEXT NOT NULL,
+    request_id TEXT,
+    capture_id TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    PRIMARY KEY (serial_number, slot)
+);
+CREATE INDEX IF NOT EXISTS recordings_timestamp ON recordings (timestamp);
+"""
+
+_COLUMNS = "serial_number, sequence, timestamp, preset, settings_hash, request_id, capture_id, height, width"
+
+
+@dataclass
+class Recording:  # pylint: disable=too-many-instance-attributes
+    """Metadata of a recorded frame"""
+
+    serial_number: str
+    sequence: int
+    """Number of the frame, counting up per camera"""
+    timestamp: datetime
+    preset: Optional[str]
+    settings_hash: str
+    """Hash of the capture settings, frames with equal hashes were captured with the same settings"""
+    request_id: Optional[str]
+    capture_id: str
+    height: int
+    width: int
+
+
+def _open_array(path: Path, shape: tuple[int, ...], dtype: np.dtype) -> Optional[np.memmap]:
+    """Open an existing array file if it has the expected shape and type"""
+    if not path.exists():
+        return None
+    try:
+        array = np.load(path, mmap_mode="r+")
+    except ValueError:
+        logger.warning(f"Replacing unreadable recording file {path}")
+        return None
+    return array if array.shape == shape and array.dtype == dtype else None
+
+
+class _Ring:
+    """Memory-mapped arrays holding the frames of one camera, one slot per frame"""
+
+    def __init__(self, directory: Path, slots: int, height: int, width: int, *, create: bool = True):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.shape = (height, width)
+        arrays = {
+            name: (directory / f"{name}.npy", (slots, height, width, channels), np.dtype(dtype))
+            for name, channels, dtype in [("xyz", 3, np.float32), ("rgba", 4, np.uint8), ("normals", 3, np.float32)]
+        }
+        existing = {name: _open_array(*arguments) for name, arguments in arrays.items()}
+        self.created = any(array is None for array in existing.values())
+        """Whether the files were created, e.g. because the resolution or number of slots changed"""
+        opened: dict[str, np.memmap]
+        if self.created:
+            if not create:
+                raise KeyError(f"No recordings of {height}x{width} frames in {directory}")
+            opened = {
+                name: np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+                for name, (path, shape, dtype) in arrays.items()
+            }
+        else:
+            opened = {name: array for name, array in existing.items() if array is not None}
+        self.xyz, self.rgba, self.normals = opened["xyz"], opened["rgba"], opened["normals"]
+
+    def write(self, slot: int, point_cloud: OrganizedPointCloud) -> None:
+        self.xyz[slot] = point_cloud.xyz
+        self.rgba[slot] = point_cloud.rgba
+        self.normals[slot] = point_cloud.normals
+
+    def read(self, slot: int) -> OrganizedPointCloud:
+        return OrganizedPointCloud(
+            xyz=np.array(self.xyz[slot]), rgba=np.array(self.rgba[slot]), normals=np.array(self.normals[slot])
+        )
+
+
+class Recorder:
+    """
+    Records the organized point cloud of every capture into a fixed size ring buffer per camera, e.g. to analyze
+    failed picks afterwards without downloading every frame.
+
+    The frames are written into memory-mapped arrays next to a SQLite index with their metadata. Writing happens
+    on a single background thread from the point cloud data cached by the capture, so recording only costs a queue
+    insertion on the capture path. The files are written through the page cache, so they survive a crash of the
+    process, but not necessarily of the system. Worker processes can share the directory, every worker records
+    the cameras it owns.
+    """
+
+    def __init__(self, path: Path, slots: int, queue_size: int = RECORDER_QUEUE_SIZE):
+        self._path = path
+        self._slots = slots
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._rings: dict[str, _Ring] = {}
+        self._sequences: dict[str, int] = {}
+        # serializes slot writes and reads, so a slot is never read while it is overwritten
+        self._lock = Lock()
+
+        with closing(self._connect()) as connection:
+            connection.executescript(_SCHEMA)
+            rows = connection.execute(
+                "SELECT serial_number, MAX(sequence), height, width FROM recordings GROUP BY serial_number"
+            ).fetchall()
+            for serial_number, sequence, height, width in rows:
+                if not owns(serial_number):
+                    # recorded by another worker process sharing the directory
+                    continue
+                self._sequences[serial_number] = sequence + 1
+                self._ring(connection, serial_number, height, width)
+
+        self._queue: Queue[Optional[tuple[Capture, Optional[str]]]] = Queue(maxsize=queue_size)
+        self._writer = Thread(target=self._write_loop, name="recorder", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path / "recordings.db")
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def record(self, capture: Capture) -> None:
+        """Queue a capture for recording. Drops the capture if the writer does not keep up."""
+        try:
+            self._queue.put_nowait((capture, request_id.get()))
+        except Full:
+            logger.warning(f"Recorder queue is full, capture {capture.id} is not recorded")
+
+    def _write_loop(self) -> None:
+        with closing(self._connect()) as connection:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is None:
+                        return
+                    self._write(connection, *item)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Failed to record capture")
+                    connection.rollback()
+                finally:
+                    # drop the reference to the capture, so its frame can be released
+                    item = None
+                    self._queue.task_done()
+
+    def _ring(self, connection: sqlite3.Connection, serial_number: str, height: int, width: int) -> _Ring:
+        ring = self._rings.get(serial_number)
+        if ring is None or ring.shape != (height, width):
+            ring = _Ring(self._path / serial_number, self._slots, height, width)
+            if ring.created:
+                # recorded frames of another resolution or number of slots are lost
+                connection.execute("DELETE FROM recordings WHERE serial_number = ?", (serial_number,))
+                connection.commit()
+            self._rings[serial_number] = ring
+        return ring
+
+    def _write(self, connection: sqlite3.Connection, capture: Capture, request: Optional[str]) -> None:
+        # a full resolution copy which is not cached yet is only kept until it is written
+        point_cloud = capture.point_cloud(cache=False)
+        with capture.lock:
+            settings_hash = hashlib.sha256(str(capture.frame.settings).encode()).hexdigest()[:16]
+
+        serial_number = capture.serial_number
+        height, width = point_cloud.xyz.shape[:2]
+        sequence = self._sequences.get(serial_number, 0)
+        slot = sequence % self._slots
+
+        with self._lock:
+            ring = self._ring(connection, serial_number, height, width)
+            # the slot is unlisted while it is overwritten, so a crash never leaves an entry with mixed data
+            connection.execute("DELETE FROM recordings WHERE serial_number = ? AND slot = ?", (serial_number, slot))
+            connection.commit()
+            ring.write(slot, point_cloud)
+            connection.execute(
+                f"INSERT INTO recordings (slot, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    slot,
+                    serial_number,
+                    sequence,
+                    capture.timestamp.astimezone(timezone.utc).isoformat(timespec="microseconds"),
+                    capture.preset.value if capture.preset is not None else None,
+                    settings_hash,
+                    request,
+                    capture.id,
+                    height,
+                    width,
+                ),
+            )
+            connection.commit()
+        self._sequences[serial_number] = sequence + 1
+
+    def flush(self) -> None:
+        """Wait until all queued captures are recorded"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Record all queued captures and stop the writer thread"""
+        self._queue.put(None)
+        self._writer.join()
+
+    def recordings(
+        self, serial_number: Optional[str] = None, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> list[Recording]:
+        """Get the metadata of the recorded frames, optionally of one camera and in a time window, oldest first"""
+        conditions, parameters = [], []
+        if serial_number is not None:
+            conditions.append("serial_number = ?")
+            parameters.append(serial_number)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            parameters.append(_utc(start).isoformat(timespec="microseconds"))
+        if end is not None:
+            conditions.append("timestamp <= ?")
+            parameters.append(_utc(end).isoformat(timespec="microseconds"))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                f"SELECT {_COLUMNS} FROM recordings {where} ORDER BY timestamp, serial_number, sequence", parameters
+            ).fetchall()
+        return [_recording(row) for row in rows]
+
+    def read(self, serial_number: str, sequence: int) -> tuple[Recording, OrganizedPointCloud]:
+        """Get a recorded frame. Raises a KeyError if the frame was not recorded or is overwritten."""
+        with self._lock, closing(self._connect()) as connection:
+            row = connection.execute(
+                f"SELECT {_COLUMNS} FROM recordings WHERE serial_number = ? AND sequence = ?",
+                (serial_number, sequence),
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Frame {sequence} of {serial_number} is not recorded")
+            recording = _recording(row)
+            ring = self._rings.get(serial_number)
+            if ring is None or ring.shape != (recording.height, recording.width):
+                # the frame was recorded by another worker process sharing the directory
+                ring = _Ring(self._path / serial_number, self._slots, recording.height, recording.width, create=False)
+                self._rings[serial_number] = ring
+            return recording, ring.read(sequence % self._slots)
+
+
+def _utc(timestamp: datetime) -> datetime:
+    """Timestamps without time zone are interpreted as UTC"""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def _recording(row: tuple) -> Recording:
+    serial_number, sequence, timestamp, preset, settings_hash, request, capture_id, height, width = row
+    return Recording(
+        serial_number=serial_number,
+        sequence=sequence,
+        timestamp=datetime.fromisoformat(timestamp),
+        preset=preset,
+        settings_hash=settings_hash,
+        request_id=request,
+        capture_id=capture_id,
+        height=height,
+        width=width,
+    )
+
+
+recorder: Optional[Recorder] = Recorder(Path(RECORDER_PATH), RECORDER_SLOTS) if RECORDER_PATH else None
+if recorder is not None:
+    captures.listeners.append(recorder.record)
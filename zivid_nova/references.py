@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+
+from zivid_nova.captures import Capture
+from zivid_nova.point_cloud import block_mean
+
+
+@dataclass
+class Reference:
+    """Depth map of the static scene of a camera, e.g. an empty bin"""
+
+    capture_id: str
+    """ID of the capture the reference was taken from"""
+    serial_number: str
+    timestamp: datetime
+    depth: np.ndarray
+    """Full resolution depth in mm, float32 with shape (height, width). Invalid pixels are NaN."""
+    levels: dict[int, np.ndarray] = field(default_factory=dict, repr=False)
+    lock: Lock = field(default_factory=Lock, repr=False)
+
+    def depth_map(self, factor: int = 1) -> np.ndarray:
+        """Depth downsampled like the point cloud of a capture, see `Capture.point_cloud`"""
+        if factor == 1:
+            return self.depth
+        with self.lock:
+            if factor not in self.levels:
+                self.levels[factor] = block_mean(self.depth[..., np.newaxis], factor)[..., 0]
+            return self.levels[factor]
+
+
+# Reference per camera, only kept in memory
+_references: dict[str, Reference] = {}
+
+
+def get_reference(serial_number: str) -> Optional[Reference]:
+    """Get the reference of a camera"""
+    return _references.get(serial_number)
+
+
+def set_reference(capture: Capture) -> Reference:
+    """Use the depth of a capture as reference of its camera"""
+    reference = Reference(
+        capture_id=capture.id,
+        serial_number=capture.serial_number,
+        timestamp=capture.timestamp,
+        depth=capture.point_cloud().xyz[..., 2].copy(),
+    )
+    _references[capture.serial_number] = reference
+    return reference
+
+
+def remove_reference(serial_number: str) -> None:
+    """Remove the reference of a camera"""
+    _references.pop(serial_number, None)
@@ -0,0 +1,42 @@
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_ID_HEADER = "Request-Id"
+MAX_LENGTH = 128
+
+# ID of the request which is currently handled, also available in the worker threads of sync routes
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class RequestIdMiddleware:
+    """
+    Assign an ID to every request, so data recorded while handling it can be related to client logs.
+    Clients can pass their own ID in the `X-Request-Id` or `Request-Id` header, otherwise a random one is used.
+    The ID is returned in the `Request-Id` response header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        value = (headers.get("x-request-id") or headers.get("request-id") or str(uuid.uuid4()))[:MAX_LENGTH]
+        token = request_id.set(value)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = value
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
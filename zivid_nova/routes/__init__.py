@@ -1 +1 @@
-from . import calibrations, cameras, infield_correction, projector
+from . import calibrations, cameras, captures, infield_correction, metrics, projector, recordings
@@ -1,24 +1,77 @@
+import shutil
+import tempfile
 import uuid
+import zipfile
+from pathlib import Path
+from threading import Lock
+from typing import IO, AsyncIterator, Optional
 
 import zivid
 import zivid.calibration
-from fastapi import APIRouter
+from decouple import config
+from fastapi import APIRouter, Depends, HTTPException
 from loguru import logger
+from pydantic import TypeAdapter, ValidationError
 
+from zivid_nova.admission import AdmissionClient, admitted
+from zivid_nova.background import executor
 from zivid_nova.models.calibration import Calibration
+from zivid_nova.models.calibration_dataset import CalibrationDatasetEntry
+from zivid_nova.models.calibration_diagnostics import CalibrationDiagnostics
 from zivid_nova.models.pose import Pose
-from zivid_nova.zivid_app import get_connected_camera, zivid_lock
+from zivid_nova.routes.captures import board_detection_frame
+from zivid_nova.sharding import owns
+from zivid_nova.store import CALIBRATION, StoredSession, store
+from zivid_nova.uploads import upload, upload_body
+from zivid_nova.zivid_app import detect_calibration_board_in_file, get_connected_camera, zivid_lock
 
 router = APIRouter(prefix="/calibrations", tags=["calibrations"])
 
+DATASET_MANIFEST = "poses.json"
+
+# Maximum size of an uploaded calibration dataset in bytes
+DATASET_UPLOAD_LIMIT = config("DATASET_UPLOAD_LIMIT", default=2**30, cast=int)
+
+# Maximum number of frames of an uploaded calibration dataset
+DATASET_MAX_FRAMES = config("DATASET_MAX_FRAMES", default=100, cast=int)
+
+# Maximum total size of the extracted frames of an uploaded calibration dataset in bytes
+DATASET_EXTRACT_LIMIT = config("DATASET_EXTRACT_LIMIT", default=4 * 2**30, cast=int)
+
+# Maximum size of the extracted manifest of an uploaded calibration dataset in bytes
+DATASET_MANIFEST_LIMIT = 2**20
+
 calibrations: dict[str, Calibration] = {}
 
+# Persisted calibrations which are restored on first access
+stored_calibrations: dict[str, StoredSession] = (
+    {session.id: session for session in store.sessions(CALIBRATION) if owns(session.serial_number)}
+    if store is not None
+    else {}
+)
+_restore_lock = Lock()
+
+
+async def calibration_admission(calibration_id: str, client: AdmissionClient = Depends()) -> AsyncIterator[None]:
+    """Dependency limiting the requests using the camera of a calibration, see `camera_admission`"""
+
+    if calibration_id in calibrations:
+        serial_number = calibrations[calibration_id].serial_number
+    elif calibration_id in stored_calibrations:
+        serial_number = stored_calibrations[calibration_id].serial_number
+    else:
+        raise HTTPException(status_code=404, detail="Calibration ID not found")
+    with admitted([serial_number], client):
+        yield
+
 
 @router.get("")
 @zivid_lock
 def get_calibrations() -> list[Calibration]:
     """Get all calibrations"""
 
+    for calibration_id in list(stored_calibrations):
+        lookup_calibration(calibration_id)
     return list(calibrations.values())
 
 
@@ -27,7 +80,11 @@ def get_calibrations() -> list[Calibration]:
 def delete_calibrations():
     """Delete all calibrations"""
 
+    if store is not None:
+        for calibration_id in [*calibrations, *stored_calibrations]:
+            store.delete_session(calibration_id)
     calibrations.clear()
+    stored_calibrations.clear()
 
 
 @router.post("")
@@ -45,32 +102,120 @@ def start_calibration(serial_number: str) -> Calibration:
         hand_eye_calibration=None,
     )
     calibrations[calibration.id] = calibration
+    if store is not None:
+        store.create_session(CALIBRATION, calibration.id, calibration.serial_number)
+    return calibration
+
+
+@router.post("/datasets", openapi_extra=upload_body("application/zip", "Zip archive of the dataset"))
+def calibrate_dataset(dataset: IO[bytes] = Depends(upload(DATASET_UPLOAD_LIMIT))) -> Calibration:
+    """
+    Compute a calibration from an uploaded dataset without using a camera.
+
+    The dataset is a zip archive containing `poses.json`, a list of `{"pose": ..., "frame": "<path>.zdf"}` entries,
+    and the referenced ZDF frames. The calibration board is detected in all frames in parallel.
+    Frames in which the board is not detected are skipped.
+    The upload is limited to `DATASET_UPLOAD_LIMIT` bytes, the archive to `DATASET_MAX_FRAMES` frames with an
+    extracted size of `DATASET_EXTRACT_LIMIT` bytes. The calibration is persisted like calibrations started
+    with a camera.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            with zipfile.ZipFile(dataset) as archive:
+                entries = _read_dataset_manifest(archive)
+                paths: list[Path] = []
+                for index, entry in enumerate(entries):
+                    path = Path(directory) / f"{index}.zdf"
+                    with archive.open(entry.frame) as source, open(path, "wb") as target:
+                        shutil.copyfileobj(source, target)
+                    paths.append(path)
+            # frames which can not be loaded raise a RuntimeError
+            results = list(executor.map(detect_calibration_board_in_file, map(str, paths)))
+        except (zipfile.BadZipFile, KeyError, ValidationError, RuntimeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid calibration dataset: {e}") from e
+
+        serial_numbers = {serial_number for serial_number, _ in results}
+        if len(serial_numbers) != 1:
+            raise HTTPException(
+                status_code=400, detail=f"Dataset must contain frames of exactly one camera, got {serial_numbers}"
+            )
+
+        calibration = Calibration(
+            id=str(uuid.uuid4()),
+            serial_number=serial_numbers.pop(),
+            poses=[],
+            detection_results=[],
+            residuals=None,
+            hand_eye_calibration=None,
+        )
+        if store is not None:
+            store.create_session(CALIBRATION, calibration.id, calibration.serial_number)
+        for entry, path, (_, result) in zip(entries, paths, results):
+            if not result.valid():
+                logger.info(f"Calibration board not detected in {entry.frame}.")
+                continue
+            calibration.add_pose(entry.pose, result)
+            if store is not None:
+                store.add_entry_file(calibration.id, path, entry.pose)
+
+    calibration.recalibrate()
+    calibrations[calibration.id] = calibration
     return calibration
 
 
+def _read_dataset_manifest(archive: zipfile.ZipFile) -> list[CalibrationDatasetEntry]:
+    """
+    Read the manifest of a dataset archive and check the limits against the sizes in the archive directory, so
+    nothing is extracted from archives which are too large. Extraction stops at the size in the directory.
+    """
+
+    if len(archive.infolist()) > DATASET_MAX_FRAMES + 1:
+        raise HTTPException(status_code=413, detail=f"Dataset has more than {DATASET_MAX_FRAMES} frames")
+    if archive.getinfo(DATASET_MANIFEST).file_size > DATASET_MANIFEST_LIMIT:
+        raise HTTPException(status_code=413, detail=f"{DATASET_MANIFEST} is larger than {DATASET_MANIFEST_LIMIT} bytes")
+
+    entries: list[CalibrationDatasetEntry] = TypeAdapter(list[CalibrationDatasetEntry]).validate_json(
+        archive.read(DATASET_MANIFEST)
+    )
+    if len(entries) > DATASET_MAX_FRAMES:
+        raise HTTPException(status_code=413, detail=f"Dataset has more than {DATASET_MAX_FRAMES} frames")
+    if sum(archive.getinfo(entry.frame).file_size for entry in entries) > DATASET_EXTRACT_LIMIT:
+        raise HTTPException(status_code=413, detail=f"Extracted dataset is larger than {DATASET_EXTRACT_LIMIT} bytes")
+    return entries
+
+
 @router.get("/{calibration_id}")
 @zivid_lock
 def get_calibration(calibration_id: str) -> Calibration:
     """Get a calibration by ID"""
 
-    return calibrations[calibration_id]
+    return lookup_calibration(calibration_id)
 
 
-@router.post("/{calibration_id}/poses")
+@router.post("/{calibration_id}/poses", dependencies=[Depends(calibration_admission)])
 @zivid_lock
-def add_calibration_pose(calibration_id: str, pose: Pose) -> Calibration:
-    """Add a calibration pose to a calibration"""
+def add_calibration_pose(calibration_id: str, pose: Pose, capture_id: Optional[str] = None) -> Calibration:
+    """
+    Add a calibration pose to a calibration.
+    Detects the calibration board in the cached capture if `capture_id` is given, otherwise a new capture is taken.
+    The hand-eye calibration is recomputed in the background, see `solve_calibration`.
+    """
 
-    calibration = calibrations[calibration_id]
-    camera = get_connected_camera(calibration.serial_number)
-    result = zivid.calibration.detect_calibration_board(camera)
+    calibration = lookup_calibration(calibration_id)
+    frame = board_detection_frame(calibration.serial_number, capture_id)
+    result = zivid.calibration.detect_calibration_board(frame)
 
     if not result.valid():
         logger.info("Calibration board not detected.")
         return calibration
 
     calibration.add_pose(pose, result)
-    calibration.recalibrate()
+    calibration.schedule_recalibration()
+
+    # The frame is kept so the detection result can be restored after a restart
+    if store is not None:
+        store.add_entry(calibration.id, frame, pose)
 
     return calibration
 
@@ -80,15 +225,87 @@ def add_calibration_pose(calibration_id: str, pose: Pose) -> Calibration:
 def delete_calibration_pose(calibration_id: str, pose_id: int) -> Calibration:
     """Delete a calibration pose from a calibration"""
 
-    calibration = calibrations[calibration_id]
+    calibration = lookup_calibration(calibration_id)
     calibration.remove_pose(pose_id)
+    calibration.schedule_recalibration()
+    if store is not None:
+        store.remove_entry(calibration.id, pose_id)
+    return calibration
+
+
+@router.post("/{calibration_id}/solve")
+def solve_calibration(calibration_id: str) -> Calibration:
+    """
+    Compute the hand-eye calibration for the current dataset and wait for the result.
+    Adding or removing poses only schedules the computation in the background. Compare `dataset_version`
+    and `calibrated_version` to see whether a result covers all poses.
+    The computation does not use the camera, so the zivid lock is not held.
+    """
+
+    calibration = lookup_calibration(calibration_id)
     calibration.recalibrate()
     return calibration
 
 
+@router.get("/{calibration_id}/diagnostics")
+def get_calibration_diagnostics(calibration_id: str) -> CalibrationDiagnostics:
+    """
+    Get a leave-one-out analysis of the calibration.
+    Reports how much the hand-eye calibration changes when each pose is left out and flags poses
+    with an unusually large influence as outliers. Requires at least 3 poses.
+    """
+
+    calibration = lookup_calibration(calibration_id)
+    try:
+        return calibration.diagnostics()
+    except ValueError as e:
+        # failed precondition
+        raise HTTPException(status_code=412, detail=str(e)) from e
+
+
 @router.delete("/{calibration_id}")
 @zivid_lock
 def delete_calibration(calibration_id: str):
     """Delete a calibration by ID"""
 
+    lookup_calibration(calibration_id)
     del calibrations[calibration_id]
+    if store is not None:
+        store.delete_session(calibration_id)
+
+
+def lookup_calibration(calibration_id: str) -> Calibration:
+    """Get a calibration by ID. Restores persisted calibrations on first access."""
+
+    with _restore_lock:
+        if calibration_id in stored_calibrations:
+            # Kept until restored, so the camera of the calibration is known meanwhile, see `calibration_admission`
+            calibrations[calibration_id] = restore_calibration(stored_calibrations[calibration_id])
+            del stored_calibrations[calibration_id]
+    if calibration_id in calibrations:
+        return calibrations[calibration_id]
+    raise HTTPException(status_code=404, detail="Calibration ID not found")
+
+
+def restore_calibration(session: StoredSession) -> Calibration:
+    """Restore a persisted calibration by detecting the calibration board in its stored frames"""
+
+    assert store is not None
+    entries = store.entries(session.id)
+    results = executor.map(detect_calibration_board_in_file, [str(entry.frame_path) for entry in entries])
+
+    calibration = Calibration(
+        id=session.id,
+        serial_number=session.serial_number,
+        poses=[],
+        detection_results=[],
+        residuals=None,
+        hand_eye_calibration=None,
+    )
+    for entry, (_, result) in zip(entries, results):
+        if entry.pose is not None:
+            calibration.add_pose(entry.pose, result)
+
+    logger.info(f"Restored calibration {session.id} with {len(calibration.poses)} poses.")
+    calibration.schedule_recalibration()
+    return calibration
@@ -1,4 +1,7 @@
+import zipfile
+from datetime import datetime, timezone
 from io import BytesIO
+from typing import Optional
 
 import numpy as np
 import point_cloud_utils as pcu
@@ -6,20 +9,134 @@ import rerun as rr
 import zivid
 import zivid.calibration
 import zivid.firmware
-from fastapi import APIRouter, HTTPException, Response
-from fastapi.responses import FileResponse
+from decouple import config
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from PIL import Image
+from pydantic import ValidationError
 
-from zivid_nova import zivid_app
+from zivid_nova import board_tracker, compact_cloud, extrinsics, quality, references, zivid_app
+from zivid_nova.admission import camera_admission
+from zivid_nova.captures import Capture, captures
+from zivid_nova.compact_cloud import Compression
+from zivid_nova.models.board_detection import BoardDetection
 from zivid_nova.models.camera import Camera
+from zivid_nova.models.capture import CaptureInfo
+from zivid_nova.models.capture_quality import CaptureQuality
+from zivid_nova.models.capture_sequence import (
+    CaptureSequence,
+    CaptureSequenceResult,
+    CaptureStepResult,
+    CaptureStepType,
+)
 from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
+from zivid_nova.models.capture_wait import CaptureWait
 from zivid_nova.models.downsample_factor import DownsampleFactor
+from zivid_nova.models.height_map import HeightMapAggregation, HeightMapGrid
+from zivid_nova.models.point_cloud_filter import PointCloudFilter
+from zivid_nova.models.point_cloud_format import PointCloudFormat
 from zivid_nova.models.pose import Pose
+from zivid_nova.models.reference import ReferenceInfo
+from zivid_nova.point_cloud import changed_mask, height_map, merge_by_snr, transform_points, valid_points
+from zivid_nova.routes.calibrations import lookup_calibration
+from zivid_nova.routes.captures import board_detection_frame, lookup_capture
+from zivid_nova.spool import file_response, spool_path
 from zivid_nova.utilities import is_rerun_enabled, rgba_to_rgb
 from zivid_nova.zivid_app import zivid_lock
 
 router = APIRouter(prefix="/cameras", tags=["cameras"])
 
+# Quantization step in mm of positions in compact point clouds
+COMPACT_POSITION_SCALE = config("COMPACT_POSITION_SCALE", default=0.05, cast=float)
+
+# Upper limit of the number of height map cells
+MAX_HEIGHT_MAP_CELLS = 4096 * 4096
+
+
+def point_cloud_filter(
+    voxel_size: Optional[float] = Query(None, gt=0),
+    outlier_radius: Optional[float] = Query(None, gt=0),
+    outlier_min_neighbors: int = Query(5, ge=1),
+    statistical_neighbors: Optional[int] = Query(None, ge=1),
+    statistical_std_ratio: float = Query(2.0, gt=0),
+) -> PointCloudFilter:
+    """Point cloud filter from query parameters, see `PointCloudFilter`"""
+
+    return PointCloudFilter(
+        voxel_size=voxel_size,
+        outlier_radius=outlier_radius,
+        outlier_min_neighbors=outlier_min_neighbors,
+        statistical_neighbors=statistical_neighbors,
+        statistical_std_ratio=statistical_std_ratio,
+    )
+
+
+def capture_preset(
+    serial_number: str, preset: CaptureSettingsPreset = CaptureSettingsPreset.AUTO
+) -> CaptureSettingsPreset:
+    """Capture settings preset from the query parameter, the adaptive preset is resolved for the camera"""
+
+    return quality.select_preset(serial_number, preset)
+
+
+def height_map_grid(
+    x_min: float,
+    x_max: float,
+    y_min: float,
+    y_max: float,
+    *,
+    resolution: float = Query(1.0, gt=0),
+    aggregation: HeightMapAggregation = HeightMapAggregation.MAX,
+) -> HeightMapGrid:
+    """Height map grid from query parameters, see `HeightMapGrid`"""
+
+    if x_max <= x_min or y_max <= y_min:
+        raise HTTPException(status_code=400, detail="Upper bounds must be greater than lower bounds")
+    grid = HeightMapGrid(
+        x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max, resolution=resolution, aggregation=aggregation
+    )
+    rows, columns = grid.shape
+    if rows * columns > MAX_HEIGHT_MAP_CELLS:
+        raise HTTPException(status_code=400, detail=f"Height map of {rows}x{columns} cells is too large")
+    return grid
+
+
+def height_map_transform(
+    serial_number: str,
+    calibration_id: Optional[str] = Query(
+        None, description="Hand-eye calibration of the camera to use instead of its extrinsics"
+    ),
+    robot_pose: Optional[str] = Query(
+        None, description="Flange pose in the robot base frame at the time of the capture as JSON, see `Pose`"
+    ),
+) -> np.ndarray:
+    """
+    Transformation of the camera frame into the frame of the height map.
+    Uses the extrinsics of the camera, or with `calibration_id` its eye-in-hand calibration and the robot pose.
+    """
+
+    if calibration_id is None:
+        pose = extrinsics.get_extrinsics(serial_number)
+        if pose is None:
+            # failed precondition
+            raise HTTPException(status_code=412, detail=f"No extrinsics set for camera {serial_number}")
+        return pose.to_matrix()
+
+    if robot_pose is None:
+        raise HTTPException(status_code=400, detail="A robot pose is required with a hand-eye calibration")
+    try:
+        flange = Pose.model_validate_json(robot_pose)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid robot pose: {e}") from e
+    calibration = lookup_calibration(calibration_id)
+    if calibration.serial_number != serial_number:
+        raise HTTPException(status_code=400, detail=f"Calibration {calibration_id} is not of camera {serial_number}")
+    hand_eye = calibration.hand_eye_calibration
+    if hand_eye is None:
+        # failed precondition
+        raise HTTPException(status_code=412, detail=f"Calibration {calibration_id} is not solved")
+    return flange.to_matrix() @ hand_eye.to_matrix()
+
 
 @router.get("")
 @zivid_lock
@@ -46,112 +163,475 @@ def disconnect_camera(serial_number: str):
         camera.disconnect()
 
 
-@router.get("/{serial_number}/frame", responses={200: {"content": {"application/octet-stream": {}}}})
+@router.get("/{serial_number}/extrinsics")
+def get_camera_extrinsics(serial_number: str) -> Pose:
+    """Get the pose of the camera in the common cell frame, e.g. the robot base"""
+
+    pose = extrinsics.get_extrinsics(serial_number)
+    if pose is None:
+        raise HTTPException(status_code=404, detail="No extrinsics set for camera")
+    return pose
+
+
+@router.put("/{serial_number}/extrinsics")
+def set_camera_extrinsics(serial_number: str, pose: Pose):
+    """
+    Set the pose of the camera in the common cell frame, e.g. the robot base. Positions are in mm.
+    Used to transform point clouds of multiple cameras into one frame.
+    """
+
+    extrinsics.set_extrinsics(serial_number, pose)
+
+
+@router.delete("/{serial_number}/extrinsics")
+def delete_camera_extrinsics(serial_number: str):
+    """Remove the extrinsics of the camera"""
+
+    extrinsics.set_extrinsics(serial_number, None)
+
+
+@router.get("/{serial_number}/reference")
+def get_camera_reference(serial_number: str) -> ReferenceInfo:
+    """Get the reference depth map of the camera, see `set_camera_reference`"""
+
+    reference = references.get_reference(serial_number)
+    if reference is None:
+        raise HTTPException(status_code=404, detail="No reference set for camera")
+    return ReferenceInfo.from_reference(reference)
+
+
+@router.put("/{serial_number}/reference", dependencies=[Depends(camera_admission)])
+@zivid_lock
+def set_camera_reference(
+    serial_number: str, capture_id: Optional[str] = None, preset: CaptureSettingsPreset = Depends(capture_preset)
+) -> ReferenceInfo:
+    """
+    Store the depth map of the static scene, e.g. the empty bin, as reference of the camera.
+    Uses the cached capture if `capture_id` is given, otherwise a new capture is taken.
+    With `change_threshold` the point cloud routes only return points which differ from the reference.
+    The reference is only kept in memory.
+    """
+
+    if capture_id is not None:
+        capture = lookup_capture(capture_id, serial_number)
+    else:
+        camera = zivid_app.get_connected_camera(serial_number)
+        capture = captures.add(serial_number, zivid_app.capture_frame(camera, preset), preset)
+    return ReferenceInfo.from_reference(references.set_reference(capture))
+
+
+@router.delete("/{serial_number}/reference")
+def delete_camera_reference(serial_number: str):
+    """Remove the reference depth map of the camera"""
+
+    references.remove_reference(serial_number)
+
+
+@router.get(
+    "/{serial_number}/frame",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"application/octet-stream": {}}}},
+)
 @zivid_lock
 def get_camera_frame(
+    request: Request,
     serial_number: str,
     down_sample_factor: DownsampleFactor = DownsampleFactor.NONE,
-    preset: CaptureSettingsPreset = CaptureSettingsPreset.AUTO,
-) -> FileResponse:
-    """Get a frame from a camera in zdf format"""
+    preset: CaptureSettingsPreset = Depends(capture_preset),
+) -> Response:
+    """
+    Get a frame from a camera in zdf format.
+    Full resolution frames are cached, their capture ID is returned in the `Capture-Id` header.
+    An interrupted download can be resumed with a `Range` request to `/cameras/{serial_number}/captures/{capture_id}`.
+    """
 
     camera = zivid_app.get_connected_camera(serial_number)
+    if down_sample_factor is DownsampleFactor.NONE:
+        return zdf_response(request, captures.add(serial_number, zivid_app.capture_frame(camera, preset), preset))
 
+    # The SDK downsamples the frame in place, so it is not cached
     with zivid_app.get_camera_frame(camera, down_sample_factor, preset) as frame:
-        filename = f"{camera.info.serial_number}.zdf"
-        frame.save(filename)
-        return FileResponse(filename, media_type="application/octet-stream", filename=filename)
+        path = spool_path(".zdf")
+        frame.save(str(path))
+    return file_response(request, path, f"{serial_number}.zdf")
 
 
-@router.get("/{serial_number}/frame/pointcloud", responses={200: {"content": {"application/octet-stream": {}}}})
+@router.get(
+    "/{serial_number}/frame/pointcloud",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"application/octet-stream": {}, compact_cloud.MEDIA_TYPE: {}}}},
+)
 @zivid_lock
 def get_camera_frame_pointcloud(
+    request: Request,
     serial_number: str,
+    *,
     down_sample_factor: DownsampleFactor = DownsampleFactor.NONE,
-    preset: CaptureSettingsPreset = CaptureSettingsPreset.AUTO,
-) -> FileResponse:
+    preset: CaptureSettingsPreset = Depends(capture_preset),
+    board_pose: bool = False,
+    point_filter: PointCloudFilter = Depends(point_cloud_filter),
+    point_format: PointCloudFormat = Query(PointCloudFormat.PLY, alias="format"),
+    compression: Compression = Compression.NONE,
+    change_threshold: Optional[float] = Query(None, gt=0),
+) -> Response:
     """
     Get a point cloud from a camera in ply format.
     Point cloud will contain positions, colors and normals.
     Any points with NaN (position) values will be removed.
-    """
 
-    camera = zivid_app.get_connected_camera(serial_number)
+    With `format=compact` positions are quantized relative to the bounding box and normals are packed, which is
+    several times smaller than ply, see `zivid_nova.compact_cloud` for the layout and a reference decoder.
+    The compact payload can additionally be compressed with `compression`, if supported by the server. It is sent as
+    `application/vnd.zivid-nova.compact-cloud`, which the response compression (`Accept-Encoding`) leaves as is.
 
-    with zivid_app.get_camera_frame(camera, down_sample_factor, preset) as frame:
-        filename = f"{camera.info.serial_number}.ply"
+    The point cloud can be reduced on the server before it is transferred: `voxel_size` replaces all points within
+    a voxel by their mean, `outlier_radius` and `statistical_neighbors` enable radius and statistical outlier removal.
+    With `change_threshold` only points whose depth differs from the reference of the camera by more than the
+    threshold in mm are returned, see `/cameras/{serial_number}/reference`.
+    The frame is cached, its capture ID is returned in the `Capture-Id` header.
 
-        colors = frame.point_cloud().copy_data("rgba")
-        colors = colors.reshape((-1, 4))
-        colors = colors[..., :] / 255
-        positions = frame.point_cloud().copy_data("xyz").reshape(-1, 3)
-        normals = frame.point_cloud().copy_data("normals").reshape(-1, 3)
+    If `board_pose` is set, the calibration board is detected in the same frame and its pose in the camera frame
+    is returned as JSON in the `Board-Pose` header (empty if the board was not detected). This saves a second
+    capture, but the capture settings of the preset may be less suited for board detection.
+    """
 
-        # Remove points with NaN values
-        valid_indices = ~np.isnan(positions).any(axis=1)
-        positions = positions[valid_indices]
-        colors = colors[valid_indices]
-        normals = normals[valid_indices]
+    camera = zivid_app.get_connected_camera(serial_number)
+    capture = captures.add(serial_number, zivid_app.capture_frame(camera, preset), preset)
+    return point_cloud_response(
+        request,
+        capture,
+        down_sample_factor,
+        board_pose=board_pose,
+        point_filter=point_filter,
+        point_format=point_format,
+        compression=compression,
+        change_threshold=change_threshold,
+    )
+
+
+@router.get(
+    "/{serial_number}/frame/color-image",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"image/png": {}}}},
+)
+@zivid_lock
+def get_camera_frame_color_image(
+    serial_number: str,
+    down_sample_factor: DownsampleFactor = DownsampleFactor.NONE,
+    preset: CaptureSettingsPreset = Depends(capture_preset),
+) -> Response:
+    """
+    Get a color image from a camera.
+    The frame is cached, its capture ID is returned in the `Capture-Id` header.
+    """
+
+    camera = zivid_app.get_connected_camera(serial_number)
+    capture = captures.add(serial_number, zivid_app.capture_frame(camera, preset), preset)
+    return color_image_response(capture, down_sample_factor)
 
-        # saving the pointcloud via the frame.save("file.ply") method will ommit the normals
-        pcu.save_mesh_vnc(filename, v=positions, n=normals, c=colors)
 
-        frame.release()
+@router.get(
+    "/{serial_number}/frame/depth-image",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"image/png": {}}}},
+)
+@zivid_lock
+def get_camera_frame_depth_image(
+    serial_number: str,
+    down_sample_factor: DownsampleFactor = DownsampleFactor.NONE,
+    preset: CaptureSettingsPreset = Depends(capture_preset),
+) -> Response:
+    """
+    Get a depth image from a camera.
+    The frame is cached, its capture ID is returned in the `Capture-Id` header.
+    """
 
-        log_point_cloud(filename)
-        return FileResponse(filename, media_type="application/octet-stream", filename=filename)
+    camera = zivid_app.get_connected_camera(serial_number)
+    capture = captures.add(serial_number, zivid_app.capture_frame(camera, preset), preset)
+    return depth_image_response(capture, down_sample_factor)
 
 
-@router.get("/{serial_number}/frame/color-image", responses={200: {"content": {"image/png": {}}}})
+@router.get(
+    "/{serial_number}/frame/change-mask",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"image/png": {}}}},
+)
 @zivid_lock
-def get_camera_frame_color_image(
+def get_camera_frame_change_mask(
     serial_number: str,
+    threshold: float = Query(gt=0),
     down_sample_factor: DownsampleFactor = DownsampleFactor.NONE,
-    preset: CaptureSettingsPreset = CaptureSettingsPreset.AUTO,
+    preset: CaptureSettingsPreset = Depends(capture_preset),
 ) -> Response:
-    """Get a color image from a camera"""
+    """
+    Get a 1 bit mask of the pixels whose depth differs from the reference of the camera by more than the threshold
+    in mm, see `/cameras/{serial_number}/reference`.
+    The frame is cached, its capture ID is returned in the `Capture-Id` header.
+    """
 
     camera = zivid_app.get_connected_camera(serial_number)
-
-    with zivid_app.get_camera_frame(camera, down_sample_factor, preset) as frame:
-        point_cloud = frame.point_cloud()
-        rgb = rgba_to_rgb(point_cloud.copy_data("rgba"))
-        buffer = BytesIO()
-        image = Image.fromarray(rgb)
-        image.save(buffer, "png")
-        log_2d_image(buffer, "zivid/color_image")
-        return Response(content=buffer.getvalue(), media_type="image/png")
+    capture = captures.add(serial_number, zivid_app.capture_frame(camera, preset), preset)
+    return change_mask_response(capture, threshold, down_sample_factor)
 
 
-@router.get("/{serial_number}/frame/depth-image", responses={200: {"content": {"image/png": {}}}})
+@router.get(
+    "/{serial_number}/frame/height-map",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"application/octet-stream": {}}}},
+)
 @zivid_lock
-def get_camera_frame_depth_image(
+def get_camera_frame_height_map(
     serial_number: str,
+    grid: HeightMapGrid = Depends(height_map_grid),
+    transform: np.ndarray = Depends(height_map_transform),
     down_sample_factor: DownsampleFactor = DownsampleFactor.NONE,
-    preset: CaptureSettingsPreset = CaptureSettingsPreset.AUTO,
+    preset: CaptureSettingsPreset = Depends(capture_preset),
 ) -> Response:
-    """Get a depth image from a camera"""
+    """
+    Get an orthographic height map in the common cell frame, e.g. the robot base, in npz format.
+
+    The point cloud is transformed with the extrinsics of the camera, see `/cameras/{serial_number}/extrinsics`,
+    and the z values of all points within a cell of the grid are aggregated. For a camera mounted on the robot,
+    pass the ID of its hand-eye calibration and the flange pose at the time of the capture instead. The npz file contains `height`,
+    float32 in mm with shape (rows, columns) and NaN for empty cells, `valid`, a bool mask of non-empty cells,
+    and `origin` and `resolution` of the grid. Row i and column j cover y from `y_min + i * resolution` and
+    x from `x_min + j * resolution`.
+    The frame is cached, its capture ID is returned in the `Capture-Id` header.
+    """
 
     camera = zivid_app.get_connected_camera(serial_number)
+    capture = captures.add(serial_number, zivid_app.capture_frame(camera, preset), preset)
+    return height_map_response(capture, grid, transform, down_sample_factor)
 
-    with zivid_app.get_camera_frame(camera, down_sample_factor, preset) as frame:
-        point_cloud = frame.point_cloud()
-        depth = point_cloud.copy_data("z")
-        depth_map_uint8 = ((depth - np.nanmin(depth)) / (np.nanmax(depth) - np.nanmin(depth)) * 255).astype(np.uint8)
-        buffer = BytesIO()
-        image = Image.fromarray(depth_map_uint8)
-        image.save(buffer, "png")
-        log_2d_image(buffer, "zivid/depth_image")
-        return Response(content=buffer.getvalue(), media_type="image/png")
 
-
-@router.get("/{serial_number}/frame/board-pose")
+@router.post("/{serial_number}/captures", dependencies=[Depends(camera_admission)])
 @zivid_lock
-def get_camera_frame_board_pose(serial_number: str) -> Pose:
-    """Get the pose of the calibration board in the camera frame"""
+def capture_frame(
+    serial_number: str,
+    preset: CaptureSettingsPreset = Depends(capture_preset),
+    wait: CaptureWait = CaptureWait.ACQUIRED,
+) -> CaptureInfo:
+    """
+    Capture a frame and cache it without transferring any data.
+
+    With `wait=acquired` the request returns as soon as the camera finished the acquisition, so the robot can
+    move while the point cloud is still being processed. With `wait=processed` it returns once processing is done,
+    including the quality statistics of the capture.
+    The data is fetched afterwards with the returned capture ID, see `/cameras/{serial_number}/captures/{capture_id}`.
+    """
 
     camera = zivid_app.get_connected_camera(serial_number)
-    result = zivid.calibration.detect_calibration_board(camera)
+    capture = captures.add(serial_number, zivid_app.capture_frame(camera, preset), preset)
+
+    if wait is CaptureWait.PROCESSED:
+        # Copying the data blocks until processing is done
+        capture.point_cloud()
+        capture.quality()
+
+    return CaptureInfo.from_capture(capture)
+
+
+@router.post(
+    "/{serial_number}/sequences",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"application/zip": {}}}},
+)
+def capture_sequence(request: Request, serial_number: str, sequence: CaptureSequence) -> Response:
+    """
+    Run multiple capture steps back-to-back, e.g. 3D captures with different presets, a 2D image and
+    a calibration board detection, and return all results as one zip bundle.
+
+    All capture settings are loaded before the first step. 3D captures are cached and included in zdf format,
+    2D images in png format. `manifest.json` lists the results in step order, see `CaptureSequenceResult`.
+    With `merge` the 3D captures are merged into `merged.ply`, taking the valid point with the highest SNR per pixel.
+    The camera is released after the last step, merging and bundling do not block other requests.
+    """
+
+    results: list[CaptureStepResult] = []
+    frames: dict[str, Capture] = {}
+    images: dict[str, np.ndarray] = {}
+    with zivid_app.locked():
+        camera = zivid_app.get_connected_camera(serial_number)
+
+        # load all settings up front, so the acquisitions are not interrupted by loading
+        presets = {step.preset: quality.select_preset(serial_number, step.preset) for step in sequence.steps}
+        settings = {
+            step.preset: zivid_app.get_settings(camera, presets[step.preset])
+            for step in sequence.steps
+            if step.type is CaptureStepType.CAPTURE_3D
+        }
+        if any(step.type is CaptureStepType.CAPTURE_2D for step in sequence.steps):
+            zivid_app.get_settings2d()
+
+        for index, step in enumerate(sequence.steps):
+            if step.type is CaptureStepType.CAPTURE_3D:
+                capture = captures.add(
+                    serial_number,
+                    zivid_app.capture_frame_with_settings(camera, settings[step.preset]),
+                    presets[step.preset],
+                )
+                file = f"{index}-{presets[step.preset].value}.zdf"
+                frames[file] = capture
+                results.append(
+                    CaptureStepResult(type=step.type, preset=presets[step.preset], capture_id=capture.id, file=file)
+                )
+            elif step.type is CaptureStepType.CAPTURE_2D:
+                with zivid_app.get_camera_frame2d(camera) as frame2d:
+                    file = f"{index}-2d.png"
+                    images[file] = frame2d.image_rgba().copy_data()
+                results.append(CaptureStepResult(type=step.type, file=file))
+            else:
+                result = zivid.calibration.detect_calibration_board(camera)
+                detection = BoardDetection.from_detection_result(result, datetime.now(timezone.utc))
+                results.append(CaptureStepResult(type=step.type, board_detection=detection))
+
+    manifest = CaptureSequenceResult(serial_number=serial_number, steps=results)
+
+    merged_path = None
+    if sequence.merge:
+        point_clouds = [capture.point_cloud() for capture in frames.values()]
+        if len({point_cloud.xyz.shape for point_cloud in point_clouds}) != 1:
+            raise HTTPException(status_code=400, detail="3D captures with different resolutions can not be merged")
+        merged = merge_by_snr(point_clouds, [capture.snr() for capture in frames.values()])
+        positions, colors, normals = valid_points(merged.xyz, merged.rgba, merged.normals)
+        merged_path = spool_path(".ply")
+        pcu.save_mesh_vnc(str(merged_path), v=positions, n=normals, c=colors / 255)
+        manifest.merged = "merged.ply"
+
+    path = spool_path(".zip")
+    with zipfile.ZipFile(path, "w") as archive:
+        for file, capture in frames.items():
+            archive.write(capture.zdf_file(), file)
+        for file, rgba in images.items():
+            buffer = BytesIO()
+            Image.fromarray(rgba).save(buffer, "png")
+            archive.writestr(file, buffer.getvalue())
+        if merged_path is not None:
+            archive.write(merged_path, "merged.ply")
+            merged_path.unlink()
+        archive.writestr("manifest.json", manifest.model_dump_json(indent=2))
+
+    return file_response(
+        request,
+        path,
+        f"{serial_number}-sequence.zip",
+        media_type="application/zip",
+        headers={"Capture-Ids": ",".join(capture.id for capture in frames.values())},
+    )
+
+
+@router.get("/{serial_number}/captures/{capture_id}", responses={200: {"content": {"application/octet-stream": {}}}})
+def get_capture_frame(request: Request, serial_number: str, capture_id: str) -> Response:
+    """
+    Get a cached capture in zdf format. Waits for the processing to finish.
+    Supports `Range` requests, so interrupted downloads can be resumed as long as the capture is cached.
+    """
+
+    return zdf_response(request, lookup_capture(capture_id, serial_number))
+
+
+@router.get(
+    "/{serial_number}/captures/{capture_id}/pointcloud",
+    responses={200: {"content": {"application/octet-stream": {}, compact_cloud.MEDIA_TYPE: {}}}},
+)
+def get_capture_pointcloud(
+    request: Request,
+    serial_number: str,
+    capture_id: str,
+    *,
+    down_sample_factor: int = Query(1, ge=1),
+    board_pose: bool = False,
+    point_filter: PointCloudFilter = Depends(point_cloud_filter),
+    point_format: PointCloudFormat = Query(PointCloudFormat.PLY, alias="format"),
+    compression: Compression = Compression.NONE,
+    change_threshold: Optional[float] = Query(None, gt=0),
+) -> Response:
+    """
+    Get the point cloud of a cached capture in ply format, see `/cameras/{serial_number}/frame/pointcloud`.
+    Any integer downsampling factor is supported, all resolutions are derived from the same capture.
+    Waits for the processing to finish.
+    """
+
+    return point_cloud_response(
+        request,
+        lookup_capture(capture_id, serial_number),
+        down_sample_factor,
+        board_pose=board_pose,
+        point_filter=point_filter,
+        point_format=point_format,
+        compression=compression,
+        change_threshold=change_threshold,
+    )
+
+
+@router.get("/{serial_number}/captures/{capture_id}/color-image", responses={200: {"content": {"image/png": {}}}})
+def get_capture_color_image(serial_number: str, capture_id: str, down_sample_factor: int = Query(1, ge=1)) -> Response:
+    """Get the color image of a cached capture. Waits for the processing to finish."""
+
+    return color_image_response(lookup_capture(capture_id, serial_number), down_sample_factor)
+
+
+@router.get("/{serial_number}/captures/{capture_id}/depth-image", responses={200: {"content": {"image/png": {}}}})
+def get_capture_depth_image(serial_number: str, capture_id: str, down_sample_factor: int = Query(1, ge=1)) -> Response:
+    """Get the depth image of a cached capture. Waits for the processing to finish."""
+
+    return depth_image_response(lookup_capture(capture_id, serial_number), down_sample_factor)
+
+
+@router.get("/{serial_number}/captures/{capture_id}/change-mask", responses={200: {"content": {"image/png": {}}}})
+def get_capture_change_mask(
+    serial_number: str, capture_id: str, threshold: float = Query(gt=0), down_sample_factor: int = Query(1, ge=1)
+) -> Response:
+    """Get the change mask of a cached capture, see `/cameras/{serial_number}/frame/change-mask`"""
+
+    return change_mask_response(lookup_capture(capture_id, serial_number), threshold, down_sample_factor)
+
+
+@router.get("/{serial_number}/captures/{capture_id}/quality")
+def get_capture_quality(serial_number: str, capture_id: str) -> CaptureQuality:
+    """
+    Get the quality statistics of a cached capture: the share of valid and saturated pixels, an SNR histogram
+    and depth percentiles. They are computed in the background for every capture, waits until they are available.
+    """
+
+    return CaptureQuality.from_statistics(lookup_capture(capture_id, serial_number).quality())
+
+
+@router.get("/{serial_number}/preset-scores")
+def get_preset_scores(serial_number: str) -> dict[CaptureSettingsPreset, float]:
+    """
+    Get the score of the latest capture of the camera per preset, which the `adaptive` preset chooses from.
+    The score is the share of well exposed pixels (SNR of at least 10) minus the share of saturated pixels.
+    """
+
+    return quality.preset_selector.scores(serial_number)
+
+
+@router.get(
+    "/{serial_number}/captures/{capture_id}/height-map", responses={200: {"content": {"application/octet-stream": {}}}}
+)
+def get_capture_height_map(
+    serial_number: str,
+    capture_id: str,
+    grid: HeightMapGrid = Depends(height_map_grid),
+    transform: np.ndarray = Depends(height_map_transform),
+    down_sample_factor: int = Query(1, ge=1),
+) -> Response:
+    """Get the height map of a cached capture, see `/cameras/{serial_number}/frame/height-map`"""
+
+    return height_map_response(lookup_capture(capture_id, serial_number), grid, transform, down_sample_factor)
+
+
+@router.get("/{serial_number}/frame/board-pose", dependencies=[Depends(camera_admission)])
+@zivid_lock
+def get_camera_frame_board_pose(serial_number: str, capture_id: Optional[str] = None) -> Pose:
+    """
+    Get the pose of the calibration board in the camera frame.
+    Detects the board in the cached capture if `capture_id` is given, e.g. from a previous point cloud request
+    or an uploaded zdf file (see `/captures`). Otherwise a new capture is taken.
+    """
+
+    result = zivid.calibration.detect_calibration_board(board_detection_frame(serial_number, capture_id))
     if not result.valid():
         # failed precondition
         raise HTTPException(status_code=412, detail="Calibration board not detected")
@@ -159,7 +639,32 @@ def get_camera_frame_board_pose(serial_number: str) -> Pose:
     return pose
 
 
-@router.get("/{serial_number}/frame2d", responses={200: {"content": {"image/png": {}}}})
+@router.get("/{serial_number}/frame/board-pose/stream", responses={200: {"content": {"text/event-stream": {}}}})
+async def stream_camera_frame_board_pose(serial_number: str) -> StreamingResponse:
+    """
+    Stream the detections of the calibration board as server-sent events, e.g. while placing the board.
+    Each event contains the board pose in the camera frame, whether it is valid and the infield correction feedback.
+    The board is detected back-to-back as long as at least one client is connected.
+    """
+
+    async def events():
+        tracker = board_tracker.get_tracker(serial_number)
+        queue = tracker.subscribe()
+        try:
+            while True:
+                detection = await queue.get()
+                yield f"data: {detection.model_dump_json()}\n\n"
+        finally:
+            tracker.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.get(
+    "/{serial_number}/frame2d",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"image/png": {}}}},
+)
 @zivid_lock
 def get_camera_frame2d_color(serial_number: str) -> Response:
     """Get a color image from a camera"""
@@ -198,6 +703,147 @@ def update_camera_firmware(serial_number: str):
     zivid.firmware.update(camera)
 
 
+def zdf_response(request: Request, capture: Capture) -> Response:
+    """Send a cached capture in zdf format. The zdf file is kept with the capture, so ranges can be requested."""
+
+    with capture.lock:
+        # opened before the lock is released, so evicting the capture does not affect the response
+        return file_response(
+            request,
+            capture.zdf_file(),
+            f"{capture.serial_number}.zdf",
+            headers={"Capture-Id": capture.id},
+            etag=capture.id,
+            delete=False,
+        )
+
+
+def point_cloud_response(
+    request: Request,
+    capture: Capture,
+    down_sample_factor: int = 1,
+    *,
+    board_pose: bool = False,
+    point_filter: Optional[PointCloudFilter] = None,
+    point_format: PointCloudFormat = PointCloudFormat.PLY,
+    compression: Compression = Compression.NONE,
+    change_threshold: Optional[float] = None,
+) -> Response:
+    """
+    Encode the point cloud of a cached capture, including colors and normals of all valid points.
+    Optionally keeps only points which differ from the reference, reduces the point cloud with the filter
+    and detects the calibration board in the same frame.
+    """
+
+    if not compression.available:
+        raise HTTPException(status_code=400, detail=f"Compression {compression.value} is not supported by the server")
+
+    with capture.lock:
+        frame = capture.frame
+        point_cloud = capture.point_cloud(down_sample_factor)
+
+        xyz = point_cloud.xyz
+        if change_threshold is not None:
+            changed = reference_changes(capture, change_threshold, down_sample_factor)
+            xyz = np.where(changed[..., np.newaxis], xyz, np.nan)
+
+        # Remove points with NaN values
+        normals: Optional[np.ndarray]
+        positions, colors, normals = valid_points(xyz, point_cloud.rgba, point_cloud.normals)
+        if point_filter is not None:
+            positions, colors, normals = point_filter.apply(positions, colors, normals)
+
+        headers = {"Capture-Id": capture.id}
+        if board_pose:
+            result = zivid.calibration.detect_calibration_board(frame)
+            headers["Board-Pose"] = Pose.from_zivid_pose(result.pose()).model_dump_json() if result.valid() else ""
+
+    if point_format is PointCloudFormat.COMPACT:
+        try:
+            content = compact_cloud.encode(positions, colors, normals, COMPACT_POSITION_SCALE, compression)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        return Response(content=content, media_type=compact_cloud.MEDIA_TYPE, headers=headers)
+
+    path = spool_path(".ply")
+    # saving the pointcloud via the frame.save("file.ply") method will ommit the normals
+    pcu.save_mesh_vnc(str(path), v=positions, n=normals, c=colors / 255)
+    log_point_cloud(str(path))
+    return file_response(request, path, f"{capture.serial_number}.ply", headers=headers)
+
+
+def color_image_response(capture: Capture, down_sample_factor: int = 1) -> Response:
+    """Encode the colors of a cached capture as png"""
+
+    rgb = rgba_to_rgb(capture.point_cloud(down_sample_factor).rgba)
+    buffer = BytesIO()
+    image = Image.fromarray(rgb)
+    image.save(buffer, "png")
+    log_2d_image(buffer, "zivid/color_image")
+    return Response(content=buffer.getvalue(), media_type="image/png", headers={"Capture-Id": capture.id})
+
+
+def depth_image_response(capture: Capture, down_sample_factor: int = 1) -> Response:
+    """Encode the depth of a cached capture as png, normalized to the depth range of the capture"""
+
+    depth = capture.point_cloud(down_sample_factor).xyz[..., 2]
+    depth_map_uint8 = ((depth - np.nanmin(depth)) / (np.nanmax(depth) - np.nanmin(depth)) * 255).astype(np.uint8)
+    buffer = BytesIO()
+    image = Image.fromarray(depth_map_uint8)
+    image.save(buffer, "png")
+    log_2d_image(buffer, "zivid/depth_image")
+    return Response(content=buffer.getvalue(), media_type="image/png", headers={"Capture-Id": capture.id})
+
+
+def reference_changes(capture: Capture, threshold: float, down_sample_factor: int = 1) -> np.ndarray:
+    """Mask of the pixels of a cached capture which differ from the reference of the camera"""
+
+    reference = references.get_reference(capture.serial_number)
+    if reference is None:
+        # failed precondition
+        raise HTTPException(status_code=412, detail=f"No reference set for camera {capture.serial_number}")
+
+    depth = capture.point_cloud(down_sample_factor).xyz[..., 2]
+    reference_depth = reference.depth_map(down_sample_factor)
+    if depth.shape != reference_depth.shape:
+        raise HTTPException(
+            status_code=412,
+            detail=f"Resolution {depth.shape} differs from the reference resolution {reference_depth.shape}",
+        )
+    return changed_mask(depth, reference_depth, threshold)
+
+
+def change_mask_response(capture: Capture, threshold: float, down_sample_factor: int = 1) -> Response:
+    """Encode the change mask of a cached capture as 1 bit png"""
+
+    buffer = BytesIO()
+    image = Image.fromarray(reference_changes(capture, threshold, down_sample_factor))
+    image.save(buffer, "png")
+    return Response(content=buffer.getvalue(), media_type="image/png", headers={"Capture-Id": capture.id})
+
+
+def height_map_response(
+    capture: Capture, grid: HeightMapGrid, transform: np.ndarray, down_sample_factor: int = 1
+) -> Response:
+    """Encode the height map of a cached capture as npz, see `height_map_transform`"""
+
+    (positions,) = valid_points(capture.point_cloud(down_sample_factor).xyz)
+    positions = transform_points(positions, transform)
+    heights = height_map(positions, (grid.x_min, grid.y_min), grid.shape, grid.resolution, grid.aggregation.value)
+
+    buffer = BytesIO()
+    np.savez(
+        buffer,
+        height=heights,
+        valid=~np.isnan(heights),
+        origin=np.array([grid.x_min, grid.y_min]),
+        resolution=np.array(grid.resolution),
+    )
+    return Response(
+        content=buffer.getvalue(), media_type="application/octet-stream", headers={"Capture-Id": capture.id}
+    )
+
+
 def log_2d_image(image: BytesIO, name: str):
     if not is_rerun_enabled():
         return
@@ -0,0 +1,168 @@
+import tempfile
+import time
+from typing import Annotated, AsyncIterator, Optional
+
+import numpy as np
+import zivid
+import zivid.calibration
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
+from loguru import logger
+
+from zivid_nova import quality, zivid_app
+from zivid_nova.admission import AdmissionClient, admitted
+from zivid_nova.background import executor
+from zivid_nova.captures import Capture, captures
+from zivid_nova.extrinsics import get_extrinsics
+from zivid_nova.models.capture import CaptureInfo
+from zivid_nova.models.multi_capture import MultiCaptureMode, MultiCaptureRequest
+from zivid_nova.point_cloud import encode_ply, transform_points, valid_points
+from zivid_nova.zivid_app import zivid_lock
+
+router = APIRouter(prefix="/captures", tags=["captures"])
+
+
+@router.get("")
+def get_captures() -> list[CaptureInfo]:
+    """Get all cached captures, oldest first"""
+
+    return [CaptureInfo.from_capture(capture) for capture in captures.list()]
+
+
+@router.post("")
+def upload_capture(frame: Annotated[bytes, Body(media_type="application/octet-stream")]) -> CaptureInfo:
+    """
+    Upload a frame in zdf format.
+    The returned capture ID can be used instead of a new capture, e.g. for calibration board detection.
+    Does not use a camera.
+    """
+
+    with tempfile.NamedTemporaryFile(suffix=".zdf") as file:
+        file.write(frame)
+        file.flush()
+        try:
+            zivid_frame = zivid.Frame(file.name)
+        except RuntimeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid zdf file: {e}") from e
+
+    capture = captures.add(zivid_frame.camera_info.serial_number, zivid_frame)
+    return CaptureInfo.from_capture(capture)
+
+
+async def multi_capture_admission(
+    request: MultiCaptureRequest, client: AdmissionClient = Depends()
+) -> AsyncIterator[None]:
+    """Dependency limiting multi-camera captures, admitted once for every camera, see `camera_admission`"""
+
+    with admitted(request.serial_numbers, client):
+        yield
+
+
+@router.post(
+    "/multi",
+    responses={200: {"content": {"application/octet-stream": {}}}},
+    dependencies=[Depends(multi_capture_admission)],
+)
+@zivid_lock
+def capture_multi(request: MultiCaptureRequest) -> Response:
+    """
+    Capture with multiple cameras and fuse the point clouds in the common cell frame.
+
+    Every point cloud is transformed with the extrinsics of its camera, see `/cameras/{serial_number}/extrinsics`.
+    The fused point cloud is reduced with the given filter and returned as binary ply with float32 positions in mm and uint8 colors.
+    The frames are cached, their capture IDs are returned in the `Capture-Ids` header.
+    Acquisition and processing times per camera are reported in the `Server-Timing` header.
+    """
+
+    missing = [serial_number for serial_number in request.serial_numbers if get_extrinsics(serial_number) is None]
+    if missing:
+        # failed precondition
+        raise HTTPException(status_code=412, detail=f"No extrinsics set for cameras {missing}")
+
+    cameras = [zivid_app.get_connected_camera(serial_number) for serial_number in request.serial_numbers]
+
+    def acquire(camera: zivid.Camera) -> tuple[Capture, float]:
+        start = time.perf_counter()
+        preset = quality.select_preset(camera.info.serial_number, request.preset)
+        frame = zivid_app.capture_frame(camera, preset)
+        return captures.add(camera.info.serial_number, frame, preset), time.perf_counter() - start
+
+    def process(capture: Capture) -> tuple[np.ndarray, np.ndarray, float]:
+        start = time.perf_counter()
+        point_cloud = capture.point_cloud()
+        positions, colors = valid_points(point_cloud.xyz, point_cloud.rgba)
+        extrinsics = get_extrinsics(capture.serial_number)
+        assert extrinsics is not None
+        positions = transform_points(positions, extrinsics.to_matrix())
+        return positions, colors[:, :3], time.perf_counter() - start
+
+    if request.mode is MultiCaptureMode.PARALLEL:
+        acquisitions = list(executor.map(acquire, cameras))
+    else:
+        # capture returns once the acquisition is done, so processing already overlaps with the next acquisition
+        acquisitions = [acquire(camera) for camera in cameras]
+    processed = list(executor.map(process, [capture for capture, _ in acquisitions]))
+
+    start = time.perf_counter()
+    positions = np.concatenate([positions for positions, _, _ in processed])
+    colors = np.concatenate([colors for _, colors, _ in processed])
+    positions, colors, _ = request.filter.apply(positions, colors)
+    content = encode_ply(positions, colors)
+    fuse_duration = time.perf_counter() - start
+
+    timings = []
+    for (capture, acquire_duration), (_, _, process_duration) in zip(acquisitions, processed):
+        timings.append(f"acquire-{capture.serial_number};dur={acquire_duration * 1000:.1f}")
+        timings.append(f"process-{capture.serial_number};dur={process_duration * 1000:.1f}")
+    timings.append(f"fuse;dur={fuse_duration * 1000:.1f}")
+    logger.info(f"Fused {len(positions)} points of {len(cameras)} cameras: {', '.join(timings)}")
+
+    return Response(
+        content=content,
+        media_type="application/octet-stream",
+        headers={
+            "Capture-Ids": ",".join(capture.id for capture, _ in acquisitions),
+            "Server-Timing": ", ".join(timings),
+        },
+    )
+
+
+@router.get("/{capture_id}")
+def get_capture(capture_id: str) -> CaptureInfo:
+    """Get a cached capture by ID"""
+
+    return CaptureInfo.from_capture(lookup_capture(capture_id))
+
+
+@router.delete("/{capture_id}")
+def delete_capture(capture_id: str):
+    """Remove a capture from the cache"""
+
+    captures.remove(capture_id)
+
+
+def lookup_capture(capture_id: str, serial_number: Optional[str] = None) -> Capture:
+    """Get a cached capture by ID. Optionally makes sure it was captured with the given camera."""
+
+    try:
+        capture = captures.get(capture_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail="Capture ID not found") from e
+
+    if serial_number is not None and capture.serial_number != serial_number:
+        raise HTTPException(
+            status_code=400, detail=f"Capture {capture_id} was not captured with camera {serial_number}"
+        )
+    return capture
+
+
+def board_detection_frame(serial_number: str, capture_id: Optional[str]) -> zivid.Frame:
+    """
+    Frame to detect the calibration board in.
+    Uses the cached capture if an ID is given, otherwise captures a new frame suited for board detection.
+    """
+
+    if capture_id is not None:
+        return lookup_capture(capture_id, serial_number).frame
+
+    camera = zivid_app.get_connected_camera(serial_number)
+    return zivid.calibration.capture_calibration_board(camera)
@@ -1,28 +1,103 @@
 import uuid
-from typing import Dict, List
+from threading import Lock
+from typing import AsyncIterator, Dict, List, Optional
 
 import zivid
 import zivid.calibration
 import zivid.experimental.calibration
-from fastapi import APIRouter, HTTPException
+from decouple import config
+from fastapi import APIRouter, Depends, HTTPException
 from loguru import logger
 from zivid.calibration import DetectionResult
-from zivid.experimental.calibration import InfieldCorrectionInput
+from zivid.experimental.calibration import CameraCorrection, InfieldCorrectionInput
 
 from zivid_nova import zivid_app
+from zivid_nova.admission import AdmissionClient, admitted, camera_admission
+from zivid_nova.background import CoalescingTask, executor
 from zivid_nova.models.infield_correction import AddCorrectionOffsetResp, CameraVerification
-from zivid_nova.zivid_app import zivid_lock
+from zivid_nova.routes.captures import board_detection_frame
+from zivid_nova.sharding import owns
+from zivid_nova.store import INFIELD_CORRECTION, StoredSession, store
+from zivid_nova.zivid_app import detect_calibration_board_in_file, zivid_lock
 
 router = APIRouter(prefix="/infield-correction", tags=["infield-correction"])
 
+# Time in seconds to wait for further datasets before a deferred accuracy estimation starts
+ESTIMATION_DELAY = config("ESTIMATION_DELAY", default=0.2, cast=float)
+
 correction_states: Dict[str, "Infield_Correction_State"] = {}
 
+# Persisted correction runs which are restored on first access
+stored_correction_states: Dict[str, StoredSession] = (
+    {session.id: session for session in store.sessions(INFIELD_CORRECTION) if owns(session.serial_number)}
+    if store is not None
+    else {}
+)
+_restore_lock = Lock()
+
+
+async def correction_admission(correction_id: str, client: AdmissionClient = Depends()) -> AsyncIterator[None]:
+    """Dependency limiting the requests using the camera of a correction run, see `camera_admission`"""
+    if correction_id in correction_states:
+        serial_number = correction_states[correction_id].serial_number
+    elif correction_id in stored_correction_states:
+        serial_number = stored_correction_states[correction_id].serial_number
+    else:
+        raise HTTPException(status_code=404, detail="Correction ID not found")
+    with admitted([serial_number], client):
+        yield
+
 
 class Infield_Correction_State:
     def __init__(self, serial_number: str, correction_id: str):
         self.serial_number = serial_number
         self.correction_id = correction_id
         self.dataset: List[InfieldCorrectionInput] = []
+        self.correction: Optional[CameraCorrection] = None
+        self.correction_version: Optional[int] = None
+        self._lock = Lock()
+        self._estimator = CoalescingTask(
+            f"infield-correction-{correction_id}", self.compute_correction, ESTIMATION_DELAY
+        )
+
+    def add(self, infield_input: InfieldCorrectionInput):
+        """Add an infield input to the dataset and update the accuracy estimate in the background"""
+        with self._lock:
+            self.dataset.append(infield_input)
+        self._estimator.request()
+
+    @property
+    def dataset_version(self) -> int:
+        """Version of the dataset, counting up with every added input. Inputs are never removed."""
+        return len(self.dataset)
+
+    def compute_correction(self) -> CameraCorrection:
+        """Get the correction for the current dataset. Reuses the last computed correction if it is up to date."""
+        with self._lock:
+            if self.correction is not None and self.correction_version == self.dataset_version:
+                return self.correction
+            version, dataset = self.dataset_version, list(self.dataset)
+
+        correction = zivid.experimental.calibration.compute_camera_correction(dataset)
+
+        with self._lock:
+            if self.correction_version is None or self.correction_version < version:
+                self.correction = correction
+                self.correction_version = version
+        return correction
+
+    def estimate(self) -> AddCorrectionOffsetResp:
+        """Latest accuracy estimate. Does not wait for a pending estimation."""
+        with self._lock:
+            accuracy_estimate = self.correction.accuracy_estimate() if self.correction is not None else None
+            return AddCorrectionOffsetResp(
+                dimension_accuracy=accuracy_estimate.dimension_accuracy() if accuracy_estimate else None,
+                dataset_size=len(self.dataset),
+                dataset_version=self.dataset_version,
+                estimate_version=self.correction_version,
+                z_min=accuracy_estimate.z_min() if accuracy_estimate else None,
+                z_max=accuracy_estimate.z_max() if accuracy_estimate else None,
+            )
 
 
 @router.get("")
@@ -36,16 +111,15 @@ def read(serial_number: str) -> str:
     raise HTTPException(status_code=404, detail="No infield correction found on camera.")
 
 
-@router.get("/verification")
+@router.get("/verification", dependencies=[Depends(camera_admission)])
 @zivid_lock
-def verify(serial_number: str) -> CameraVerification:
+def verify(serial_number: str, capture_id: Optional[str] = None) -> CameraVerification:
     """
     This function uses a single capture to determine the local dimension trueness error
     of the point cloud where the Zivid calibration board is placed.
+    Uses the cached capture if `capture_id` is given, otherwise a new capture is taken.
     """
-    camera = zivid_app.get_connected_camera(serial_number)
-
-    detection_result = zivid.calibration.detect_calibration_board(camera)
+    detection_result = zivid.calibration.detect_calibration_board(board_detection_frame(serial_number, capture_id))
     verify_detection_result(detection_result)
 
     infield_input = zivid.experimental.calibration.InfieldCorrectionInput(detection_result)
@@ -85,6 +159,9 @@ def list_correction(serial_number: str) -> List[str]:
     for correction in correction_states.items():
         if correction[1].serial_number == serial_number:
             correction_ids.append(correction[0])
+    for session in stored_correction_states.values():
+        if session.serial_number == serial_number:
+            correction_ids.append(session.id)
     return correction_ids
 
 
@@ -97,41 +174,50 @@ def start_correction(serial_number: str) -> str:
     zivid_app.get_connected_camera(serial_number)
     state = Infield_Correction_State(serial_number=serial_number, correction_id=str(uuid.uuid4()))
     correction_states[state.correction_id] = state
+    if store is not None:
+        store.create_session(INFIELD_CORRECTION, state.correction_id, serial_number)
     return state.correction_id
 
 
-@router.post("/correction/{correction_id}")
+@router.post("/correction/{correction_id}", dependencies=[Depends(correction_admission)])
 @zivid_lock
-def add_correction_dataset(correction_id: str) -> AddCorrectionOffsetResp:
+def add_correction_dataset(correction_id: str, capture_id: Optional[str] = None) -> AddCorrectionOffsetResp:
     """
     Add a new dataset to the correction run.
+    Uses the cached capture if `capture_id` is given, otherwise a new capture is taken.
+    Returns as soon as the calibration board is detected. The accuracy estimate is updated in the background,
+    the response contains the latest available estimate, see `estimate_version`.
     """
     state = get_correction_state(correction_id)
-    camera = zivid_app.get_connected_camera(state.serial_number)
 
-    detection_result = zivid.calibration.detect_calibration_board(camera)
+    frame = board_detection_frame(state.serial_number, capture_id)
+    detection_result = zivid.calibration.detect_calibration_board(frame)
     verify_detection_result(detection_result)
 
     infield_input = zivid.experimental.calibration.InfieldCorrectionInput(detection_result)
     verify_infield_input(infield_input)
 
-    state.dataset.append(infield_input)
-    logger.info(f"Collected {len(state.dataset)} datasets for infield correction.")
-
-    correction = zivid.experimental.calibration.compute_camera_correction(state.dataset)
-    accuracy_estimate = correction.accuracy_estimate()
+    state.add(infield_input)
 
-    result = AddCorrectionOffsetResp(
-        dimension_accuracy=accuracy_estimate.dimension_accuracy(),
-        dataset_size=len(state.dataset),
-        z_min=accuracy_estimate.z_min(),
-        z_max=accuracy_estimate.z_max(),
-    )
+    # The frame is kept so the infield input can be restored after a restart
+    if store is not None:
+        store.add_entry(state.correction_id, frame)
+    logger.info(f"Collected {len(state.dataset)} datasets for infield correction.")
 
+    result = state.estimate()
     logger.info(f"Current estimated result {result}")
     return result
 
 
+@router.get("/correction/{correction_id}")
+def get_correction_estimate(correction_id: str) -> AddCorrectionOffsetResp:
+    """
+    Get the latest accuracy estimate of the correction run.
+    Compare `estimate_version` with `dataset_version` to see whether the estimate covers all datasets.
+    """
+    return get_correction_state(correction_id).estimate()
+
+
 @router.put("/correction/{correction_id}")
 @zivid_lock
 def write_correction_dataset(correction_id: str):
@@ -140,7 +226,7 @@ def write_correction_dataset(correction_id: str):
     """
     state = get_correction_state(correction_id)
     camera = zivid_app.get_connected_camera(state.serial_number)
-    correction = zivid.experimental.calibration.compute_camera_correction(state.dataset)
+    correction = state.compute_correction()
     accuracy_estimate = correction.accuracy_estimate()
     logger.info(
         f"This correction can be expected to yield a dimension accuracy error of {accuracy_estimate.dimension_accuracy() * 100:.3f}% or better in the range of z=[{accuracy_estimate.z_min():.3f}, {accuracy_estimate.z_max():.3f}] across the full FOV. Accuracy close to where the correction data was collected is likely better.",
@@ -148,22 +234,46 @@ def write_correction_dataset(correction_id: str):
     logger.info("Writing correction to camera...")
     zivid.experimental.calibration.write_camera_correction(camera, correction)
     del correction_states[correction_id]
+    if store is not None:
+        store.delete_session(correction_id)
 
 
 @router.delete("/correction/{correction_id}")
 @zivid_lock
 def delete_correction_dataset(correction_id: str):
     """Deletes the correction dataset for this run."""
-    if correction_id in correction_states:
-        del correction_states[correction_id]
+    if correction_id in correction_states or correction_id in stored_correction_states:
+        correction_states.pop(correction_id, None)
+        stored_correction_states.pop(correction_id, None)
+        if store is not None:
+            store.delete_session(correction_id)
 
 
 def get_correction_state(correction_id: str) -> Infield_Correction_State:
+    with _restore_lock:
+        if correction_id in stored_correction_states:
+            # Kept until restored, so the camera of the run is known meanwhile, see `correction_admission`
+            correction_states[correction_id] = restore_correction_state(stored_correction_states[correction_id])
+            del stored_correction_states[correction_id]
     if correction_id in correction_states:
         return correction_states[correction_id]
     raise HTTPException(status_code=404, detail="Correction ID not found")
 
 
+def restore_correction_state(session: StoredSession) -> Infield_Correction_State:
+    """Restore a persisted correction run by detecting the calibration board in its stored frames"""
+    assert store is not None
+    entries = store.entries(session.id)
+    results = executor.map(detect_calibration_board_in_file, [str(entry.frame_path) for entry in entries])
+
+    state = Infield_Correction_State(serial_number=session.serial_number, correction_id=session.id)
+    for _, detection_result in results:
+        state.add(zivid.experimental.calibration.InfieldCorrectionInput(detection_result))
+
+    logger.info(f"Restored correction run {session.id} with {len(state.dataset)} datasets.")
+    return state
+
+
 def verify_infield_input(infield_input: InfieldCorrectionInput):
     """
     Verify if the infield input is valid for infield correction.
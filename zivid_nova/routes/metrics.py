@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from zivid_nova.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    """
+    Get service metrics in the Prometheus text format: resident memory, CPU time, the average zivid lock hold time
+    and the quality of the captures per camera and preset.
+    """
+
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
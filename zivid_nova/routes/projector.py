@@ -1,11 +1,16 @@
-from typing import Dict
+from io import BytesIO
+from typing import IO, Dict, Optional
 
-import zivid
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Response
 from loguru import logger
+from PIL import Image
 from zivid.projection import ProjectedImage, projector_resolution, show_image_bgra
 
 from zivid_nova import zivid_app
+from zivid_nova.admission import camera_admission
+from zivid_nova.models.projector_pattern import ProjectorPattern
+from zivid_nova.patterns import PATTERN_UPLOAD_LIMIT, patterns
+from zivid_nova.uploads import upload, upload_body
 from zivid_nova.zivid_app import zivid_lock
 
 router = APIRouter(prefix="/projectors", tags=["projectors"])
@@ -13,39 +18,69 @@ router = APIRouter(prefix="/projectors", tags=["projectors"])
 handles: Dict[str, ProjectedImage] = {}
 
 
+@router.get("/patterns")
+def get_patterns() -> list[ProjectorPattern]:
+    """Get all custom projector patterns"""
+
+    return [
+        ProjectorPattern(id=pattern_id, width=width, height=height)
+        for pattern_id, (height, width) in patterns.list().items()
+    ]
+
+
+@router.post("/patterns", openapi_extra=upload_body("application/octet-stream", "Image file, e.g. png or jpeg"))
+def upload_pattern(image: IO[bytes] = Depends(upload(PATTERN_UPLOAD_LIMIT))) -> ProjectorPattern:
+    """
+    Upload a custom projector pattern. The pattern is scaled to the projector resolution of each camera
+    once, keeping its aspect ratio. The ID is derived from the image content.
+    The number of patterns, their size in pixels and the uploaded file size are limited, see `MAX_PATTERNS`,
+    `MAX_PATTERN_PIXELS` and `PATTERN_UPLOAD_LIMIT`.
+    """
+
+    try:
+        pattern_id = patterns.add(image.read())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    height, width = patterns.list()[pattern_id]
+    return ProjectorPattern(id=pattern_id, width=width, height=height)
+
+
+@router.delete("/patterns/{pattern_id}")
+def delete_pattern(pattern_id: str):
+    """Delete a custom projector pattern"""
+
+    patterns.remove(pattern_id)
+
+
 @router.post("/{serial_number}")
 @zivid_lock
-def project_test_image(serial_number: str):
+def project_test_image(serial_number: str, pattern_id: Optional[str] = None):
     """
     Starts projection of a test image for calibration board adjustment.
     Stops the previous projection.
     Selects the appropriate image based on the projector resolution.
+    Projects the custom pattern instead if `pattern_id` is given, see `/projectors/patterns`.
     """
-    if serial_number in handles:
-        logger.info(f"Stopping existing projector handle for {serial_number}...")
-        handles[serial_number].stop()
-
-    camera = zivid_app.get_connected_camera(serial_number)
-    proj_resolution = projector_resolution(camera)
-    target_height, target_width = proj_resolution
-    logger.info(f"Detected projector resolution: {target_width}x{target_height}")
-
-    # Decide which image to load based on resolution
-    if (target_width, target_height) == (1280, 720):
-        image_path = "static/image2.png"
-    elif (target_width, target_height) == (1000, 720):
-        image_path = "static/image2+.png"
-    else:
-        logger.error(f"Unsupported projector resolution: {target_width}x{target_height}")
-        raise ValueError(f"Unsupported projector resolution: {target_width}x{target_height}")
+    start_projection(serial_number, pattern_id)
 
-    logger.info(f"Loading image: {image_path}")
 
-    # Load image
-    image = zivid.Image.load(image_path, "rgba")
+@router.post(
+    "/{serial_number}/capture",
+    dependencies=[Depends(camera_admission)],
+    responses={200: {"content": {"image/png": {}}}},
+)
+@zivid_lock
+def capture_projected_image(serial_number: str, pattern_id: Optional[str] = None) -> Response:
+    """
+    Project the test image or a custom pattern and capture a 2D color image while it is projected,
+    e.g. to check the alignment in one request. The projection stays active afterwards.
+    """
+    handle = start_projection(serial_number, pattern_id)
 
-    # Start projection
-    handles[serial_number] = show_image_bgra(camera, image.copy_data())
+    with handle.capture(zivid_app.get_projection_settings2d()) as frame:
+        buffer = BytesIO()
+        Image.fromarray(frame.image_rgba().copy_data()).save(buffer, "png")
+    return Response(content=buffer.getvalue(), media_type="image/png")
 
 
 @router.delete("/{serial_number}")
@@ -58,3 +93,27 @@ def delete_projection(serial_number: str):
         return
     logger.info(f"Stopping projector handle for {serial_number}...")
     handles[serial_number].stop()
+
+
+def start_projection(serial_number: str, pattern_id: Optional[str] = None) -> ProjectedImage:
+    """Stop the previous projection and project the test image or a custom pattern"""
+
+    if serial_number in handles:
+        logger.info(f"Stopping existing projector handle for {serial_number}...")
+        handles[serial_number].stop()
+
+    camera = zivid_app.get_connected_camera(serial_number)
+    resolution = projector_resolution(camera)
+    logger.info(f"Detected projector resolution: {resolution[1]}x{resolution[0]}")
+
+    if pattern_id is None:
+        image = patterns.test_image(resolution)
+    else:
+        try:
+            image = patterns.get(pattern_id, resolution)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail="Pattern ID not found") from e
+
+    # Start projection
+    handles[serial_number] = show_image_bgra(camera, image)
+    return handles[serial_number]
@@ -0,0 +1,95 @@
+import json
+import zipfile
+from datetime import datetime
+from io import BytesIO
+from typing import BinaryIO, Optional
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from zivid_nova.models.recording import RecordingInfo
+from zivid_nova.point_cloud import OrganizedPointCloud
+from zivid_nova.recorder import Recorder, recorder
+from zivid_nova.spool import file_response, spool_path
+
+router = APIRouter(prefix="/recordings", tags=["recordings"])
+
+
+@router.get("")
+def get_recordings(
+    serial_number: Optional[str] = None, start: Optional[datetime] = None, end: Optional[datetime] = None
+) -> list[RecordingInfo]:
+    """
+    Get the recorded frames, oldest first. Optionally of one camera and in a time window.
+    Timestamps without time zone are interpreted as UTC.
+    """
+
+    return [
+        RecordingInfo.from_recording(recording) for recording in get_recorder().recordings(serial_number, start, end)
+    ]
+
+
+@router.get("/export", responses={200: {"content": {"application/zip": {}}}})
+def export_recordings(
+    request: Request, start: datetime, end: datetime, serial_number: Optional[str] = None
+) -> Response:
+    """
+    Export the recorded frames of a time window as zip bundle. Every frame is stored as
+    `{serial_number}/{sequence}.npz`, see `/recordings/{serial_number}/{sequence}`.
+    `index.json` lists the metadata of the exported frames, see `RecordingInfo`.
+    Frames which are overwritten while exporting are skipped.
+    """
+
+    active_recorder = get_recorder()
+    exported: list[RecordingInfo] = []
+
+    path = spool_path(".zip")
+    with zipfile.ZipFile(path, "w") as archive:
+        for recording in active_recorder.recordings(serial_number, start, end):
+            try:
+                recording, point_cloud = active_recorder.read(recording.serial_number, recording.sequence)
+            except KeyError:
+                continue
+            buffer = BytesIO()
+            write_npz(buffer, point_cloud)
+            archive.writestr(f"{recording.serial_number}/{recording.sequence}.npz", buffer.getvalue())
+            exported.append(RecordingInfo.from_recording(recording))
+        archive.writestr("index.json", json.dumps([info.model_dump(mode="json") for info in exported], indent=2))
+
+    return file_response(request, path, "recordings.zip", media_type="application/zip")
+
+
+@router.get("/{serial_number}/{sequence}", responses={200: {"content": {"application/octet-stream": {}}}})
+def get_recording(request: Request, serial_number: str, sequence: int) -> Response:
+    """
+    Get a recorded frame in numpy npz format with the organized arrays `xyz` (float32 positions in mm),
+    `rgba` (uint8 colors) and `normals` (float32). Invalid points are NaN.
+    """
+
+    try:
+        recording, point_cloud = get_recorder().read(serial_number, sequence)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail="Frame is not recorded or was overwritten") from e
+
+    path = spool_path(".npz")
+    with open(path, "wb") as file:
+        write_npz(file, point_cloud)
+    return file_response(
+        request,
+        path,
+        f"{serial_number}-{sequence}.npz",
+        headers={"Capture-Id": recording.capture_id},
+        etag=recording.capture_id,
+    )
+
+
+def get_recorder() -> Recorder:
+    """The recorder, raises a 404 if recording is disabled"""
+    if recorder is None:
+        raise HTTPException(status_code=404, detail="Recording is disabled, set RECORDER_PATH to enable it")
+    return recorder
+
+
+def write_npz(file: BinaryIO, point_cloud: OrganizedPointCloud) -> None:
+    """Write an organized point cloud as uncompressed npz"""
+    np.savez(file, xyz=point_cloud.xyz, rgba=point_cloud.rgba, normals=point_cloud.normals)
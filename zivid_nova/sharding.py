@@ -0,0 +1,52 @@
+import zlib
+
+from decouple import config
+
+# Number of worker processes started by `serve`. With more than one worker every worker owns a disjoint set of
+# cameras and a front router forwards requests to the owning worker, see `zivid_nova.supervisor`.
+WORKERS = config("WORKERS", default=1, cast=int)
+
+# Index and number of workers of this process, set by the supervisor. A single process owns all cameras.
+WORKER_INDEX = config("WORKER_INDEX", default=0, cast=int)
+WORKER_COUNT = config("WORKER_COUNT", default=1, cast=int)
+
+
+# Cameras pinned to workers as `worker=serial,serial;worker=serial`, e.g. `0=2024ABCD,2024ABCE;1=2024ABCF`.
+# Cameras which are captured together with `/captures/multi` must be pinned to the same worker.
+# Other cameras are assigned by the hash of their serial number.
+WORKER_CAMERAS = config("WORKER_CAMERAS", default="", cast=str)
+
+
+def parse_worker_cameras(value: str) -> dict[str, int]:
+    """Parse the pinned cameras of `WORKER_CAMERAS` into the worker index per serial number"""
+    pinned: dict[str, int] = {}
+    for group in filter(None, (group.strip() for group in value.split(";"))):
+        worker, separator, serial_numbers = group.partition("=")
+        if not separator or not worker.strip().isdigit():
+            raise ValueError(f"Invalid worker cameras {group}, expected worker=serial,serial")
+        for serial_number in filter(None, (serial_number.strip() for serial_number in serial_numbers.split(","))):
+            if serial_number in pinned:
+                raise ValueError(f"Camera {serial_number} is pinned to more than one worker")
+            pinned[serial_number] = int(worker)
+    return pinned
+
+
+PINNED_CAMERAS = parse_worker_cameras(WORKER_CAMERAS)
+
+
+def worker_for(serial_number: str, workers: int) -> int:
+    """
+    Index of the worker which owns a camera, see `WORKER_CAMERAS`.
+    Stable across restarts, so every camera stays with its worker.
+    """
+    pinned = PINNED_CAMERAS.get(serial_number)
+    if pinned is not None and workers > 1:
+        if pinned >= workers:
+            raise ValueError(f"Camera {serial_number} is pinned to worker {pinned}, but there are {workers} workers")
+        return pinned
+    return zlib.crc32(serial_number.encode()) % workers
+
+
+def owns(serial_number: str) -> bool:
+    """Whether this process owns a camera"""
+    return worker_for(serial_number, WORKER_COUNT) == WORKER_INDEX
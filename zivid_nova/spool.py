@@ -0,0 +1,148 @@
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from decouple import config
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+# Directory for files which are sent in responses, e.g. a tmpfs like /dev/shm to avoid disk writes.
+# Make sure it is large enough for a few zdf files.
+SPOOL_PATH = config("SPOOL_PATH", default=tempfile.gettempdir(), cast=str)
+
+CHUNK_SIZE = 1024 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Every process gets its own directory, so files are never shared and can be removed on shutdown
+_directory: Optional[Path] = None
+
+
+def spool_path(suffix: str) -> Path:
+    """Unique path for a new spool file"""
+    global _directory  # pylint: disable=global-statement
+    if _directory is None:
+        Path(SPOOL_PATH).mkdir(parents=True, exist_ok=True)
+        _directory = Path(tempfile.mkdtemp(prefix="zivid-nova-", dir=SPOOL_PATH))
+    return _directory / f"{uuid.uuid4()}{suffix}"
+
+
+def cleanup() -> None:
+    """Remove all spool files of this process"""
+    global _directory  # pylint: disable=global-statement
+    if _directory is not None:
+        shutil.rmtree(_directory, ignore_errors=True)
+        _directory = None
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single byte range of a `Range` header into an inclusive (start, end) tuple.
+    Returns None if the header is not a single byte range, the full content is sent in that case.
+    Raises a ValueError if the range is not satisfiable.
+    """
+    match = _RANGE.match(header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+
+    if match.group(1) == "":
+        # suffix range, the last n bytes
+        length = int(match.group(2))
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+
+    start = int(match.group(1))
+    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    if start > end:
+        raise ValueError(f"Range {header} is not satisfiable for {size} bytes")
+    return start, end
+
+
+def _read(file: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+class _SpoolFileResponse(FileResponse):
+    """File response which removes its spool file once it is sent or the client disconnected"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            Path(self.path).unlink(missing_ok=True)
+
+
+def file_response(
+    request: Request,
+    path: Path,
+    filename: str,
+    *,
+    media_type: str = "application/octet-stream",
+    headers: Optional[dict[str, str]] = None,
+    etag: Optional[str] = None,
+    delete: bool = True,
+) -> Response:
+    """
+    Send a spool file. Full responses are sent as file response, so the server can send the file zero-copy.
+
+    With `delete` the file is only used for this response and removed once it is sent or the client disconnected.
+    Otherwise the file is kept, e.g. the zdf of a cached capture, and a single byte range in the `Range` header is
+    supported, so large downloads can be resumed. The response does not depend on the kept file, so it can be
+    removed at any time.
+    """
+    headers = {**(headers or {}), "Content-Disposition": f'attachment; filename="{filename}"'}
+    if etag is not None:
+        headers["ETag"] = f'"{etag}"'
+
+    if delete:
+        return _full_response(path, media_type, headers)
+
+    # ranges are only advertised for files which can be requested again
+    headers["Accept-Ranges"] = "bytes"
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header is not None and (if_range is None or (etag is not None and if_range == headers.get("ETag"))):
+        size = path.stat().st_size
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        # the response sends a link to the file, which stays valid if the kept file is removed
+        link = spool_path(path.suffix)
+        os.link(path, link)
+        return _full_response(link, media_type, headers)
+
+    file = open(path, "rb")  # pylint: disable=consider-using-with
+    start, end = byte_range
+    size = os.fstat(file.fileno()).st_size
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _read(file, start, end - start + 1), status_code=206, media_type=media_type, headers=headers
+    )
+
+
+def _full_response(path: Path, media_type: str, headers: dict[str, str]) -> Response:
+    response = _SpoolFileResponse(path, media_type=media_type, headers=headers, stat_result=path.stat())
+    if "Accept-Ranges" not in headers:
+        # newer versions of Starlette advertise ranges for every file
+        del response.headers["accept-ranges"]
+    return response
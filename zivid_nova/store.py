@@ -0,0 +1,220 @@
+import shutil
+import sqlite3
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from typing import Callable, Optional
+
+import zivid
+from decouple import config
+from loguru import logger
+
+from zivid_nova.models.pose import Pose
+
+# Directory for persisted sessions, e.g. on a mounted volume. Persistence is disabled if empty.
+STORE_PATH = config("STORE_PATH", default="", cast=str)
+
+CALIBRATION = "calibration"
+INFIELD_CORRECTION = "infield_correction"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    serial_number TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions (id),
+    pose TEXT,
+    frame TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_session_id ON entries (session_id);
+CREATE TABLE IF NOT EXISTS extrinsics (
+    serial_number TEXT PRIMARY KEY,
+    pose TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class StoredSession:
+    """A persisted calibration or infield correction session"""
+
+    id: str
+    kind: str
+    serial_number: str
+
+
+@dataclass
+class StoredEntry:
+    """A persisted dataset entry of a session"""
+
+    pose: Optional[Pose]
+    frame_path: Path
+
+
+def _insert_entry(connection: sqlite3.Connection, session_id: str, pose: Optional[Pose], frame_path: Path) -> None:
+    connection.execute(
+        "INSERT INTO entries (session_id, pose, frame) VALUES (?, ?, ?)",
+        (session_id, pose.model_dump_json() if pose is not None else None, frame_path.name),
+    )
+
+
+class SessionStore:
+    """
+    Persists calibration and infield correction sessions in a SQLite database.
+
+    Frames used for calibration board detection are saved as ZDF files next to the database, so detection
+    results can be restored from them. All writes happen on a single background thread in the order they
+    were submitted, so persisting an entry only costs a queue insertion on the request path.
+    """
+
+    def __init__(self, path: Path):
+        self._frames = path / "frames"
+        self._frames.mkdir(parents=True, exist_ok=True)
+        self._database = path / "sessions.db"
+
+        with closing(self._connect()) as connection:
+            connection.executescript(_SCHEMA)
+
+        self._queue: Queue[Optional[Callable[[sqlite3.Connection], None]]] = Queue()
+        self._writer = Thread(target=self._write_loop, name="session-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._database)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _write_loop(self) -> None:
+        with closing(self._connect()) as connection:
+            while True:
+                operation = self._queue.get()
+                try:
+                    if operation is None:
+                        return
+                    operation(connection)
+                    connection.commit()
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Failed to persist session data")
+                    connection.rollback()
+                finally:
+                    # drop the reference to the operation, it may hold a frame
+                    operation = None
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until all submitted writes are persisted"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Persist all submitted writes and stop the writer thread"""
+        self._queue.put(None)
+        self._writer.join()
+
+    def create_session(self, kind: str, session_id: str, serial_number: str) -> None:
+        """Persist a new session"""
+
+        def insert(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "INSERT INTO sessions (id, kind, serial_number) VALUES (?, ?, ?)", (session_id, kind, serial_number)
+            )
+
+        self._queue.put(insert)
+
+    def add_entry(self, session_id: str, frame: zivid.Frame, pose: Optional[Pose] = None) -> None:
+        """
+        Persist a dataset entry of a session. Keeps a reference to the frame until it is saved.
+        """
+        frame_path = self._frames / f"{uuid.uuid4()}.zdf"
+
+        def write(connection: sqlite3.Connection) -> None:
+            frame.save(str(frame_path))
+            _insert_entry(connection, session_id, pose, frame_path)
+
+        self._queue.put(write)
+
+    def add_entry_file(self, session_id: str, path: Path, pose: Optional[Pose] = None) -> None:
+        """
+        Persist a dataset entry of a session from a ZDF file. The file is moved into the store right away,
+        so it may be a temporary file.
+        """
+        frame_path = self._frames / f"{uuid.uuid4()}.zdf"
+        shutil.move(path, frame_path)
+        self._queue.put(lambda connection: _insert_entry(connection, session_id, pose, frame_path))
+
+    def remove_entry(self, session_id: str, index: int) -> None:
+        """Remove the dataset entry at the given index of a session"""
+
+        def write(connection: sqlite3.Connection) -> None:
+            row = connection.execute(
+                "SELECT id, frame FROM entries WHERE session_id = ? ORDER BY id LIMIT 1 OFFSET ?", (session_id, index)
+            ).fetchone()
+            if row is None:
+                return
+            connection.execute("DELETE FROM entries WHERE id = ?", (row[0],))
+            (self._frames / row[1]).unlink(missing_ok=True)
+
+        self._queue.put(write)
+
+    def delete_session(self, session_id: str) -> None:
+        """Delete a session including all its entries"""
+
+        def write(connection: sqlite3.Connection) -> None:
+            for (frame,) in connection.execute("SELECT frame FROM entries WHERE session_id = ?", (session_id,)):
+                (self._frames / frame).unlink(missing_ok=True)
+            connection.execute("DELETE FROM entries WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+        self._queue.put(write)
+
+    def set_extrinsics(self, serial_number: str, pose: Optional[Pose]) -> None:
+        """Persist the extrinsics of a camera. Removes them if the pose is None."""
+
+        def write(connection: sqlite3.Connection) -> None:
+            if pose is None:
+                connection.execute("DELETE FROM extrinsics WHERE serial_number = ?", (serial_number,))
+            else:
+                connection.execute(
+                    "INSERT OR REPLACE INTO extrinsics (serial_number, pose) VALUES (?, ?)",
+                    (serial_number, pose.model_dump_json()),
+                )
+
+        self._queue.put(write)
+
+    def extrinsics(self) -> dict[str, Pose]:
+        """Get the persisted extrinsics of all cameras"""
+        self.flush()
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT serial_number, pose FROM extrinsics").fetchall()
+        return {serial_number: Pose.model_validate_json(pose) for serial_number, pose in rows}
+
+    def sessions(self, kind: str) -> list[StoredSession]:
+        """Get all persisted sessions of a kind"""
+        self.flush()
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT id, kind, serial_number FROM sessions WHERE kind = ?", (kind,))
+            return [StoredSession(*row) for row in rows]
+
+    def entries(self, session_id: str) -> list[StoredEntry]:
+        """Get all persisted dataset entries of a session in the order they were added"""
+        self.flush()
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT pose, frame FROM entries WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        return [
+            StoredEntry(
+                pose=Pose.model_validate_json(pose) if pose is not None else None,
+                frame_path=self._frames / frame,
+            )
+            for pose, frame in rows
+        ]
+
+
+store: Optional[SessionStore] = SessionStore(Path(STORE_PATH)) if STORE_PATH else None
@@ -0,0 +1,461 @@
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum, unique
+from threading import Event, Thread
+from typing import Callable, Optional
+
+import httpx
+import uvicorn
+from decouple import config
+from loguru import logger
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from zivid_nova.sharding import PINNED_CAMERAS, worker_for
+
+# Same setting as for the app, routes are matched without it
+BASE_PATH = config("BASE_PATH", default="", cast=str)
+
+# Seconds to wait before a worker which exited is started again
+WORKER_RESTART_DELAY = config("WORKER_RESTART_DELAY", default=2.0, cast=float)
+
+# Headers which only apply to a single connection and are not forwarded
+_HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+
+# Number of resource IDs for which the owning worker is remembered
+_KNOWN_RESOURCES = 4096
+
+
+@unique
+class Target(Enum):
+    """How the front router forwards a request"""
+
+    WORKER = "worker"
+    """to a single worker, usually the owner of the camera"""
+    ANY = "any"
+    """to any worker, e.g. for processing which does not need a camera"""
+    MERGE = "merge"
+    """to all workers, their JSON lists are concatenated"""
+    BROADCAST = "broadcast"
+    """to all workers one after another, e.g. to keep replicated state in sync"""
+    FIND = "find"
+    """to the worker which knows the resource, workers are asked until one does not respond with 404"""
+    UPLOAD = "upload"
+    """frame upload, moved to the owner of the camera it was captured with"""
+    MULTI = "multi"
+    """multi camera capture, all cameras must be owned by the same worker"""
+    METRICS = "metrics"
+    """to all workers, their Prometheus metrics are merged"""
+
+
+@dataclass(frozen=True)
+class Route:
+    """Result of `resolve`"""
+
+    target: Target
+    worker: int = 0
+    """Worker index for `Target.WORKER`"""
+    resource: Optional[str] = None
+    """Resource ID for `Target.FIND`"""
+
+
+_DEFAULT_ROUTE = Route(Target.WORKER, 0)
+
+
+@dataclass(frozen=True)
+class _RouteRequest:
+    """Request to resolve below the first path segment"""
+
+    method: str
+    rest: list[str]
+    """Path segments after the first one"""
+    query: dict[str, str]
+    workers: int
+
+    def owner(self, serial_number: Optional[str]) -> Route:
+        if serial_number is None:
+            # invalid request, any worker can reject it
+            return Route(Target.ANY)
+        return Route(Target.WORKER, worker_for(serial_number, self.workers))
+
+
+def _resolve_cameras(request: _RouteRequest) -> Route:
+    if not request.rest:
+        return Route(Target.MERGE) if request.method == "GET" else Route(Target.ANY)
+    return request.owner(request.rest[0])
+
+
+def _resolve_projectors(request: _RouteRequest) -> Route:
+    if not request.rest:
+        return _DEFAULT_ROUTE
+    if request.rest[0] == "patterns":
+        # patterns are replicated, so every worker can project them
+        return Route(Target.ANY) if request.method == "GET" else Route(Target.BROADCAST)
+    return request.owner(request.rest[0])
+
+
+def _resolve_calibrations(request: _RouteRequest) -> Route:
+    if not request.rest:
+        if request.method == "GET":
+            return Route(Target.MERGE)
+        if request.method == "DELETE":
+            return Route(Target.BROADCAST)
+        return request.owner(request.query.get("serial_number"))
+    if request.rest == ["datasets"]:
+        return Route(Target.ANY)
+    return Route(Target.FIND, resource=request.rest[0])
+
+
+def _resolve_infield_correction(request: _RouteRequest) -> Route:
+    if len(request.rest) >= 2 and request.rest[0] == "correction":
+        return Route(Target.FIND, resource=request.rest[1])
+    return request.owner(request.query.get("serial_number"))
+
+
+def _resolve_captures(request: _RouteRequest) -> Route:
+    if not request.rest:
+        return Route(Target.MERGE) if request.method == "GET" else Route(Target.UPLOAD)
+    if request.rest == ["multi"]:
+        return Route(Target.MULTI)
+    return Route(Target.FIND, resource=request.rest[0])
+
+
+def _resolve_metrics(request: _RouteRequest) -> Route:
+    return Route(Target.METRICS) if not request.rest else _DEFAULT_ROUTE
+
+
+# Resolvers by the first path segment, other requests go to the first worker
+_RESOLVERS: dict[str, Callable[[_RouteRequest], Route]] = {
+    "cameras": _resolve_cameras,
+    "projectors": _resolve_projectors,
+    "calibrations": _resolve_calibrations,
+    "infield-correction": _resolve_infield_correction,
+    "captures": _resolve_captures,
+    "metrics": _resolve_metrics,
+}
+
+
+def resolve(method: str, path: str, query: dict[str, str], workers: int) -> Route:
+    """
+    Decide where the front router forwards a request.
+    Camera routes go to the worker owning the camera. Sessions and captures are identified by random IDs,
+    they are looked up on all workers. Recordings are shared through the recorder directory.
+    """
+    if BASE_PATH and path.startswith(BASE_PATH):
+        path = path[len(BASE_PATH) :]
+    segments = [segment for segment in path.split("/") if segment]
+    resolver = _RESOLVERS.get(segments[0]) if segments else None
+    if resolver is None:
+        return _DEFAULT_ROUTE
+    return resolver(_RouteRequest(method, segments[1:], query, workers))
+
+
+def merge_metrics(texts: list[str]) -> str:
+    """
+    Merge Prometheus text metrics of the workers. The samples of every metric family are grouped below a single
+    `HELP` and `TYPE` line, the workers distinguish their samples by a `worker` label.
+    """
+    families: dict[str, list[str]] = {}
+    for text in texts:
+        family: list[str] = []
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                name = line.split(" ", 3)[2]
+                if name not in families:
+                    families[name] = []
+                family = families[name]
+                if line not in family:
+                    family.append(line)
+            elif line:
+                family.append(line)
+    return "".join(f"{line}\n" for family in families.values() for line in family)
+
+
+def _error(status_code: int, detail: str, headers: Optional[dict[str, str]] = None) -> Response:
+    return JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+class FrontRouter:
+    """
+    ASGI app which forwards requests to the worker processes, see `resolve`.
+
+    The router does not import the zivid SDK, so it can run next to the workers without its own GPU context.
+    Request and response bodies of single worker routes are streamed, so large point clouds are not buffered.
+    Responses are forwarded as they are, including their content encoding.
+    """
+
+    def __init__(self, workers: list[str], client: Optional[httpx.AsyncClient] = None):
+        self._workers = workers
+        self._client = client or httpx.AsyncClient(timeout=httpx.Timeout(None, connect=5.0))
+        self._known: OrderedDict[str, int] = OrderedDict()
+        self._next = itertools.count()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        request = Request(scope, receive)
+        query = dict(request.query_params)
+        route = resolve(request.method, scope["path"], query, len(self._workers))
+        try:
+            response = await self._forward(request, route)
+        except httpx.TransportError as e:
+            logger.warning(f"Forwarding {request.method} {scope['path']} failed: {e!r}")
+            response = _error(503, "Worker is not available", {"Retry-After": "1"})
+        await response(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self._client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _forward(self, request: Request, route: Route) -> Response:
+        if route.target is Target.WORKER:
+            return await self._stream(request, route.worker)
+        if route.target is Target.ANY:
+            return await self._stream(request, next(self._next) % len(self._workers))
+
+        body = await request.body()
+        if route.target is Target.FIND:
+            assert route.resource is not None
+            return await self._find(request, body, route.resource)
+        buffered = {
+            Target.MERGE: self._merge,
+            Target.BROADCAST: self._broadcast,
+            Target.UPLOAD: self._upload,
+            Target.METRICS: self._metrics,
+            Target.MULTI: self._multi,
+        }
+        return await buffered[route.target](request, body)
+
+    def _build(
+        self,
+        request: Request,
+        worker: int,
+        content,
+        *,
+        method: Optional[str] = None,
+        path: Optional[str] = None,
+        identity: bool = False,
+    ) -> httpx.Request:
+        # streamed bodies keep their length, otherwise httpx sets it. Forwarded headers of the client are dropped,
+        # otherwise a client could choose the address it is identified by.
+        excluded = {*_HOP_BY_HOP_HEADERS, "host", "x-forwarded-for", "forwarded"}
+        if isinstance(content, bytes):
+            excluded.add("content-length")
+        if identity:
+            # buffered responses are parsed by the router
+            excluded.add("accept-encoding")
+        headers = [(key, value) for key, value in request.headers.items() if key not in excluded]
+        if identity:
+            headers.append(("accept-encoding", "identity"))
+        if request.client is not None:
+            # workers identify clients by their address, e.g. for the admission control. The address is the peer of
+            # the router, or the client reported by a proxy in `FORWARDED_ALLOW_IPS` (uvicorn's trusted proxies).
+            headers.append(("x-forwarded-for", request.client.host))
+
+        url = httpx.URL(f"{self._workers[worker]}{path or request.url.path}", query=request.url.query.encode())
+        return self._client.build_request(method or request.method, url, headers=headers, content=content)
+
+    async def _send(self, request: Request, worker: int, body: bytes) -> httpx.Response:
+        return await self._client.send(self._build(request, worker, body), stream=True)
+
+    async def _read(self, request: Request, worker: int, body: bytes) -> httpx.Response:
+        return await self._client.send(self._build(request, worker, body, identity=True))
+
+    async def _stream(self, request: Request, worker: int) -> Response:
+        has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+        content = request.stream() if has_body else b""
+        return _response(await self._client.send(self._build(request, worker, content), stream=True))
+
+    async def _merge(self, request: Request, body: bytes) -> Response:
+        responses = await asyncio.gather(*[self._read(request, worker, body) for worker in range(len(self._workers))])
+        for response in responses:
+            if response.status_code != 200:
+                return _buffered(response)
+        return JSONResponse([item for response in responses for item in response.json()])
+
+    async def _metrics(self, request: Request, body: bytes) -> Response:
+        responses = await asyncio.gather(*[self._read(request, worker, body) for worker in range(len(self._workers))])
+        for response in responses:
+            if response.status_code != 200:
+                return _buffered(response)
+        return Response(
+            merge_metrics([response.text for response in responses]),
+            media_type=responses[0].headers.get("content-type"),
+        )
+
+    async def _broadcast(self, request: Request, body: bytes) -> Response:
+        responses = [await self._read(request, worker, body) for worker in range(len(self._workers))]
+        failed = [response for response in responses if response.status_code >= 400]
+        return _buffered(failed[0] if failed else responses[0])
+
+    async def _find(self, request: Request, body: bytes, resource: str) -> Response:
+        known = self._known.get(resource)
+        order = [known] if known is not None else []
+        order += [worker for worker in range(len(self._workers)) if worker != known]
+
+        for index, worker in enumerate(order):
+            upstream = await self._send(request, worker, body)
+            if upstream.status_code == 404 and index < len(order) - 1:
+                await upstream.aclose()
+                continue
+            if upstream.status_code != 404:
+                self._remember(resource, worker)
+            return _response(upstream)
+        raise AssertionError("unreachable")
+
+    def _remember(self, resource: str, worker: int) -> None:
+        self._known[resource] = worker
+        self._known.move_to_end(resource)
+        while len(self._known) > _KNOWN_RESOURCES:
+            self._known.popitem(last=False)
+
+    async def _upload(self, request: Request, body: bytes) -> Response:
+        # the camera of an uploaded frame is only known after the zdf was loaded by a worker
+        response = await self._read(request, 0, body)
+        if response.status_code != 200:
+            return _buffered(response)
+        info = response.json()
+        worker = worker_for(info["serial_number"], len(self._workers))
+        if worker != 0:
+            moved = await self._read(request, worker, body)
+            if moved.status_code == 200:
+                path = f"{request.url.path}/{info['id']}"
+                await self._client.send(self._build(request, 0, b"", method="DELETE", path=path))
+            response = moved
+        if response.status_code == 200:
+            self._remember(response.json()["id"], worker)
+        return _buffered(response)
+
+    async def _multi(self, request: Request, body: bytes) -> Response:
+        try:
+            serial_numbers = json.loads(body)["serial_numbers"]
+            workers = {worker_for(serial_number, len(self._workers)) for serial_number in serial_numbers}
+        except (ValueError, KeyError, TypeError):
+            # invalid request, any worker can reject it
+            workers = {0}
+        if len(workers) > 1:
+            return _error(
+                400, "Multi camera captures require cameras owned by the same worker process, see WORKER_CAMERAS"
+            )
+        return _response(await self._send(request, workers.pop() if workers else 0, body))
+
+
+def _headers(upstream: httpx.Response) -> dict[str, str]:
+    return {key: value for key, value in upstream.headers.items() if key not in _HOP_BY_HOP_HEADERS}
+
+
+def _response(upstream: httpx.Response) -> Response:
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        headers=_headers(upstream),
+        background=BackgroundTask(upstream.aclose),
+    )
+
+
+def _buffered(upstream: httpx.Response) -> Response:
+    return Response(upstream.content, status_code=upstream.status_code, headers=_headers(upstream))
+
+
+class Supervisor:
+    """
+    Starts the worker processes and restarts them if they exit.
+    Every worker runs the full app on a local port and owns the cameras assigned by `worker_for`.
+    """
+
+    def __init__(self, workers: int, port: int):
+        self.ports = [port + 1 + index for index in range(workers)]
+        self._processes: list[Optional[subprocess.Popen]] = [None] * workers
+        self._started = [0.0] * workers
+        self._stopping = Event()
+        self._monitor = Thread(target=self._monitor_loop, name="supervisor", daemon=True)
+
+    def _start(self, index: int) -> None:
+        environment = {
+            **os.environ,
+            "WORKERS": "1",
+            "WORKER_INDEX": str(index),
+            "WORKER_COUNT": str(len(self.ports)),
+            "HOST": "127.0.0.1",
+            "PORT": str(self.ports[index]),
+        }
+        logger.info(f"Starting worker {index} on port {self.ports[index]}...")
+        self._processes[index] = subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, "-m", "zivid_nova"], env=environment
+        )
+        self._started[index] = time.monotonic()
+
+    def _monitor_loop(self) -> None:
+        while not self._stopping.wait(0.5):
+            for index, process in enumerate(self._processes):
+                if process is None or process.poll() is None:
+                    continue
+                if time.monotonic() - self._started[index] < WORKER_RESTART_DELAY:
+                    continue
+                logger.error(f"Worker {index} exited with code {process.returncode}, restarting it")
+                self._start(index)
+
+    def start(self) -> None:
+        """Start all workers"""
+        for index in range(len(self.ports)):
+            self._start(index)
+        self._monitor.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop all workers, they shut down gracefully unless they do not exit within the timeout"""
+        self._stopping.set()
+        self._monitor.join()
+        for process in self._processes:
+            if process is not None:
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            try:
+                process.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def supervise(host: str, port: int, workers: int, log_level: str) -> None:
+    """Run the front router on the given port and the workers on the following ports"""
+    for serial_number, worker in PINNED_CAMERAS.items():
+        if worker >= workers:
+            raise ValueError(f"WORKER_CAMERAS pins {serial_number} to worker {worker}, but there are {workers} workers")
+    supervisor = Supervisor(workers, port)
+    router = FrontRouter([f"http://127.0.0.1:{worker_port}" for worker_port in supervisor.ports])
+    supervisor.start()
+    try:
+        # only the forwarded headers of trusted proxies are used, by default of a proxy on the same host
+        uvicorn.run(router, host=host, port=port, log_level=log_level, proxy_headers=True)
+    finally:
+        supervisor.stop()
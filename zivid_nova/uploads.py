@@ -0,0 +1,46 @@
+import tempfile
+from typing import IO, Any, AsyncIterator, Callable, Optional
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+# Uploads up to this size in bytes are kept in memory, larger ones are spooled to a temporary file
+SPOOL_MEMORY_SIZE = 2**20
+
+
+def upload(limit: int) -> Callable[[Request], AsyncIterator[IO[bytes]]]:
+    """
+    Dependency reading the request body of an upload into a temporary file, rewound to its start.
+    The upload is rejected with 413 as soon as it exceeds `limit` bytes. The file is closed after the response.
+
+    Bodies declared as route parameters are read into memory completely before any check can run, so upload
+    routes take the body from this dependency and declare it in the OpenAPI schema with `upload_body`.
+    """
+
+    async def read_upload(request: Request) -> AsyncIterator[IO[bytes]]:
+        content_length = request.headers.get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            raise HTTPException(status_code=413, detail=f"Upload is larger than {limit} bytes")
+
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_SIZE) as file:
+            size = 0
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > limit:
+                    raise HTTPException(status_code=413, detail=f"Upload is larger than {limit} bytes")
+                if file.tell() + len(chunk) > SPOOL_MEMORY_SIZE:
+                    await run_in_threadpool(file.write, chunk)
+                else:
+                    file.write(chunk)
+            file.seek(0)
+            yield file
+
+    return read_upload
+
+
+def upload_body(media_type: str, description: Optional[str] = None) -> dict[str, Any]:
+    """OpenAPI `requestBody` of a binary upload read with `upload`, for the `openapi_extra` of a route"""
+    schema: dict[str, Any] = {"type": "string", "format": "binary"}
+    if description is not None:
+        schema["description"] = description
+    return {"requestBody": {"required": True, "content": {media_type: {"schema": schema}}}}
@@ -2,6 +2,7 @@ import socket
 
 import numpy as np
 from decouple import config
+from numpy.typing import ArrayLike
 
 # needs to be provided in format "hostname:port" or "ip:port"
 RERUN_ADDR = config("RERUN_ADDR", default="", cast=str)
@@ -12,6 +13,30 @@ def rgba_to_rgb(rgba: np.ndarray) -> np.ndarray:
     return rgba[..., :-1]
 
 
+def transform_difference(a: np.ndarray, b: np.ndarray) -> tuple[float, float]:
+    """
+    Returns the difference between two homogeneous 4x4 transforms
+    as translation distance (in the unit of the transforms) and rotation angle in degrees.
+    """
+    translation = float(np.linalg.norm(a[:3, 3] - b[:3, 3]))
+    relative_rotation = a[:3, :3].T @ b[:3, :3]
+    cos_angle = np.clip((np.trace(relative_rotation) - 1) / 2, -1.0, 1.0)
+    return translation, float(np.degrees(np.arccos(cos_angle)))
+
+
+def robust_outliers(values: ArrayLike, threshold: float = 3.5, minimum_deviation: float = 1e-3) -> np.ndarray:
+    """
+    Flags outliers using the modified z-score based on the median absolute deviation.
+    Values with a score above the threshold are considered outliers.
+    The median absolute deviation is at least `minimum_deviation` (in the unit of the values), so values which are
+    almost all equal do not flag tiny numerical differences as outliers.
+    """
+    array = np.asarray(values, dtype=np.float64)
+    deviation = np.abs(array - np.median(array))
+    mad = max(float(np.median(deviation)), minimum_deviation)
+    return 0.6745 * deviation / mad > threshold
+
+
 def is_rerun_enabled() -> bool:
     """
     Checks if rerun.io should be enabled.
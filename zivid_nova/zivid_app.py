@@ -1,14 +1,21 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import timedelta
-from functools import wraps
+from functools import lru_cache, wraps
 from pathlib import Path
 from threading import Lock
+from typing import Callable, Iterator, Optional
 
 import zivid
+import zivid.calibration
 import zivid.capture_assistant
+from decouple import config
 from loguru import logger
 
 from zivid_nova.models.capture_settings_preset import CaptureSettingsPreset
 from zivid_nova.models.downsample_factor import DownsampleFactor
+from zivid_nova.sharding import owns
 
 try:
     app = zivid.Application()
@@ -16,9 +23,21 @@ except RuntimeError:
     app = None
     logger.warning("Could not initialize zivid application. Probably no GPU available.")
 
+# Path of a Zivid file camera (.zfc) which is listed next to the connected cameras, e.g. to run the service and the
+# load test (`poetry run loadtest`) on machines without camera hardware
+FILE_CAMERA = config("FILE_CAMERA", default="", cast=str)
+
 _camera_cache: dict[str, zivid.Camera] = {}
 
 
+@lru_cache
+def _file_camera() -> zivid.Camera:
+    """The simulated camera, created once. File cameras capture the frames recorded in the file."""
+
+    logger.info(f"Adding file camera {FILE_CAMERA}")
+    return app.create_file_camera(FILE_CAMERA)
+
+
 def _update_camera_cache():
     """Update the camera cache"""
     global _camera_cache  # pylint: disable=global-statement
@@ -26,8 +45,13 @@ def _update_camera_cache():
     # Keep connected camera references because new references are not connected
     _camera_cache = {kv[0]: kv[1] for kv in _camera_cache.items() if kv[1].state.connected}
 
-    for camera in app.cameras():
-        if not camera.info.serial_number in _camera_cache:
+    cameras = app.cameras()
+    if FILE_CAMERA:
+        cameras.append(_file_camera())
+
+    for camera in cameras:
+        # cameras of other workers are never connected by this process
+        if owns(camera.info.serial_number) and not camera.info.serial_number in _camera_cache:
             _camera_cache[camera.info.serial_number] = camera
 
 
@@ -67,7 +91,14 @@ def get_connected_camera(serial_number: str) -> zivid.Camera:
     return camera
 
 
-def _get_settings(camera: zivid.Camera, preset: CaptureSettingsPreset) -> zivid.Settings:
+@lru_cache
+def _load_settings(filename: str) -> zivid.Settings:
+    """Load settings from the resources. The settings are cached, they must not be modified."""
+
+    return zivid.Settings.load(str(Path(__file__).parent / "resources" / filename))
+
+
+def get_settings(camera: zivid.Camera, preset: CaptureSettingsPreset) -> zivid.Settings:
     """Get settings for a camera and a preset. Loads settings from file or suggests settings if preset is AUTO"""
 
     if preset is CaptureSettingsPreset.AUTO:
@@ -77,35 +108,63 @@ def _get_settings(camera: zivid.Camera, preset: CaptureSettingsPreset) -> zivid.
         )
         return zivid.capture_assistant.suggest_settings(camera, suggest_settings_parameters)
 
-    settings_file = str(Path(__file__).parent / "resources" / preset.to_filename())
-    return zivid.Settings.load(settings_file)
+    return _load_settings(preset.to_filename())
 
 
-def get_camera_frame(
-    camera: zivid.Camera, down_sample_factor: DownsampleFactor, preset: CaptureSettingsPreset
-) -> zivid.Frame:
-    """Get a frame from a camera. Downsample the point cloud if requested"""
-    settings = _get_settings(camera, preset)
+def capture_frame(camera: zivid.Camera, preset: CaptureSettingsPreset) -> zivid.Frame:
+    """
+    Capture a full resolution frame. Returns as soon as the acquisition is done,
+    the point cloud is processed in the background.
+    """
+    return capture_frame_with_settings(camera, get_settings(camera, preset))
+
+
+def capture_frame_with_settings(camera: zivid.Camera, settings: zivid.Settings) -> zivid.Frame:
+    """Capture a full resolution frame with preloaded settings, see `capture_frame`"""
     frame = camera.capture(settings)
 
     if isinstance(frame, zivid.Frame):
-        if down_sample_factor is not DownsampleFactor.NONE:
-            frame.point_cloud().downsample(down_sample_factor.to_zivid())
         return frame
 
     raise ValueError("Unhandled frame type")
 
 
-def _get_settings2d() -> zivid.Settings2D:
-    """Get settings2d for a camera"""
+def get_camera_frame(
+    camera: zivid.Camera, down_sample_factor: DownsampleFactor, preset: CaptureSettingsPreset
+) -> zivid.Frame:
+    """Get a frame from a camera. Downsample the point cloud in place if requested"""
+    frame = capture_frame(camera, preset)
+
+    if down_sample_factor is not DownsampleFactor.NONE:
+        frame.point_cloud().downsample(down_sample_factor.to_zivid())
+    return frame
+
+
+@lru_cache
+def get_settings2d() -> zivid.Settings2D:
+    """Get settings2d for a camera. The settings are cached, they must not be modified."""
 
     settings_file = str(Path(__file__).parent / "resources/Zivid2_Settings_Zivid_Two_M70_Default2D.yml")
     return zivid.Settings2D.load(settings_file)
 
 
+@lru_cache
+def get_projection_settings2d() -> zivid.Settings2D:
+    """
+    Get settings2d for captures while the projector shows an image. The projector must not be used as flash.
+    The settings are cached, they must not be modified.
+    """
+
+    return zivid.Settings2D(
+        acquisitions=[
+            zivid.Settings2D.Acquisition(brightness=0.0, exposure_time=timedelta(microseconds=20000), aperture=2.83)
+        ]
+    )
+
+
 def get_camera_frame2d(camera: zivid.Camera) -> zivid.Frame2D:
     """Get a frame2d from a camera"""
-    settings = _get_settings2d()
+    settings = get_settings2d()
     frame = camera.capture(settings)
 
     if isinstance(frame, zivid.Frame2D):
@@ -114,13 +173,70 @@ def get_camera_frame2d(camera: zivid.Camera) -> zivid.Frame2D:
     raise ValueError("Unhandled frame type")
 
 
+def detect_calibration_board_in_file(path: str) -> tuple[str, zivid.calibration.DetectionResult]:
+    """
+    Load a frame from a ZDF file and detect the calibration board in it. Does not use a camera.
+    Returns the serial number of the camera the frame was captured with and the detection result.
+    """
+    with zivid.Frame(path) as frame:
+        return frame.camera_info.serial_number, zivid.calibration.detect_calibration_board(frame)
+
+
 _lock = Lock()
 
+# Number of threads waiting for the zivid lock. `threading.Lock` is not fair, so background loops which take the
+# lock repeatedly check it and back off instead of winning the lock again right after releasing it.
+_lock_waiters = 0
+_lock_waiters_lock = Lock()
+
+# Weight of the latest measurement in the average lock hold time
+_LOCK_TIME_SMOOTHING = 0.2
+# Initial estimate of the lock hold time in seconds, roughly one capture
+_lock_time = 1.0
+
+# Called with the time in seconds the current request held the zivid lock, e.g. by the admission control, which only
+# estimates the wait from camera requests. Also available in the worker threads of sync routes.
+lock_time_listener: ContextVar[Optional[Callable[[float], None]]] = ContextVar("lock_time_listener", default=None)
+
+
+def average_lock_time() -> float:
+    """Exponentially weighted average of the time in seconds a request holds the zivid lock"""
+    return _lock_time
+
+
+def lock_waiters() -> int:
+    """Number of threads waiting for the zivid lock"""
+    return _lock_waiters
+
+
+@contextmanager
+def locked() -> Iterator[None]:
+    """Hold the zivid lock, e.g. for a part of a request. Counts as waiter until the lock is acquired."""
+    global _lock_time, _lock_waiters  # pylint: disable=global-statement
+    with _lock_waiters_lock:
+        _lock_waiters += 1
+    try:
+        _lock.acquire()
+    finally:
+        with _lock_waiters_lock:
+            _lock_waiters -= 1
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _lock_time += _LOCK_TIME_SMOOTHING * (elapsed - _lock_time)
+        _lock.release()
+        listener = lock_time_listener.get()
+        if listener is not None:
+            listener(elapsed)
+
 
 def zivid_lock(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        with _lock:
+        with locked():
             return f(*args, **kwargs)
 
     return decorated